@@ -0,0 +1,544 @@
+"""
+Benchmark for timetable model construction.
+
+Builds synthetic colleges in memory (no database needed) and times the
+index-driven TimetableModelBuilder, reporting how many decision variables
+survive pruning. For comparison it also counts the Section queries the
+previous per-loop builder issued for the same input.
+
+Compare mode solves synthetic colleges of increasing size with each
+engine and prints model size, build/solve time and status side by side.
+
+Suite mode runs named college sizes against each engine, every case in a
+fresh process so peak RSS belongs to that case alone, and writes the
+results as JSON. With --service the case goes through
+generate_timetable_internal() against a throwaway SQLite database, so
+loading and persistence are timed too. --diff compares two result files
+and exits non-zero when a case got slower, bigger or lost feasibility.
+--instances adds exported solver instances (solver_instance.py export) to
+the suite, so real colleges' data can sit next to the synthetic sizes.
+
+Persistence mode writes synthetic timetable rows through the ORM and
+through each bulk write path of services/bulk_writer.py and reports rows
+per second. It uses a temporary SQLite database unless --database-url
+points elsewhere (use --methods orm,copy on PostgreSQL).
+
+Usage:
+    python benchmark_scheduler.py
+    python benchmark_scheduler.py --courses 300 --rooms 25
+    python benchmark_scheduler.py --compare monolithic,two_phase --scales 1,2,4
+    python benchmark_scheduler.py --suite small,medium --engines two_phase,decomposed --output base.json
+    python benchmark_scheduler.py --instances college7.zip --engines two_phase,interval --output real.json
+    python benchmark_scheduler.py --diff base.json current.json --threshold 0.2
+    python benchmark_scheduler.py --persistence 20000
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import random
+import tempfile
+import subprocess
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from services.scheduler_engines import run_engine
+from services.scheduler_model import TimetableModelBuilder, TIME_SLOTS
+from utils.slot_grid import WEEK_DAYS, slot_day, slot_hour, slot_labels
+
+# Named college sizes for --suite. Every case uses the same seed, so a
+# suite run is reproducible across machines and commits.
+SUITE = {
+    "small": {"departments": 2, "years": 2, "sections_per_year": 2, "courses_per_year": 3, "rooms": 8},
+    "medium": {"departments": 4, "years": 4, "sections_per_year": 2, "courses_per_year": 5, "rooms": 20},
+    "large": {"departments": 8, "years": 4, "sections_per_year": 2, "courses_per_year": 5, "rooms": 40},
+    "xlarge": {"departments": 12, "years": 4, "sections_per_year": 3, "courses_per_year": 6, "rooms": 80}
+}
+
+# Metrics checked by --diff, with the smallest absolute change worth reporting
+DIFF_METRICS = {
+    "build_time": 0.05,
+    "solve_time": 0.25,
+    "total_time": 0.25,
+    "variables": 0,
+    "constraints": 0,
+    "peak_rss_mb": 10.0
+}
+
+
+def make_synthetic_college(departments=4, years=4, sections_per_year=2, courses_per_year=5,
+                           rooms=20, unavailability_density=0.05, hours_per_week=3,
+                           lab_share=0.2, seed=42):
+    """Return a load_scheduler_input()-shaped dict for a synthetic college."""
+    rng = random.Random(seed)
+
+    sections, courses, faculty, unavailability = [], [], [], []
+    room_rows = []
+    for r in range(rooms):
+        is_lab = r % 5 == 4
+        room_rows.append({
+            "room_id": r + 1,
+            "name": f"{'Lab' if is_lab else 'Room'}-{r + 1:03d}",
+            "capacity": rng.choice([40, 60, 60, 90]) if not is_lab else 60,
+            "resources": "Computers, AC" if is_lab else "Projector"
+        })
+
+    course_id = 0
+    for dept_id in range(1, departments + 1):
+        for year in range(1, years + 1):
+            for s in range(sections_per_year):
+                sections.append({
+                    "id": len(sections) + 1,
+                    "name": chr(ord("A") + s),
+                    "year": year,
+                    "dept_id": dept_id,
+                    "max_hours_per_day": 6,
+                    "student_count": rng.randint(30, 60)
+                })
+            for _ in range(courses_per_year):
+                course_id += 1
+                faculty_id = course_id
+                faculty.append({
+                    "faculty_id": faculty_id,
+                    "faculty_name": f"Faculty {faculty_id}",
+                    "email": None
+                })
+                courses.append({
+                    "course_id": course_id,
+                    "name": f"Course {course_id}",
+                    "type": "lab" if rng.random() < lab_share else "theory",
+                    "credits": 3,
+                    "year": year,
+                    "semester": 1,
+                    "dept_id": dept_id,
+                    "faculty_id": faculty_id,
+                    "hours_per_week": hours_per_week,
+                    "is_fixed": False,
+                    "fixed_slot": None,
+                    "fixed_room_id": None
+                })
+                for slot in TIME_SLOTS:
+                    if rng.random() < unavailability_density:
+                        unavailability.append({"faculty_id": faculty_id, "slot": slot})
+
+    return {
+        "college_id": None,
+        "courses": courses,
+        "sections": sections,
+        "rooms": room_rows,
+        "faculty": faculty,
+        "unavailability": unavailability
+    }
+
+
+def legacy_section_queries(data):
+    """Number of Section.query.filter_by() calls the per-loop builder made for this input."""
+    courses, rooms, slots = data["courses"], data["rooms"], len(TIME_SLOTS)
+    with_faculty = {f["faculty_id"] for f in data["faculty"]}
+    unavailable = {(u["faculty_id"], u["slot"]) for u in data["unavailability"]}
+
+    queries = len(courses)                                         # decision variables
+    queries += sum(1 for c in courses if c["is_fixed"])            # fixed classes
+    queries += sum(1 for (fid, _) in unavailable for c in courses if c["faculty_id"] == fid)
+    queries += len(courses)                                        # hours per week
+    queries += slots * len(rooms) * len(courses)                   # room conflicts
+    queries += slots * sum(1 for c in courses if c["faculty_id"] in with_faculty)  # faculty conflicts
+    return queries
+
+
+def run(args):
+    data = make_synthetic_college(
+        departments=args.departments,
+        years=args.years,
+        sections_per_year=args.sections,
+        courses_per_year=max(1, args.courses // (args.departments * args.years)),
+        rooms=args.rooms,
+        unavailability_density=args.unavailability,
+        seed=args.seed
+    )
+
+    started = time.perf_counter()
+    builder = TimetableModelBuilder(data).build()
+    elapsed = time.perf_counter() - started
+    stats = builder.stats()
+
+    print(f"Courses: {len(data['courses'])}  Sections: {len(data['sections'])}  Rooms: {len(data['rooms'])}")
+    dense = stats["variables"] + stats["pruned_variables"]
+    print(f"Variables: {stats['variables']} of {dense} dense "
+          f"({dense / max(stats['variables'], 1):.1f}x smaller)  "
+          f"Constraints: {sum(stats['constraints'].values())}")
+    for family, count in sorted(stats["constraints"].items()):
+        print(f"  {family:<15} {count}")
+    print(f"Model build time: {elapsed:.3f}s (6 queries to load inputs)")
+    print(f"Previous builder: {legacy_section_queries(data)} Section queries before solving")
+
+
+def compare(args):
+    engines = [e.strip() for e in args.compare.split(",") if e.strip()]
+    print(f"{'scale':>5} {'courses':>7} {'engine':<12} {'vars':>8} {'build':>7} {'solve':>7} {'rooms':>7}  status")
+    for scale in [int(x) for x in args.scales.split(",")]:
+        data = make_synthetic_college(
+            departments=args.departments * scale,
+            years=args.years,
+            sections_per_year=args.sections,
+            courses_per_year=5,
+            rooms=args.rooms * scale,
+            unavailability_density=args.unavailability,
+            seed=args.seed
+        )
+        for engine in engines:
+            stats = run_engine(data, engine=engine, time_limit=args.time_limit)["stats"]
+            print(f"{scale:>5} {len(data['courses']):>7} {engine:<12} {stats['variables']:>8} "
+                  f"{stats['build_time']:>6.2f}s {stats['solve_time']:>6.2f}s "
+                  f"{stats.get('room_assignment_time', 0):>6.2f}s  {stats['status']}")
+
+
+# --- SUITE ---
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its children, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _fixed_labels(slot):
+    """Course.fixed_day/fixed_slot columns for a snapshot's fixed slot id."""
+    if slot is None:
+        return {"fixed_day": None, "fixed_slot": None}
+    return {"fixed_day": WEEK_DAYS[slot_day(slot)], "fixed_slot": f"{slot_hour(slot):02d}"}
+
+
+def seed_database(data):
+    """Insert a synthetic college into the current app's database, keeping its ids. Returns college_id."""
+    from extensions import db
+    from models import (College, Department, Faculty, Course, Section, Classroom,
+                        FacultyUnavailability, User)
+
+    college = College(name="Benchmark College", college_code="BENCH")
+    db.session.add(college)
+    db.session.flush()
+    cid = college.id
+
+    def insert(model, rows):
+        if rows:
+            db.session.execute(db.insert(model), [dict(r, college_id=cid) for r in rows])
+
+    insert(Department, [{"id": d, "dept_name": f"Dept {d}"}
+                        for d in sorted({s["dept_id"] for s in data["sections"]})])
+    insert(Faculty, [{"faculty_id": f["faculty_id"], "faculty_name": f["faculty_name"]} for f in data["faculty"]])
+    insert(Classroom, [{k: r[k] for k in ("room_id", "name", "capacity", "resources")} for r in data["rooms"]])
+    insert(Section, [{k: s[k] for k in ("id", "name", "year", "dept_id", "max_hours_per_day")}
+                     for s in data["sections"]])
+    insert(Course, [dict(c, **_fixed_labels(c["fixed_slot"])) for c in data["courses"]])
+    insert(FacultyUnavailability, [dict(u, **dict(zip(("day", "start_time"), slot_labels(u["slot"]))))
+                                   for u in data["unavailability"]])
+    insert(User, [{"username": f"student{s['id']}_{n}", "password_hash": "-", "role": "student",
+                   "dept_id": s["dept_id"], "year": s["year"], "section_id": s["id"]}
+                  for s in data["sections"] for n in range(s["student_count"])])
+    db.session.commit()
+    return cid
+
+
+def _service_case(data, engine, time_limit, profile):
+    from flask import Flask
+    from config import config
+    from extensions import db
+    from services.scheduler_service import generate_timetable_internal
+    import models  # noqa: F401  (register tables)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the service writes output/timetable_final.csv
+        app = Flask("benchmark")
+        app.config.from_object(config["testing"])
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            college_id = seed_database(data)
+            started = time.perf_counter()
+            result = generate_timetable_internal(engine=engine, college_id=college_id, force=True,
+                                                 profile=profile, time_limit=time_limit)
+            elapsed = time.perf_counter() - started
+            db.session.remove()
+    stats = result.get("stats") or {}
+    if "error" in result and "status" not in stats:
+        stats["status"] = "ERROR"
+    return stats, elapsed
+
+
+def benchmark_case(case, params, engine, time_limit, profile=None, service=False):
+    """Run one (college size, engine) case and return its result record."""
+    from services.solver_profiles import resolve_solver_params, host_worker_cap
+
+    if "instance" in params:
+        from services.model_export import load_instance
+        data = load_instance(params["instance"], with_model=False)["snapshot"]
+    else:
+        data = make_synthetic_college(**params)
+    if service:
+        stats, elapsed = _service_case(data, engine, time_limit, profile)
+    else:
+        solver_params = resolve_solver_params(profile, max_workers=host_worker_cap()) if profile else None
+        started = time.perf_counter()
+        stats = run_engine(data, engine=engine, time_limit=time_limit, solver_params=solver_params)["stats"]
+        elapsed = time.perf_counter() - started
+
+    constraints = stats.get("constraints")
+    return {
+        "case": case,
+        "engine": engine,
+        "service": service,
+        "profile": profile,
+        "params": params,
+        "courses": len(data["courses"]),
+        "sections": len(data["sections"]),
+        "rooms": len(data["rooms"]),
+        "variables": stats.get("variables"),
+        "constraints": sum(constraints.values()) if isinstance(constraints, dict) else None,
+        "build_time": stats.get("build_time"),
+        "solve_time": stats.get("solve_time"),
+        "total_time": round(elapsed, 3),
+        "status": stats.get("status"),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(args):
+    cases = [c.strip() for c in (args.suite or "").split(",") if c.strip()]
+    unknown = [c for c in cases if c not in SUITE]
+    if unknown:
+        sys.exit(f"Unknown suite case(s): {', '.join(unknown)}. Choose from: {', '.join(SUITE)}")
+    suite = {case: dict(SUITE[case], unavailability_density=args.unavailability, seed=args.seed) for case in cases}
+    for path in [p.strip() for p in (args.instances or "").split(",") if p.strip()]:
+        if not os.path.exists(path):
+            sys.exit(f"Instance file not found: {path}")
+        suite[os.path.splitext(os.path.basename(path))[0]] = {"instance": os.path.abspath(path)}
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+
+    results = []
+    print(f"{'case':<8} {'engine':<12} {'vars':>8} {'cons':>8} {'build':>7} {'solve':>7} {'total':>7} "
+          f"{'rss':>8}  status")
+    for case, params in suite.items():
+        for engine in engines:
+            # A fresh process per case keeps peak RSS and warm caches from leaking between cases
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                record = pool.submit(benchmark_case, case, params, engine, args.time_limit,
+                                     args.profile, args.service).result()
+            results.append(record)
+            print(f"{case:<8} {engine:<12} {record['variables'] or 0:>8} {record['constraints'] or 0:>8} "
+                  f"{record['build_time'] or 0:>6.2f}s {record['solve_time'] or 0:>6.2f}s "
+                  f"{record['total_time']:>6.2f}s {record['peak_rss_mb'] or 0:>6.0f}MB  {record['status']}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "time_limit": args.time_limit,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+def _is_feasible(status):
+    return status in ("OPTIMAL", "FEASIBLE")
+
+
+def diff_results(baseline, current, threshold=0.2):
+    """
+    Compare two suite reports case by case. A metric regresses when it grew
+    by more than threshold (relative) and by more than its DIFF_METRICS
+    noise floor; a case regresses when it lost feasibility. Returns a list
+    of {"case", "engine", "metric", "baseline", "current"} dicts.
+    """
+    def key(r):
+        return (r["case"], r["engine"], r.get("service", False), r.get("profile"))
+
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        before = base.get(key(record))
+        if before is None:
+            continue
+        if _is_feasible(before["status"]) and not _is_feasible(record["status"]):
+            regressions.append({"case": record["case"], "engine": record["engine"], "metric": "status",
+                                "baseline": before["status"], "current": record["status"]})
+        for metric, floor in DIFF_METRICS.items():
+            old, new = before.get(metric), record.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append({"case": record["case"], "engine": record["engine"], "metric": metric,
+                                    "baseline": old, "current": new})
+    return regressions
+
+
+def diff(args):
+    with open(args.diff[0]) as f:
+        baseline = json.load(f)
+    with open(args.diff[1]) as f:
+        current = json.load(f)
+
+    regressions = diff_results(baseline, current, args.threshold)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%}.")
+        return 0
+    print(f"{'case':<8} {'engine':<12} {'metric':<12} {'baseline':>12} {'current':>12}")
+    for r in regressions:
+        print(f"{r['case']:<8} {r['engine']:<12} {r['metric']:<12} {str(r['baseline']):>12} {str(r['current']):>12}")
+    return 1
+
+
+# --- PERSISTENCE ---
+
+PERSISTENCE_METHODS = ("orm", "copy", "executemany")
+
+
+def synthetic_rows(data, count):
+    """count timetable row dicts cycling over the synthetic college's sections, courses and rooms."""
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    courses = {}
+    for c in data["courses"]:
+        courses.setdefault((c["dept_id"], c["year"]), []).append(c)
+    rows = []
+    for n in range(count):
+        section = data["sections"][n % len(data["sections"])]
+        cohort = courses[(section["dept_id"], section["year"])]
+        course = cohort[n // len(data["sections"]) % len(cohort)]
+        rows.append({
+            "course_id": course["course_id"],
+            "section_id": section["id"],
+            "faculty_id": course["faculty_id"],
+            "room_id": data["rooms"][n % len(data["rooms"])]["room_id"],
+            "day": days[n % len(days)],
+            "start_time": f"{9 + n % 7:02d}:00"
+        })
+    return rows
+
+
+def persistence_case(rows, method, college_id):
+    """Write rows with one method in its own transaction; returns rows per second."""
+    from extensions import db
+    from models import Timetable
+    from services.bulk_writer import write_timetable_rows
+
+    started = time.perf_counter()
+    if method == "orm":
+        db.session.add_all([Timetable(college_id=college_id, **row) for row in rows])
+        db.session.flush()
+    else:
+        write_timetable_rows(rows, college_id, method=method)
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+
+    written = db.session.query(Timetable).execution_options(all_timetable_versions=True) \
+        .filter(Timetable.college_id == college_id).count()
+    db.session.execute(db.delete(Timetable).where(Timetable.college_id == college_id))
+    db.session.commit()
+    db.session.expunge_all()
+    return {"method": method, "rows": written, "seconds": round(elapsed, 3),
+            "rows_per_sec": round(written / elapsed) if elapsed else None}
+
+
+def persistence(args):
+    """Compare the ORM write path with the bulk writer, in rows per second."""
+    from flask import Flask
+    from config import config
+    from extensions import db
+    from services.bulk_writer import default_method
+    import models  # noqa: F401  (register tables)
+
+    methods = [m.strip() for m in args.methods.split(",") if m.strip()]
+    unknown = [m for m in methods if m not in PERSISTENCE_METHODS]
+    if unknown:
+        sys.exit(f"Unknown method(s): {', '.join(unknown)}. Choose from: {', '.join(PERSISTENCE_METHODS)}")
+    data = make_synthetic_college(**dict(SUITE["large"], seed=args.seed))
+    rows = synthetic_rows(data, args.persistence)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask("benchmark")
+        app.config.from_object(config["testing"])
+        app.config["SQLALCHEMY_DATABASE_URI"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            college_id = seed_database(data)
+            dialect = db.engine.dialect
+            print(f"{len(rows)} rows on {dialect.name} (bulk default: {default_method(dialect)})")
+            print(f"{'method':<12} {'seconds':>8} {'rows/sec':>10}  speedup")
+            results = []
+            for method in methods:
+                record = persistence_case(rows, method, college_id)
+                results.append(record)
+                baseline = results[0]["seconds"]
+                speedup = baseline / record["seconds"] if record["seconds"] else 0
+                print(f"{method:<12} {record['seconds']:>7.2f}s {record['rows_per_sec'] or 0:>10}  {speedup:.1f}x")
+            db.session.remove()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark timetable model construction")
+    parser.add_argument("--departments", type=int, default=4)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--sections", type=int, default=2, help="sections per (dept, year)")
+    parser.add_argument("--courses", type=int, default=320, help="total courses")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--unavailability", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", help="comma-separated engines to solve and compare, e.g. monolithic,two_phase")
+    parser.add_argument("--scales", default="1,2,4", help="department/room multipliers for --compare")
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--suite", help=f"comma-separated college sizes to benchmark: {', '.join(SUITE)}")
+    parser.add_argument("--instances", help="comma-separated exported instance files to add to the suite")
+    parser.add_argument("--engines", default="monolithic,two_phase", help="engines for --suite")
+    parser.add_argument("--profile", help="solver profile for --suite (default: engine defaults)")
+    parser.add_argument("--service", action="store_true",
+                        help="run --suite cases through generate_timetable_internal on a temporary database")
+    parser.add_argument("--output", help="write --suite results to this JSON file")
+    parser.add_argument("--diff", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two --suite result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown --diff reports")
+    parser.add_argument("--persistence", type=int, metavar="ROWS",
+                        help="time writing this many timetable rows with each --methods write path")
+    parser.add_argument("--methods", default="orm,executemany",
+                        help=f"write paths for --persistence: {', '.join(PERSISTENCE_METHODS)}")
+    parser.add_argument("--database-url", help="database for --persistence (default: temporary SQLite)")
+    args = parser.parse_args()
+    if args.persistence:
+        persistence(args)
+    elif args.diff:
+        sys.exit(diff(args))
+    elif args.suite or args.instances:
+        run_suite(args)
+    elif args.compare:
+        compare(args)
+    else:
+        run(args)
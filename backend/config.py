@@ -26,6 +26,16 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASS")
     MAIL_DEFAULT_SENDER = ("Timetable System", os.getenv("MAIL_USER"))
 
+    # Background timetable generation (worker processes per web process)
+    GENERATION_WORKERS = int(os.environ.get("GENERATION_WORKERS", 2))
+    # CP-SAT workers per generation job (default: CPUs / GENERATION_WORKERS)
+    SOLVER_MAX_WORKERS = int(os.environ.get("SOLVER_MAX_WORKERS", 0)) or None
+    # Where failed or timed-out solves are exported for offline reproduction (unset: not exported)
+    SOLVER_EXPORT_DIR = os.environ.get("SOLVER_EXPORT_DIR")
+
+    # Archived timetable versions kept per college for diffing and rollback
+    TIMETABLE_VERSIONS_KEPT = int(os.environ.get("TIMETABLE_VERSIONS_KEPT", 10))
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
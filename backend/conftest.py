@@ -0,0 +1,60 @@
+"""
+Shared pytest fixtures: a Flask app on a throwaway SQLite database and a
+small seeded college (1 section, 3 faculty, 3 theory courses of 3 hours
+each, 3 rooms of 40 seats), enough for every engine to generate 9 entries.
+"""
+
+import os
+
+import pytest
+from flask import Flask
+
+from extensions import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """
+    An app with its tables created in tmp_path/test.db. tmp_path is also
+    the working directory, since generation writes output/timetable_final.csv.
+    """
+    from config import config
+    import models  # noqa: F401  (registers every table for create_all)
+
+    monkeypatch.chdir(tmp_path)
+    os.environ["FLASK_ENV"] = "testing"
+    app = Flask(__name__)
+    app.config.from_object(config["testing"])
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config["GENERATION_WORKERS"] = 1
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def college_id(app):
+    """Id of the seeded college."""
+    from models import College, Department, Faculty, Course, Section, Classroom
+
+    with app.app_context():
+        college = College(name="Jobs College", college_code="JOBS")
+        db.session.add(college)
+        db.session.flush()
+        dept = Department(dept_name="CSE", college_id=college.id)
+        db.session.add(dept)
+        db.session.flush()
+        for i in range(3):
+            f = Faculty(faculty_name=f"F{i}", college_id=college.id, dept_id=dept.id)
+            db.session.add(f)
+            db.session.flush()
+            db.session.add(Course(name=f"C{i}", type="theory", year=1, dept_id=dept.id, hours_per_week=3,
+                                  faculty_id=f.faculty_id, college_id=college.id))
+            db.session.add(Classroom(name=f"R{i}", capacity=40, college_id=college.id))
+        db.session.add(Section(name="A", year=1, dept_id=dept.id, college_id=college.id))
+        db.session.commit()
+        return college.id
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Migration script to add 'objective_weights' column to the colleges table.
+NULL (the default weights) for existing colleges.
+"""
+
+import sqlite3
+import os
+
+def migrate_college_objective_weights():
+    """Add objective_weights column to colleges table if it doesn't exist"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(colleges)")
+        column_names = [col[1] for col in cursor.fetchall()]
+
+        if 'objective_weights' not in column_names:
+            print("Adding 'objective_weights' column to colleges table...")
+            cursor.execute('''
+                ALTER TABLE colleges
+                ADD COLUMN objective_weights JSON
+            ''')
+            conn.commit()
+
+            print("Migration completed successfully!")
+            return True
+
+        else:
+            print("Migration already completed - 'objective_weights' column exists.")
+            return True
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_college_objective_weights()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
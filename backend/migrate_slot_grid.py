@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migration script for the integer slot grid (utils/slot_grid.py).
+
+Adds colleges.slot_grid, plus an indexed integer slot column to timetable,
+faculty_unavailability and swap_requests, and fills the slot ids in from
+the existing day/start_time labels. Rows whose labels do not parse keep a
+NULL slot and are listed so they can be fixed by hand.
+"""
+
+import sqlite3
+import os
+
+from utils.slot_grid import slot_from_labels
+
+# table -> (slot column, day column, start time column, primary key)
+SLOT_COLUMNS = {
+    "timetable": ("slot", "day", "start_time", "timetable_id"),
+    "faculty_unavailability": ("slot", "day", "start_time", "id"),
+    "swap_requests": ("proposed_slot", "proposed_day", "proposed_start_time", "id"),
+}
+
+
+def migrate_slot_grid():
+    """Add the slot grid columns if they don't exist and backfill the slot ids"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(colleges)")
+        if 'slot_grid' not in [col[1] for col in cursor.fetchall()]:
+            print("Adding 'slot_grid' column to colleges table...")
+            cursor.execute("ALTER TABLE colleges ADD COLUMN slot_grid JSON")
+
+        for table, (slot_col, day_col, time_col, pk) in SLOT_COLUMNS.items():
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [col[1] for col in cursor.fetchall()]
+            if not columns:
+                print(f"Table '{table}' not found - skipping.")
+                continue
+            if slot_col not in columns:
+                print(f"Adding '{slot_col}' column to {table} table...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {slot_col} INTEGER")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{slot_col} ON {table} ({slot_col})")
+
+            cursor.execute(f"SELECT {pk}, {day_col}, {time_col} FROM {table} WHERE {slot_col} IS NULL")
+            updates, unparsed = [], []
+            for row_id, day, start_time in cursor.fetchall():
+                slot = slot_from_labels(day, start_time)
+                if slot is None:
+                    unparsed.append((row_id, day, start_time))
+                else:
+                    updates.append((slot, row_id))
+            cursor.executemany(f"UPDATE {table} SET {slot_col} = ? WHERE {pk} = ?", updates)
+            print(f"{table}: filled {len(updates)} slot ids")
+            for row_id, day, start_time in unparsed:
+                print(f"  [WARN] {table} {pk}={row_id}: cannot parse day={day!r} start_time={start_time!r}")
+
+        conn.commit()
+        print("Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_slot_grid()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
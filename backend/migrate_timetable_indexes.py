@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite lookup indexes to the timetable table
+(see Timetable.__table_args__). Each leads with college_id, which the tenant
+filter adds to every query, then the faculty member, section or room and the
+slot id, so per-owner and per-slot lookups no longer scan a college's rows.
+Refreshes the planner statistics afterwards.
+"""
+
+import sqlite3
+import os
+
+# index name -> columns
+INDEXES = {
+    "ix_timetable_college_faculty_slot": ("college_id", "faculty_id", "slot"),
+    "ix_timetable_college_section_slot": ("college_id", "section_id", "slot"),
+    "ix_timetable_college_room_slot": ("college_id", "room_id", "slot"),
+    "ix_timetable_college_slot_room": ("college_id", "slot", "room_id"),
+}
+
+def migrate_timetable_indexes():
+    """Create the composite timetable indexes if they don't exist"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(timetable)")
+        column_names = [col[1] for col in cursor.fetchall()]
+        if 'slot' not in column_names:
+            print("The timetable table has no 'slot' column - run migrate_slot_grid.py first.")
+            return False
+
+        cursor.execute("PRAGMA index_list(timetable)")
+        existing = {row[1] for row in cursor.fetchall()}
+
+        created = 0
+        for name, columns in INDEXES.items():
+            if name in existing:
+                continue
+            print(f"Creating index {name} on timetable ({', '.join(columns)})...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON timetable ({', '.join(columns)})")
+            created += 1
+
+        if created:
+            cursor.execute("ANALYZE timetable")
+            conn.commit()
+            print("Migration completed successfully!")
+        else:
+            print("Migration already completed - all timetable indexes exist.")
+        return True
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_timetable_indexes()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Migration script for optimistic concurrency on timetable edits.
+
+Adds a 'row_version' column to timetable and swap_requests (bumped by every
+ORM update, so an update of a row that changed since it was read fails),
+and unique indexes that stop a timetable version from booking a faculty
+member, section or room twice in one slot. Existing double bookings are
+listed and their index is left out until they are fixed by hand; rerun the
+script afterwards.
+"""
+
+import sqlite3
+import os
+
+# Tables that get a row_version
+VERSIONED_TABLES = ("timetable", "swap_requests")
+
+# index name -> the timetable column that must not repeat within (version_id, slot)
+UNIQUE_INDEXES = {
+    "uq_timetable_version_faculty_slot": "faculty_id",
+    "uq_timetable_version_section_slot": "section_id",
+    "uq_timetable_version_room_slot": "room_id",
+}
+
+def migrate_timetable_optimistic_locking():
+    """Add row_version columns and the timetable unique indexes if they don't exist"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        for table in VERSIONED_TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            if 'row_version' not in [col[1] for col in cursor.fetchall()]:
+                print(f"Adding 'row_version' column to {table} table...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 1")
+
+        cursor.execute("PRAGMA index_list(timetable)")
+        existing = {row[1] for row in cursor.fetchall()}
+
+        clean = True
+        for name, column in UNIQUE_INDEXES.items():
+            if name in existing:
+                continue
+            cursor.execute(f'''
+                SELECT version_id, {column}, slot, GROUP_CONCAT(timetable_id)
+                FROM timetable
+                WHERE version_id IS NOT NULL AND {column} IS NOT NULL AND slot IS NOT NULL
+                GROUP BY version_id, {column}, slot
+                HAVING COUNT(*) > 1
+            ''')
+            duplicates = cursor.fetchall()
+            if duplicates:
+                clean = False
+                print(f"Skipping {name}: {len(duplicates)} double booking(s) to fix first:")
+                for version_id, owner, slot, ids in duplicates:
+                    print(f"  version {version_id}, {column} {owner}, slot {slot}: timetable ids {ids}")
+                continue
+            print(f"Creating unique index {name} on timetable (version_id, {column}, slot)...")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON timetable (version_id, {column}, slot)")
+
+        conn.commit()
+        if clean:
+            print("Migration completed successfully!")
+        return clean
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_timetable_optimistic_locking()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
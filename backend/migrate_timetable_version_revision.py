@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Migration script to add 'revision' column to the timetable_versions table.
+The occupancy index (services/occupancy_index.py) compares it to tell
+whether its cached copy of a version is current. Existing versions start at 0.
+"""
+
+import sqlite3
+import os
+
+def migrate_timetable_version_revision():
+    """Add revision column to timetable_versions table if it doesn't exist"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(timetable_versions)")
+        column_names = [col[1] for col in cursor.fetchall()]
+
+        if 'revision' not in column_names:
+            print("Adding 'revision' column to timetable_versions table...")
+            cursor.execute('''
+                ALTER TABLE timetable_versions
+                ADD COLUMN revision INTEGER NOT NULL DEFAULT 0
+            ''')
+            conn.commit()
+
+            print("Migration completed successfully!")
+            return True
+
+        else:
+            print("Migration already completed - 'revision' column exists.")
+            return True
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_timetable_version_revision()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Migration script for versioned timetables.
+Adds timetable.version_id and colleges.active_timetable_version_id, creates
+the timetable_versions table, and wraps each college's existing timetable
+rows into an active "Imported" version.
+"""
+
+import sqlite3
+import os
+from datetime import datetime
+
+def migrate_timetable_versions():
+    """Add timetable version columns/table and version existing rows"""
+
+    # Database path
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    db_path = os.path.join(base_dir, "timetable_enhanced.db")
+
+    if not os.path.exists(db_path):
+        print(f"Database not found at {db_path}")
+        return False
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS timetable_versions (
+                id INTEGER PRIMARY KEY,
+                college_id INTEGER NOT NULL REFERENCES colleges(id),
+                label VARCHAR(100),
+                engine VARCHAR(30),
+                status VARCHAR(20) NOT NULL DEFAULT 'draft',
+                parent_version_id INTEGER REFERENCES timetable_versions(id),
+                entry_count INTEGER DEFAULT 0,
+                stats JSON,
+                created_by_id INTEGER REFERENCES users(id),
+                created_at DATETIME,
+                activated_at DATETIME
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_timetable_versions_college_id ON timetable_versions (college_id)")
+
+        cursor.execute("PRAGMA table_info(timetable)")
+        if 'version_id' not in [col[1] for col in cursor.fetchall()]:
+            print("Adding 'version_id' column to timetable table...")
+            cursor.execute("ALTER TABLE timetable ADD COLUMN version_id INTEGER REFERENCES timetable_versions(id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_timetable_version_id ON timetable (version_id)")
+
+        cursor.execute("PRAGMA table_info(colleges)")
+        if 'active_timetable_version_id' not in [col[1] for col in cursor.fetchall()]:
+            print("Adding 'active_timetable_version_id' column to colleges table...")
+            cursor.execute("ALTER TABLE colleges ADD COLUMN active_timetable_version_id INTEGER")
+
+        # Wrap unversioned rows into one active version per college
+        cursor.execute('''
+            SELECT college_id, COUNT(*) FROM timetable
+            WHERE version_id IS NULL GROUP BY college_id
+        ''')
+        now = datetime.utcnow().isoformat(sep=" ")
+        for college_id, count in cursor.fetchall():
+            cursor.execute('''
+                INSERT INTO timetable_versions (college_id, label, status, entry_count, created_at, activated_at)
+                VALUES (?, 'Imported', 'active', ?, ?, ?)
+            ''', (college_id, count, now, now))
+            version_id = cursor.lastrowid
+            cursor.execute("UPDATE timetable SET version_id = ? WHERE college_id = ? AND version_id IS NULL",
+                           (version_id, college_id))
+            cursor.execute("UPDATE colleges SET active_timetable_version_id = ? WHERE id = ?",
+                           (version_id, college_id))
+            print(f"College {college_id}: {count} timetable rows moved into version {version_id}")
+
+        conn.commit()
+        print("Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    success = migrate_timetable_versions()
+    if success:
+        print("[SUCCESS] Database migration completed successfully!")
+    else:
+        print("[ERROR] Database migration failed!")
@@ -8,6 +8,7 @@ from .classroom import Classroom
 from .room_occupancy import RoomOccupancy
 from .course_allocation import CourseAllocation
 from .timetable import Timetable
+from .timetable_version import TimetableVersion
 from .swap_request import SwapRequest
 from .faculty_unavailability import FacultyUnavailability
 from .leave_request import LeaveRequest
@@ -26,14 +27,18 @@ from .notification import Notification, NotificationPreference
 from .user_google_auth import UserGoogleAuth
 from .calendar_event_map import CalendarEventMap
 from .user_google_auth import UserGoogleAuth
+from .generation_job import GenerationJob
+from .solution_cache import SolutionCache
+from .solver_run import SolverRun
 
 __all__ = [
     'College', 'User', 'Department', 'Faculty', 'Section', 'Course', 'Classroom',
-    'RoomOccupancy', 'CourseAllocation', 'Timetable', 'SwapRequest',
+    'RoomOccupancy', 'CourseAllocation', 'Timetable', 'TimetableVersion', 'SwapRequest',
     'FacultyUnavailability', 'LeaveRequest', 'ChatbotConversation', 'SystemAnnouncement',
     'Attendance', 'FacultyWorkload', 'Meeting', 'FacultyMeetingParticipation',
     'Assessment', 'Grade', 'StudentPerformance', 'Assignment',
     'Resource', 'ResourceBooking',
     'Notification', 'NotificationPreference',
-    'UserGoogleAuth', 'CalendarEventMap'
+    'UserGoogleAuth', 'CalendarEventMap',
+    'GenerationJob', 'SolutionCache', 'SolverRun'
 ]
@@ -14,6 +14,21 @@ class College(db.Model):
     
     # Subscription tiers: "free", "pro", "enterprise"
     subscription_tier = db.Column(db.String(50), default="free")
+
+    # Default CP-SAT profile for timetable generation: "quick", "balanced", "thorough"
+    solver_profile = db.Column(db.String(20), default="balanced")
+
+    # Timetable version readers see. Plain integer rather than a foreign key,
+    # because timetable_versions already references colleges.
+    active_timetable_version_id = db.Column(db.Integer, nullable=True)
+
+    # Days and periods timetables are generated on: {"days": ["Mon", ...], "hours": [9, ...]}.
+    # NULL means the default Mon-Fri, 09:00-17:00 grid (see utils/slot_grid.py).
+    slot_grid = db.Column(db.JSON, nullable=True)
+
+    # Soft-constraint weights for generation, e.g. {"section_gaps": 3, "preferred_hours": [9, ...]}.
+    # NULL means the defaults in services/scheduler_objective.py.
+    objective_weights = db.Column(db.JSON, nullable=True)
     
     # Optional branding per college
     logo_url = db.Column(db.String(500), nullable=True)
@@ -34,6 +49,10 @@ class College(db.Model):
             "is_active": self.is_active,
             "feature_flags": self.feature_flags or {},
             "subscription_tier": self.subscription_tier,
+            "solver_profile": self.solver_profile,
+            "active_timetable_version_id": self.active_timetable_version_id,
+            "slot_grid": self.slot_grid,
+            "objective_weights": self.objective_weights,
             "logo_url": self.logo_url,
             "primary_color": self.primary_color,
             "created_at": self.created_at.isoformat()
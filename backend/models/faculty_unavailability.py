@@ -1,4 +1,5 @@
 from extensions import db
+from utils.slot_grid import sync_slot
 
 class FacultyUnavailability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -6,6 +7,13 @@ class FacultyUnavailability(db.Model):
     faculty_id = db.Column(db.Integer, db.ForeignKey("faculty.faculty_id"), nullable=False)
     day = db.Column(db.String(20), nullable=False)
     start_time = db.Column(db.String(20), nullable=False)
+    slot = db.Column(db.Integer, nullable=True, index=True)
 
     faculty = db.relationship("Faculty", backref="unavailabilities")
     __table_args__ = (db.UniqueConstraint('faculty_id', 'day', 'start_time', name='_unique_faculty_unavailability'),)
+
+
+@db.event.listens_for(FacultyUnavailability, "before_insert")
+@db.event.listens_for(FacultyUnavailability, "before_update")
+def _sync_unavailability_slot(mapper, connection, target):
+    sync_slot(target)
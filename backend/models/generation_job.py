@@ -0,0 +1,54 @@
+from extensions import db
+from datetime import datetime
+
+class GenerationJob(db.Model):
+    """
+    Background timetable generation run.
+    Progress is written by the worker process, so any web worker can answer
+    a status poll or record a cancel request.
+    """
+    __tablename__ = "generation_jobs"
+
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    college_id = db.Column(db.Integer, db.ForeignKey("colleges.id"), nullable=False, index=True)
+    requested_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+
+    engine = db.Column(db.String(30), nullable=False, default="monolithic")
+    options = db.Column(db.JSON, default=dict)
+
+    # queued / running / succeeded / failed / cancelled
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    cancel_requested = db.Column(db.Boolean, default=False)
+
+    # Latest snapshot from the solver: phase, model size, solutions, best objective
+    progress = db.Column(db.JSON, default=dict)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    requested_by = db.relationship("User", foreign_keys=[requested_by_id])
+
+    @property
+    def is_finished(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self):
+        end = self.finished_at or datetime.utcnow()
+        return {
+            "job_id": self.id,
+            "engine": self.engine,
+            "options": self.options or {},
+            "status": self.status,
+            "cancel_requested": self.cancel_requested,
+            "progress": self.progress or {},
+            "elapsed": round((end - self.started_at).total_seconds(), 1) if self.started_at else 0.0,
+            "result": self.result,
+            "error": self.error,
+            "requested_by": self.requested_by.username if self.requested_by else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,30 @@
+from extensions import db
+from datetime import datetime
+
+class SolutionCache(db.Model):
+    """
+    Last solver result per college, keyed by a fingerprint of every solver
+    input (see services/solution_cache.py). A generate request whose inputs
+    hash to the same fingerprint reuses these entries instead of solving.
+    """
+    __tablename__ = "solution_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    college_id = db.Column(db.Integer, db.ForeignKey("colleges.id"), nullable=False, unique=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    engine = db.Column(db.String(30), nullable=False)
+
+    # [{"course_id", "section_id", "faculty_id", "room_id", "slot"}]
+    entries = db.Column(db.JSON, nullable=False)
+    stats = db.Column(db.JSON, default=dict)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "engine": self.engine,
+            "entries": len(self.entries or []),
+            "stats": self.stats or {},
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,60 @@
+from extensions import db
+from datetime import datetime
+
+class SolverRun(db.Model):
+    """
+    Telemetry of one solver run (see services/solver_telemetry.py): model
+    size, phase timings and search statistics. The headline numbers are
+    columns so runs can be filtered and compared across colleges; the full
+    record is kept in `telemetry`.
+    """
+    __tablename__ = "solver_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    college_id = db.Column(db.Integer, db.ForeignKey("colleges.id"), nullable=False, index=True)
+    job_id = db.Column(db.String(36), db.ForeignKey("generation_jobs.id"), nullable=True)
+
+    # generate / improve / what_if
+    kind = db.Column(db.String(20), nullable=False, default="generate")
+    engine = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=True)
+    feasible = db.Column(db.Boolean, default=False)
+    hit_time_limit = db.Column(db.Boolean, default=False)
+
+    variables = db.Column(db.Integer, default=0)
+    constraints = db.Column(db.Integer, default=0)
+    build_time = db.Column(db.Float, nullable=True)
+    solve_time = db.Column(db.Float, nullable=True)
+    total_time = db.Column(db.Float, nullable=True)
+    time_limit = db.Column(db.Float, nullable=True)
+    branches = db.Column(db.BigInteger, default=0)
+    conflicts = db.Column(db.BigInteger, default=0)
+    peak_memory_mb = db.Column(db.Float, nullable=True)
+
+    telemetry = db.Column(db.JSON, default=dict)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self, full=False):
+        data = {
+            "id": self.id,
+            "college_id": self.college_id,
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "engine": self.engine,
+            "status": self.status,
+            "feasible": self.feasible,
+            "hit_time_limit": self.hit_time_limit,
+            "variables": self.variables,
+            "constraints": self.constraints,
+            "build_time": self.build_time,
+            "solve_time": self.solve_time,
+            "total_time": self.total_time,
+            "time_limit": self.time_limit,
+            "branches": self.branches,
+            "conflicts": self.conflicts,
+            "peak_memory_mb": self.peak_memory_mb,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+        if full:
+            data["telemetry"] = self.telemetry or {}
+        return data
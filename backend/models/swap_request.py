@@ -1,5 +1,6 @@
 from extensions import db
 from datetime import datetime
+from utils.slot_grid import sync_slot
 
 class SwapRequest(db.Model):
     __tablename__ = 'swap_requests'
@@ -15,13 +16,24 @@ class SwapRequest(db.Model):
     # The new time they are proposing
     proposed_day = db.Column(db.String(20), nullable=False)
     proposed_start_time = db.Column(db.String(20), nullable=False)
+    proposed_slot = db.Column(db.Integer, nullable=True, index=True)
 
     # The current state of the request
     status = db.Column(db.String(20), nullable=False, default='pending') # pending, approved, rejected
     reason = db.Column(db.Text, nullable=True) # Teacher's reason for the swap
     admin_notes = db.Column(db.Text, nullable=True) # Admin's notes on approval/rejection
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Optimistic locking: two admins deciding the same request cannot both succeed
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     # Define relationships for easy data access
     requesting_faculty = db.relationship("Faculty", foreign_keys=[requesting_faculty_id])
     original_timetable_entry = db.relationship("Timetable", foreign_keys=[original_timetable_id])
+
+    __mapper_args__ = {"version_id_col": row_version}
+
+
+@db.event.listens_for(SwapRequest, "before_insert")
+@db.event.listens_for(SwapRequest, "before_update")
+def _sync_proposed_slot(mapper, connection, target):
+    sync_slot(target, "proposed_day", "proposed_start_time", "proposed_slot")
@@ -1,16 +1,30 @@
 from extensions import db
 from datetime import datetime
+from sqlalchemy.orm import Session
+from utils.slot_grid import sync_slot
+from .timetable_version import TimetableVersion
+
+# Columns that decide who is where when; changing one is a move
+PLACEMENT_FIELDS = ("version_id", "faculty_id", "section_id", "room_id", "day", "start_time", "slot")
+
+BOOKING_CONSTRAINTS = (
+    "uq_timetable_version_faculty_slot", "uq_timetable_version_section_slot", "uq_timetable_version_room_slot"
+)
 
 class Timetable(db.Model):
     __tablename__ = "timetable"
     timetable_id = db.Column(db.Integer, primary_key=True)
     college_id = db.Column(db.Integer, db.ForeignKey("colleges.id"), nullable=False, index=True)
+    # NULL only for rows written before timetables were versioned
+    version_id = db.Column(db.Integer, db.ForeignKey("timetable_versions.id"), nullable=True, index=True)
     course_id = db.Column(db.Integer, db.ForeignKey("courses.course_id"))
     section_id = db.Column(db.Integer, db.ForeignKey("sections.id"))
     faculty_id = db.Column(db.Integer, db.ForeignKey("faculty.faculty_id"))
     room_id = db.Column(db.Integer, db.ForeignKey("classrooms.room_id"))
     day = db.Column(db.String(20))
     start_time = db.Column(db.String(20))
+    # Integer slot id of day/start_time (utils/slot_grid.py); kept in step on every write
+    slot = db.Column(db.Integer, nullable=True, index=True)
     
     # Audit fields for swapped/rescheduled classes
     is_swapped = db.Column(db.Boolean, default=False)
@@ -19,7 +33,62 @@ class Timetable(db.Model):
     swap_group_id = db.Column(db.String(50), nullable=True) # UUID for linking swapped pairs
     swapped_with_course = db.Column(db.String(100), nullable=True) # Copy of the course name swapped with
 
+    # Bumped by every ORM update; an update whose row changed since it was read fails (optimistic locking)
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
     course = db.relationship("Course")
     faculty = db.relationship("Faculty")
     room = db.relationship("Classroom")
     swapped_by = db.relationship("User", foreign_keys=[swapped_by_id])
+
+    # Lookups by faculty member, section or room (plus the tenant filter's
+    # college_id) seek straight to that owner's rows, already in slot order
+    __table_args__ = (
+        db.Index("ix_timetable_college_faculty_slot", "college_id", "faculty_id", "slot"),
+        db.Index("ix_timetable_college_section_slot", "college_id", "section_id", "slot"),
+        db.Index("ix_timetable_college_room_slot", "college_id", "room_id", "slot"),
+        db.Index("ix_timetable_college_slot_room", "college_id", "slot", "room_id"),
+        # No double bookings within a version, whoever writes concurrently
+        db.UniqueConstraint("version_id", "faculty_id", "slot", name="uq_timetable_version_faculty_slot"),
+        db.UniqueConstraint("version_id", "section_id", "slot", name="uq_timetable_version_section_slot"),
+        db.UniqueConstraint("version_id", "room_id", "slot", name="uq_timetable_version_room_slot"),
+    )
+    __mapper_args__ = {"version_id_col": row_version}
+
+
+@db.event.listens_for(Timetable, "before_insert")
+@db.event.listens_for(Timetable, "before_update")
+def _sync_timetable_slot(mapper, connection, target):
+    sync_slot(target)
+
+
+def changed_placements(session):
+    """
+    Timetable rows the current flush inserts, deletes or moves, as (row,
+    deleted) pairs, with the versions they left or joined. Call from
+    after_flush, where the session still lists the flushed objects.
+    """
+    changed, versions = [], set()
+    for row in session.new:
+        if isinstance(row, Timetable):
+            changed.append((row, False))
+    for row in session.deleted:
+        if isinstance(row, Timetable):
+            changed.append((row, True))
+    for row in session.dirty:
+        if isinstance(row, Timetable):
+            state = db.inspect(row)
+            if any(state.attrs[f].history.has_changes() for f in PLACEMENT_FIELDS):
+                changed.append((row, False))
+                versions.update(v for v in state.attrs.version_id.history.deleted if v is not None)
+    versions.update(row.version_id for row, _ in changed if row.version_id is not None)
+    return changed, versions
+
+
+@db.event.listens_for(Session, "after_flush")
+def _bump_version_revisions(session, flush_context):
+    _, versions = changed_placements(session)
+    if versions:
+        table = TimetableVersion.__table__
+        session.connection().execute(
+            table.update().where(table.c.id.in_(versions)).values(revision=table.c.revision + 1))
@@ -0,0 +1,45 @@
+from extensions import db
+from datetime import datetime
+
+class TimetableVersion(db.Model):
+    """
+    One generated timetable. Rows in `timetable` point at their version;
+    College.active_timetable_version_id selects the one readers see, so a
+    new timetable goes live by flipping that pointer in one transaction.
+    """
+    __tablename__ = "timetable_versions"
+
+    id = db.Column(db.Integer, primary_key=True)
+    college_id = db.Column(db.Integer, db.ForeignKey("colleges.id"), nullable=False, index=True)
+    label = db.Column(db.String(100), nullable=True)
+    engine = db.Column(db.String(30), nullable=True)
+
+    # draft / active / archived
+    status = db.Column(db.String(20), nullable=False, default="draft")
+    parent_version_id = db.Column(db.Integer, db.ForeignKey("timetable_versions.id"), nullable=True)
+    entry_count = db.Column(db.Integer, default=0)
+    stats = db.Column(db.JSON, nullable=True)
+    # Bumped whenever one of the version's rows is added, moved or deleted
+    # (models/timetable.py), so per-process caches of it can tell they are stale
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    created_by_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    activated_at = db.Column(db.DateTime, nullable=True)
+
+    created_by = db.relationship("User", foreign_keys=[created_by_id])
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "label": self.label,
+            "engine": self.engine,
+            "status": self.status,
+            "parent_version_id": self.parent_version_id,
+            "entry_count": self.entry_count,
+            "revision": self.revision,
+            "stats": self.stats or {},
+            "created_by": self.created_by.username if self.created_by else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "activated_at": self.activated_at.isoformat() if self.activated_at else None
+        }
@@ -2,21 +2,38 @@
 Admin routes - All admin-only endpoints
 """
 
+import io
 from datetime import datetime
 import uuid
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, send_file
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from extensions import db
 from models import (
     Department, Faculty, Course, Classroom, Section, User,
     FacultyUnavailability, SwapRequest, LeaveRequest, SystemAnnouncement,
-    Timetable
+    GenerationJob, SolverRun
 )
-from services.scheduler_service import generate_timetable_internal
+from services.scheduler_engines import ENGINES
+from services.solver_profiles import SOLVER_PROFILES
+from services.scheduler_model import load_scheduler_input
+from services.scheduler_diagnosis import diagnose_infeasibility, summarize
+from services.generation_jobs import submit_generation_job, request_cancel
+from services.what_if import parse_overrides, MAX_SCENARIOS
+from services.solver_telemetry import scaling_summary
+from services.model_export import export_college
+from services.swap_batch import approve_batch, move_entry, park_entries
 from utils.decorators import token_required, admin_required
 from utils.export_utils import export_csvs
+from utils.slot_grid import slot_from_labels
+from utils.timetable_utils import is_write_conflict, write_conflict_response, stale_version_response
 
 admin_bp = Blueprint('admin', __name__)
 
+# Solver time a generate request may ask for, and what an improve job gets by default (seconds)
+MAX_TIME_LIMIT = 3600
+DEFAULT_IMPROVE_TIME = 120
+
 # Handle OPTIONS for all admin routes
 @admin_bp.before_request
 def handle_options():
@@ -706,11 +723,13 @@ def manage_faculty_unavailability(current_user, faculty_id):
 
             day = data["day"]
             start_time = data["start_time"]
+            slot = slot_from_labels(day, start_time)
+            if slot is None:
+                return jsonify({"error": "Invalid day or start_time"}), 400
 
             existing = FacultyUnavailability.query.filter_by(
                 faculty_id=faculty.faculty_id,
-                day=day,
-                start_time=start_time
+                slot=slot
             ).first()
             if existing:
                 return jsonify({"error": "This unavailability slot already exists for this faculty."}), 400
@@ -725,7 +744,8 @@ def manage_faculty_unavailability(current_user, faculty_id):
 
             return jsonify({
                 "message": f"Unavailability added for {faculty.faculty_name}",
-                "slot": {"id": new_slot.id, "day": new_slot.day, "start_time": new_slot.start_time}
+                "slot": {"id": new_slot.id, "day": new_slot.day, "start_time": new_slot.start_time,
+                         "slot_id": new_slot.slot}
             }), 201
         except Exception as e:
             db.session.rollback()
@@ -764,7 +784,8 @@ def admin_get_swap_requests(current_user):
         "proposed_start_time": r.proposed_start_time,
         "status": r.status,
         "reason": r.reason,
-        "created_at": r.created_at.isoformat()
+        "created_at": r.created_at.isoformat(),
+        "row_version": r.row_version
     } for r in requests])
 
 
@@ -779,6 +800,9 @@ def admin_approve_swap(current_user, request_id):
 
     data = request.json or {}
     force_swap = data.get('force_swap', False)
+    # Optional compare-and-swap against the row_version the admin loaded
+    if data.get('row_version') is not None and data['row_version'] != swap_request.row_version:
+        return stale_version_response(data['row_version'], swap_request.row_version)
 
     timetable_entry = swap_request.original_timetable_entry
     old_day = timetable_entry.day
@@ -825,23 +849,16 @@ def admin_approve_swap(current_user, request_id):
             original_course_name = timetable_entry.course.name
             conflicting_course_name = conflicting_entry.course.name
 
+            # Both leave their slots before either takes the other's
+            park_entries([timetable_entry, conflicting_entry])
+
             # Update Requested Entry
-            timetable_entry.day = swap_request.proposed_day
-            timetable_entry.start_time = swap_request.proposed_start_time
-            timetable_entry.is_swapped = True
-            timetable_entry.swapped_at = datetime.utcnow()
-            timetable_entry.swapped_by_id = current_user.id
-            timetable_entry.swap_group_id = swap_group_id
-            timetable_entry.swapped_with_course = conflicting_course_name
+            move_entry(timetable_entry, swap_request.proposed_day, swap_request.proposed_start_time,
+                       current_user.id, swap_group_id, conflicting_course_name)
 
             # Update Conflicting Entry
-            conflicting_entry.day = old_day
-            conflicting_entry.start_time = old_start_time
-            conflicting_entry.is_swapped = True
-            conflicting_entry.swapped_at = datetime.utcnow()
-            conflicting_entry.swapped_by_id = current_user.id
-            conflicting_entry.swap_group_id = swap_group_id
-            conflicting_entry.swapped_with_course = original_course_name
+            move_entry(conflicting_entry, old_day, old_start_time,
+                       current_user.id, swap_group_id, original_course_name)
 
             swap_request.status = 'approved'
             swap_request.admin_notes = f"Swap approved (exchanged with {conflicting_course_name}) by {current_user.username}."
@@ -850,24 +867,56 @@ def admin_approve_swap(current_user, request_id):
             return jsonify({"message": f"Swap successful! Exchanged '{original_course_name}' with '{conflicting_course_name}'."})
         except Exception as e:
             db.session.rollback()
+            if is_write_conflict(e):
+                return write_conflict_response(e)
             return jsonify({"error": f"Database transaction failed: {str(e)}"}), 500
 
-    # 3. Normal Reschedule (No conflict)
-    timetable_entry.day = swap_request.proposed_day
-    timetable_entry.start_time = swap_request.proposed_start_time
-    timetable_entry.is_swapped = True
-    timetable_entry.swapped_at = datetime.utcnow()
-    timetable_entry.swapped_by_id = current_user.id
-    timetable_entry.swap_group_id = None # Single move doesn't need group ID
-    timetable_entry.swapped_with_course = None
+    # 3. Normal Reschedule (No conflict); a single move doesn't need a group ID
+    move_entry(timetable_entry, swap_request.proposed_day, swap_request.proposed_start_time, current_user.id)
     
     swap_request.status = 'approved'
     swap_request.admin_notes = f"Approved by {current_user.username}."
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except (StaleDataError, IntegrityError) as e:
+        db.session.rollback()
+        if is_write_conflict(e):
+            return write_conflict_response(e)
+        return jsonify({"error": f"Database transaction failed: {str(e)}"}), 500
     return jsonify({"message": "Swap request approved and timetable updated."})
 
 
+@admin_bp.route("/swap-requests/approve_batch", methods=["POST"])
+@token_required
+@admin_required
+def admin_approve_swaps_batch(current_user):
+    """
+    Decide pending swap requests together and apply the approved ones in
+    one transaction: {"request_ids": [...] (default: all pending),
+    "force_swap": bool, "dry_run": bool}. Returns an outcome per request.
+    """
+    data = request.get_json(silent=True) or {}
+    request_ids = data.get("request_ids")
+    if request_ids is not None and (not isinstance(request_ids, list)
+                                    or not all(isinstance(i, int) for i in request_ids)):
+        return jsonify({"error": "'request_ids' must be a list of swap request ids"}), 400
+    dry_run = bool(data.get("dry_run", False))
+    try:
+        report = approve_batch(current_user.college_id, current_user, request_ids,
+                               force_swap=bool(data.get("force_swap", False)), dry_run=dry_run)
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if is_write_conflict(e):
+            return write_conflict_response(e)
+        return jsonify({"error": f"Batch approval failed: {str(e)}"}), 500
+    return jsonify(report), 200
+
+
 @admin_bp.route("/swap-requests/<int:request_id>/reject", methods=["POST"])
 @token_required
 @admin_required
@@ -882,7 +931,11 @@ def admin_reject_swap(current_user, request_id):
     swap_request.status = 'rejected'
     swap_request.admin_notes = f"Rejected by {current_user.username}. Reason: {rejection_reason}"
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError as e:
+        db.session.rollback()
+        return write_conflict_response(e)
     
     return jsonify({"message": "Swap request has been rejected."})
 
@@ -1067,41 +1120,254 @@ def admin_bulk_leave_action(current_user):
         db.session.rollback()
         return jsonify({"error": f"Failed to perform bulk action: {str(e)}"}), 500
 
+def _generation_options(data):
+    """Validate engine options from a generate request. Returns (options, error)."""
+    options = {}
+    for flag in ("warm_start", "force"):
+        if data.get(flag):
+            options[flag] = True
+    for key in ("changed_courses", "changed_faculty", "changed_rooms"):
+        if key not in data:
+            continue
+        ids = data[key]
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return None, f"'{key}' must be a list of ids"
+        if data.get("engine") != "incremental":
+            return None, f"'{key}' is only supported by the incremental engine"
+        options[key] = ids
+    if "profile" in data:
+        if data["profile"] not in SOLVER_PROFILES:
+            return None, f"Unknown solver profile '{data['profile']}'. Choose one of: {', '.join(SOLVER_PROFILES)}"
+        options["profile"] = data["profile"]
+    if "time_limit" in data:
+        time_limit = data["time_limit"]
+        if not isinstance(time_limit, (int, float)) or isinstance(time_limit, bool) \
+                or not 0 < time_limit <= MAX_TIME_LIMIT:
+            return None, f"'time_limit' must be a number of seconds up to {MAX_TIME_LIMIT}"
+        options["time_limit"] = time_limit
+    return options, None
+
+
+def _submit_generation(current_user, data):
+    """Validate a generate request and queue it as a GenerationJob; returns the 202 response."""
+    engine = data.get("engine", "monolithic")
+    if engine not in ENGINES:
+        return jsonify({"error": f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}"}), 400
+    options, error = _generation_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        job = submit_generation_job(current_user.college_id, requested_by_id=current_user.id,
+                                   engine=engine, options=options)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to start generation job: {str(e)}"}), 500
+
+    return jsonify({
+        "message": "Timetable generation started",
+        "job_id": job.id,
+        "status_url": f"/admin/generate_timetable/jobs/{job.id}"
+    }), 202
+
+
 @admin_bp.route("/generate_timetable", methods=["GET", "POST", "OPTIONS"])
 @token_required
 @admin_required
 def generate_timetable(current_user):
+    """Start generating the timetable in the background; poll the returned status_url for the result."""
     if request.method != "POST":
-        return jsonify({"message": "Use POST (no body) to generate timetable"}), 200
-    
+        return jsonify({"message": "Use POST to generate timetable", "engines": list(ENGINES),
+                        "profiles": list(SOLVER_PROFILES)}), 200
+    return _submit_generation(current_user, request.get_json(silent=True) or {})
+
+
+@admin_bp.route("/generate_timetable/diagnose", methods=["POST", "OPTIONS"])
+@token_required
+@admin_required
+def diagnose_timetable(current_user):
+    """Explain why the current inputs cannot be scheduled, without generating."""
+    data = request.get_json(silent=True) or {}
     try:
-        result = generate_timetable_internal()
-        if "error" in result:
-            return jsonify(result), 400
-            
-        timetable = Timetable.query.all()
-        result_data = []
-        
-        for t in timetable:
-            result_data.append({
-                "course": t.course.name,
-                "section": f"{t.section.name} (Year {t.section.year})",
-                "faculty": t.faculty.faculty_name if t.faculty else "N/A",
-                "room": t.room.name,
-                "day": t.day,
-                "start_time": t.start_time,
-                "department": t.course.department.dept_name,
-                "year": t.section.year,
-                "credits": t.course.credits
-            })
-            
-        return jsonify({
-            "message": "Timetable generated successfully!",
-            "stats": result.get("stats"),
-            "timetable": result_data
-        })
+        snapshot = load_scheduler_input(current_user.college_id)
+        diagnosis = diagnose_infeasibility(snapshot, deep=bool(data.get("deep")))
+        diagnosis["summary"] = summarize(diagnosis)
+        return jsonify(diagnosis)
+    except Exception as e:
+        return jsonify({"error": f"Diagnosis failed: {str(e)}"}), 500
+
+
+@admin_bp.route("/generate_timetable/export", methods=["GET", "OPTIONS"])
+@token_required
+@admin_required
+def export_solver_instance(current_user):
+    """
+    Download the college's solver instance (?engine=&profile=&warm_start=):
+    the anonymised inputs and the CP-SAT model, for solver_instance.py.
+    """
+    engine = request.args.get("engine", "monolithic")
+    profile = request.args.get("profile")
+    warm_start = request.args.get("warm_start", "").lower() in ("1", "true", "yes")
+    try:
+        buffer = io.BytesIO()
+        export_college(buffer, current_user.college_id, engine, profile, warm_start)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": f"Export failed: {str(e)}"}), 500
+    buffer.seek(0)
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    return send_file(buffer, mimetype="application/zip", as_attachment=True,
+                     download_name=f"solver_instance_{engine}_{stamp}.zip")
+
+
+@admin_bp.route("/generate_timetable/jobs", methods=["GET", "POST", "OPTIONS"])
+@token_required
+@admin_required
+def generation_jobs(current_user):
+    """Submit a background generation job, or list the tenant's recent jobs."""
+    if request.method == "GET":
+        jobs = GenerationJob.query.order_by(GenerationJob.created_at.desc()).limit(20).all()
+        return jsonify([job.to_dict() for job in jobs])
+
+    return _submit_generation(current_user, request.get_json(silent=True) or {})
+
+
+@admin_bp.route("/generate_timetable/what_if", methods=["POST", "OPTIONS"])
+@token_required
+@admin_required
+def what_if_scenarios(current_user):
+    """
+    Solve what-if scenarios in the background without touching the live
+    timetable: {"scenarios": [{"name": "...", "overrides": {...}}], "engine": ...}.
+    Each scenario becomes a job; its result carries the scenario summary.
+    """
+    data = request.get_json(silent=True) or {}
+    scenarios = data.get("scenarios")
+    if not isinstance(scenarios, list) or not 0 < len(scenarios) <= MAX_SCENARIOS:
+        return jsonify({"error": f"'scenarios' must be a list of 1 to {MAX_SCENARIOS} scenarios"}), 400
+    engine = data.get("engine", "monolithic")
+    if engine not in ENGINES:
+        return jsonify({"error": f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}"}), 400
+    options, error = _generation_options({k: v for k, v in data.items() if k in ("profile", "time_limit")})
+    if error:
+        return jsonify({"error": error}), 400
+
+    parsed = []
+    for i, scenario in enumerate(scenarios):
+        if not isinstance(scenario, dict):
+            return jsonify({"error": f"Scenario {i + 1} must be an object"}), 400
+        try:
+            parse_overrides(scenario.get("overrides", {}))
+        except ValueError as e:
+            return jsonify({"error": f"Scenario {i + 1}: {str(e)}"}), 400
+        parsed.append({"name": str(scenario.get("name") or f"Scenario {i + 1}"),
+                       "overrides": scenario.get("overrides", {})})
+
+    try:
+        jobs = [submit_generation_job(current_user.college_id, requested_by_id=current_user.id,
+                                      engine=engine, options=dict(options, scenario=scenario))
+                for scenario in parsed]
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to start scenarios: {str(e)}"}), 500
+
+    return jsonify({
+        "message": f"{len(jobs)} scenario(s) started",
+        "jobs": [{"name": scenario["name"], "job_id": job.id,
+                  "status_url": f"/admin/generate_timetable/jobs/{job.id}"}
+                 for scenario, job in zip(parsed, jobs)]
+    }), 202
+
+
+@admin_bp.route("/generate_timetable/jobs/<job_id>", methods=["GET", "OPTIONS"])
+@token_required
+@admin_required
+def generation_job_status(current_user, job_id):
+    job = GenerationJob.query.filter_by(id=job_id).first()
+    if not job:
+        return jsonify({"error": "Generation job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@admin_bp.route("/generate_timetable/jobs/<job_id>/improve", methods=["POST", "OPTIONS"])
+@token_required
+@admin_required
+def improve_generation_job(current_user, job_id):
+    """
+    Grant a finished job more solver time: a new job continues from the
+    active timetable and replaces it only if it finds a better one.
+    """
+    job = GenerationJob.query.filter_by(id=job_id).first()
+    if not job:
+        return jsonify({"error": "Generation job not found"}), 404
+    if job.status != "succeeded":
+        return jsonify({"error": f"Only succeeded jobs can be improved; this one is {job.status}."}), 400
+    if "scenario" in (job.options or {}):
+        return jsonify({"error": "What-if scenarios cannot be improved into the live timetable."}), 400
+
+    data = request.get_json(silent=True) or {}
+    options, error = _generation_options({"time_limit": data.get("time_limit", DEFAULT_IMPROVE_TIME)})
+    if error:
+        return jsonify({"error": error}), 400
+    options.update({k: v for k, v in (job.options or {}).items() if k == "profile"})
+    options["improve"] = True
+    # Incremental runs only re-solve what changed; improving works on the whole timetable
+    engine = "monolithic" if job.engine == "incremental" else job.engine
+
+    try:
+        improved = submit_generation_job(current_user.college_id, requested_by_id=current_user.id,
+                                         engine=engine, options=options)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to start improvement job: {str(e)}"}), 500
+
+    return jsonify({
+        "message": "Timetable improvement started",
+        "job_id": improved.id,
+        "status_url": f"/admin/generate_timetable/jobs/{improved.id}"
+    }), 202
+
+
+@admin_bp.route("/solver_runs", methods=["GET", "OPTIONS"])
+@token_required
+@admin_required
+def list_solver_runs(current_user):
+    """
+    The college's recent solver runs with model size, timings and search
+    counters, newest first (?engine=, ?kind=, ?limit=), plus a scaling summary.
+    """
+    limit = min(request.args.get("limit", 50, type=int), 200)
+    query = SolverRun.query.filter_by(college_id=current_user.college_id)
+    for field in ("engine", "kind"):
+        if request.args.get(field):
+            query = query.filter(getattr(SolverRun, field) == request.args[field])
+    runs = query.order_by(SolverRun.id.desc()).limit(limit).all()
+    summary = scaling_summary([current_user.college_id])
+    return jsonify({"runs": [r.to_dict() for r in runs], "summary": summary[0] if summary else None})
+
+
+@admin_bp.route("/solver_runs/<int:run_id>", methods=["GET", "OPTIONS"])
+@token_required
+@admin_required
+def solver_run_detail(current_user, run_id):
+    """One run's full telemetry: constraint families, presolve, search statistics, objective trajectory."""
+    run = SolverRun.query.filter_by(id=run_id, college_id=current_user.college_id).first()
+    if not run:
+        return jsonify({"error": "Solver run not found"}), 404
+    return jsonify(run.to_dict(full=True))
+
+
+@admin_bp.route("/generate_timetable/jobs/<job_id>/cancel", methods=["POST", "OPTIONS"])
+@token_required
+@admin_required
+def cancel_generation_job(current_user, job_id):
+    job = GenerationJob.query.filter_by(id=job_id).first()
+    if not job:
+        return jsonify({"error": "Generation job not found"}), 404
+    if not request_cancel(job):
+        return jsonify({"error": f"Job is already {job.status}."}), 400
+    return jsonify({"message": "Cancellation requested", "job": job.to_dict()})
 
 
 @admin_bp.route("/users/register", methods=["POST", "OPTIONS"])
@@ -8,6 +8,8 @@ from extensions import db
 from models import Classroom, RoomOccupancy, Faculty, SwapRequest, Timetable
 from utils.decorators import token_required, teacher_required
 from utils.export_utils import export_csvs
+from utils.slot_grid import slot_from_labels
+from services.slot_suggestions import suggest_alternatives
 
 faculty_bp = Blueprint('faculty', __name__)
 
@@ -97,19 +99,24 @@ def get_rooms_status(current_user):
         return jsonify({"error": str(e)}), 500
 
 
+def _find_faculty(current_user):
+    """The Faculty row of a teacher, matched by name within their department."""
+    faculty = Faculty.query.filter_by(faculty_name=current_user.full_name, dept_id=current_user.dept_id).first()
+    if not faculty:
+        # Fallback - try strictly by name pattern
+        faculty = Faculty.query.filter(
+            Faculty.faculty_name.contains(current_user.full_name.split()[-1]),
+            Faculty.dept_id == current_user.dept_id
+        ).first()
+    return faculty
+
+
 @faculty_bp.route("/swap-requests", methods=["GET", "POST"])
 @token_required
 @teacher_required
 def teacher_swap_requests(current_user):
     try:
-        faculty = Faculty.query.filter_by(faculty_name=current_user.full_name, dept_id=current_user.dept_id).first()
-        if not faculty:
-            # Fallback - try strictly by name pattern or create
-            faculty = Faculty.query.filter(
-                Faculty.faculty_name.contains(current_user.full_name.split()[-1]),
-                Faculty.dept_id == current_user.dept_id
-            ).first()
-        
+        faculty = _find_faculty(current_user)
         if not faculty:
             faculty = Faculty(
                 faculty_name=current_user.full_name,
@@ -125,6 +132,8 @@ def teacher_swap_requests(current_user):
             required = ["original_timetable_id", "proposed_day", "proposed_start_time", "reason"]
             if not all(key in data for key in required):
                 return jsonify({"error": f"Missing required fields: {', '.join(required)}"}), 400
+            if slot_from_labels(data['proposed_day'], data['proposed_start_time']) is None:
+                return jsonify({"error": "Invalid proposed_day or proposed_start_time"}), 400
 
             timetable_entry = Timetable.query.get(data['original_timetable_id'])
             if not timetable_entry or timetable_entry.faculty_id != faculty.faculty_id:
@@ -174,6 +183,30 @@ def teacher_swap_requests(current_user):
         return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
 
 
+@faculty_bp.route("/swap-requests/alternatives/<int:timetable_id>", methods=["GET"])
+@token_required
+@teacher_required
+def teacher_swap_alternatives(current_user, timetable_id):
+    """
+    Slots one of the teacher's classes could move to without a conflict,
+    and the two-way swaps that would work, least disruptive first (?limit=N).
+    """
+    faculty = _find_faculty(current_user)
+    timetable_entry = Timetable.query.get(timetable_id)
+    if not timetable_entry or not faculty or timetable_entry.faculty_id != faculty.faculty_id:
+        return jsonify({"error": "You can only request to move your own classes."}), 403
+    try:
+        alternatives = suggest_alternatives(timetable_entry, limit=request.args.get("limit", type=int))
+    except Exception as e:
+        return jsonify({"error": f"Failed to find alternatives: {str(e)}"}), 500
+    return jsonify({
+        "timetable_id": timetable_id,
+        "day": timetable_entry.day,
+        "start_time": timetable_entry.start_time,
+        "alternatives": alternatives
+    }), 200
+
+
 @faculty_bp.route("/students", methods=["GET", "OPTIONS"])
 @token_required
 @teacher_required
@@ -7,7 +7,8 @@ from flask import Blueprint, request, jsonify
 from extensions import db
 from models import Resource, ResourceBooking, Classroom, Timetable, Course, User
 from utils.decorators import token_required, admin_required, teacher_required
-from datetime import datetime
+from utils.slot_grid import make_slot, SLOTS_PER_DAY, WEEK_DAYS
+from datetime import datetime, timedelta
 from sqlalchemy import or_, and_
 
 resource_bp = Blueprint('resource', __name__)
@@ -259,38 +260,18 @@ def has_conflict(resource_id, start_time, end_time):
     
     # 2. Check timetable if linked to a classroom
     if resource.classroom_id:
-        # Convert start/end time to day of week and time slots
-        # This is complex because timetable is usually weekly recurring
-        # For this simplified version, let's assume we check the specific date's day of week
-        
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_of_week = day_names[start_time.weekday()]
-        
-        # Check timetable for this room, day, and overlapping time range
-        # Timetable usually stores start_time/end_time as strings 'HH:MM'
-        
-        start_time_str = start_time.strftime('%H:%M')
-        end_time_str = end_time.strftime('%H:%M')
-        
-        # Simplified query: check if there's any class in this room on this day
-        # A robust implementation would parse the time strings and check overlap range for that day
-        # For now, let's query classes in this room on this day and do python-side check
-        
-        classes = Timetable.query.join(CourseAllocation).filter(
-            CourseAllocation.classroom_id == resource.classroom_id,
-            Timetable.day == day_of_week
-        ).all()
-        
-        for cls in classes:
-            # cls.start_time and cls.end_time are strings "HH:MM"
-            cls_start = datetime.strptime(cls.start_time, '%H:%M').time()
-            cls_end = datetime.strptime(cls.end_time, '%H:%M').time()
-            
-            req_start = start_time.time()
-            req_end = end_time.time()
-            
-            # Check overlap
-            if cls_start < req_end and cls_end > req_start:
-                return True
-                
+        # The timetable repeats weekly in one-hour slots, so the booking
+        # clashes with any class in this room in a slot it overlaps
+        slots = set()
+        hour = start_time.replace(minute=0, second=0, microsecond=0)
+        while hour < end_time and len(slots) < len(WEEK_DAYS) * SLOTS_PER_DAY:
+            slots.add(make_slot(hour.weekday(), hour.hour))
+            hour += timedelta(hours=1)
+
+        if slots and Timetable.query.filter(
+            Timetable.room_id == resource.classroom_id,
+            Timetable.slot.in_(slots)
+        ).first():
+            return True
+
     return False
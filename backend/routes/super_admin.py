@@ -5,6 +5,10 @@ from models.user import User
 from utils.decorators import token_required
 from utils.tenant_middleware import require_super_admin
 from werkzeug.security import generate_password_hash
+from services.solver_profiles import SOLVER_PROFILES
+from services.solver_telemetry import scaling_summary
+from services.scheduler_objective import resolve_objective
+from utils.slot_grid import SlotGrid
 
 super_admin_bp = Blueprint('super_admin', __name__)
 
@@ -84,6 +88,23 @@ def update_college(current_user, college_id):
         college.feature_flags = current_flags
     if "subscription_tier" in data:
         college.subscription_tier = data["subscription_tier"]
+    if "solver_profile" in data:
+        if data["solver_profile"] not in SOLVER_PROFILES:
+            return jsonify({"error": f"Unknown solver profile. Choose one of: {', '.join(SOLVER_PROFILES)}"}), 400
+        college.solver_profile = data["solver_profile"]
+    if "slot_grid" in data:
+        # None resets to the default grid; a grid is stored in normalised form
+        try:
+            college.slot_grid = SlotGrid.from_config(data["slot_grid"]).to_config() if data["slot_grid"] else None
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({"error": f"Invalid slot_grid: {e}"}), 400
+    if "objective_weights" in data:
+        # Partial settings; anything left out keeps its default
+        try:
+            resolve_objective(data["objective_weights"])
+        except (ValueError, AttributeError) as e:
+            return jsonify({"error": f"Invalid objective_weights: {e}"}), 400
+        college.objective_weights = data["objective_weights"] or None
         
     db.session.commit()
     return jsonify(college.to_dict()), 200
@@ -100,3 +121,15 @@ def get_platform_stats(current_user):
         "total_users": user_count,
         "platform_status": "healthy"
     }), 200
+
+
+@super_admin_bp.route("/solver_runs", methods=["GET"])
+@token_required
+@require_super_admin
+def solver_scaling(current_user):
+    """Recent solver runs condensed per college, the colleges closest to their time limits first."""
+    names = {c.id: c.name for c in College.query.all()}
+    summary = scaling_summary()
+    for row in summary:
+        row["college_name"] = names.get(row["college_id"])
+    return jsonify(summary), 200
@@ -2,11 +2,22 @@
 Timetable routes - Generation and viewing
 """
 
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from extensions import db
-from models import Timetable
+from models import Timetable, TimetableVersion, College
+from services.scheduler_model import load_scheduler_input
 from services.scheduler_service import generate_timetable_internal
+from services.solver_profiles import resolve_solver_params, host_worker_cap
+from services.timetable_repair import (
+    parse_disruption, repair_timetable, apply_repair,
+    NEIGHBOURHOOD_SIZE, REPAIR_TIME_LIMIT, MAX_REPAIR_TIME_LIMIT
+)
+from services.timetable_versions import activate_version, diff_versions
+from services.slot_suggestions import suggest_alternatives
 from utils.decorators import token_required
+from utils.timetable_utils import is_write_conflict, write_conflict_response, stale_version_response
 
 timetable_bp = Blueprint('timetable', __name__)
 
@@ -41,6 +52,7 @@ def get_timetable():
         for t in timetable:
             result.append({
                 "id": t.timetable_id,
+                "row_version": t.row_version,
                 "course": t.course.name,
                 "section": f"{t.section.name} (Year {t.section.year})",
                 "faculty": t.faculty.faculty_name if t.faculty else "N/A",
@@ -118,6 +130,7 @@ def teacher_timetable(current_user):
         timetable_entries = Timetable.query.filter_by(faculty_id=faculty.faculty_id).all()
         result = [{
             "id": e.timetable_id,
+            "row_version": e.row_version,
             "course": e.course.name,
             "course_id": e.course_id,
             "section": f"{e.section.name} (Year {e.section.year})",
@@ -202,6 +215,10 @@ def update_timetable_entry(current_user, timetable_id):
 
     data = request.json or {}
 
+    # Optional compare-and-swap against the row_version the client loaded
+    if data.get('row_version') is not None and data['row_version'] != entry.row_version:
+        return stale_version_response(data['row_version'], entry.row_version)
+
     # Apply changes
     if 'day' in data:
         entry.day = data['day']
@@ -214,7 +231,13 @@ def update_timetable_entry(current_user, timetable_id):
     if 'room_id' in data:
         entry.room_id = data['room_id']
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except (StaleDataError, IntegrityError) as e:
+        db.session.rollback()
+        if is_write_conflict(e):
+            return write_conflict_response(e)
+        return jsonify({"error": f"Database transaction failed: {str(e)}"}), 500
 
     # Fire Google Calendar hook asynchronously (best effort)
     try:
@@ -223,7 +246,7 @@ def update_timetable_entry(current_user, timetable_id):
     except Exception as e:
         print(f"[GCal] Hook error on update: {e}")
 
-    return jsonify({"message": "Timetable entry updated"}), 200
+    return jsonify({"message": "Timetable entry updated", "row_version": entry.row_version}), 200
 
 
 @timetable_bp.route("/admin/timetable/<int:timetable_id>", methods=["DELETE", "OPTIONS"])
@@ -245,6 +268,141 @@ def delete_timetable_entry(current_user, timetable_id):
         print(f"[GCal] Hook error on delete: {e}")
 
     db.session.delete(entry)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError as e:
+        db.session.rollback()
+        return write_conflict_response(e)
 
     return jsonify({"message": "Timetable entry deleted"}), 200
+
+
+@timetable_bp.route("/admin/timetable/<int:timetable_id>/alternatives", methods=["GET", "OPTIONS"])
+@token_required
+def timetable_entry_alternatives(current_user, timetable_id):
+    """Conflict-free moves and workable swaps for an entry, least disruptive first (?limit=N)."""
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    entry = Timetable.query.get(timetable_id)
+    if not entry:
+        return jsonify({"error": "Timetable entry not found"}), 404
+    try:
+        alternatives = suggest_alternatives(entry, limit=request.args.get("limit", type=int))
+    except Exception as e:
+        return jsonify({"error": f"Failed to find alternatives: {str(e)}"}), 500
+    return jsonify({
+        "timetable_id": timetable_id,
+        "day": entry.day,
+        "start_time": entry.start_time,
+        "alternatives": alternatives
+    }), 200
+
+
+# =========================================================
+# TIMETABLE VERSIONS
+# =========================================================
+
+@timetable_bp.route("/admin/timetable/versions", methods=["GET", "OPTIONS"])
+@token_required
+def list_timetable_versions(current_user):
+    """Generated timetable versions of the admin's college, newest first."""
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    versions = TimetableVersion.query.filter_by(college_id=current_user.college_id) \
+        .order_by(TimetableVersion.created_at.desc(), TimetableVersion.id.desc()).all()
+    return jsonify([v.to_dict() for v in versions]), 200
+
+
+@timetable_bp.route("/admin/timetable/versions/<int:version_id>/activate", methods=["POST", "OPTIONS"])
+@token_required
+def activate_timetable_version(current_user, version_id):
+    """Roll the live timetable back (or forward) to a stored version."""
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    version = TimetableVersion.query.filter_by(id=version_id, college_id=current_user.college_id).first()
+    if not version:
+        return jsonify({"error": "Timetable version not found"}), 404
+    if version.status == "active":
+        return jsonify({"message": "Version is already active", "version": version.to_dict()}), 200
+
+    try:
+        activate_version(version)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to activate version: {str(e)}"}), 500
+    return jsonify({"message": "Timetable version activated", "version": version.to_dict()}), 200
+
+
+@timetable_bp.route("/admin/timetable/versions/<int:version_id>/diff", methods=["GET", "OPTIONS"])
+@token_required
+def diff_timetable_version(current_user, version_id):
+    """Placements added/removed in a version compared with ?against=<id> (default: the active version)."""
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    against = request.args.get("against", type=int)
+    if against is None:
+        college = db.session.get(College, current_user.college_id)
+        against = college.active_timetable_version_id if college else None
+    ids = {v.id for v in TimetableVersion.query.filter(
+        TimetableVersion.college_id == current_user.college_id,
+        TimetableVersion.id.in_([version_id, against])
+    )}
+    if version_id not in ids or against not in ids:
+        return jsonify({"error": "Timetable version not found"}), 404
+
+    diff = diff_versions(against, version_id)
+    return jsonify({"version_id": version_id, "against": against, **diff}), 200
+
+
+# =========================================================
+# TIMETABLE REPAIR
+# =========================================================
+
+@timetable_bp.route("/admin/timetable/repair", methods=["POST", "OPTIONS"])
+@token_required
+def repair_timetable_route(current_user):
+    """
+    Minimal changes to the active timetable for a disruption, e.g.
+    {"disruption": {"type": "faculty_unavailable", "faculty_id": 3,
+    "slots": [{"day": "Monday", "start_time": "10:00"}]}}. Returns the diff;
+    with "apply": true it also becomes the active version.
+    """
+    if current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+    try:
+        disruption = parse_disruption(data.get("disruption"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    neighbourhood = data.get("neighbourhood", NEIGHBOURHOOD_SIZE)
+    if not isinstance(neighbourhood, int) or isinstance(neighbourhood, bool) or neighbourhood < 0:
+        return jsonify({"error": "'neighbourhood' must be a non-negative integer"}), 400
+    time_limit = data.get("time_limit", REPAIR_TIME_LIMIT)
+    if not isinstance(time_limit, (int, float)) or isinstance(time_limit, bool) \
+            or not 0 < time_limit <= MAX_REPAIR_TIME_LIMIT:
+        return jsonify({"error": f"'time_limit' must be a number of seconds up to {MAX_REPAIR_TIME_LIMIT}"}), 400
+
+    snapshot = load_scheduler_input(current_user.college_id, include_timetable=True)
+    solver_params = resolve_solver_params("quick", max_workers=host_worker_cap(current_app.config))
+    result = repair_timetable(snapshot, disruption, neighbourhood=neighbourhood, time_limit=time_limit,
+                              solver_params=solver_params)
+    if not result["feasible"]:
+        return jsonify({"error": "No repair was found within the neighbourhood and time limit; "
+                                 "try a larger neighbourhood or time_limit, or regenerate the timetable.",
+                        **result}), 409
+    if not data.get("apply"):
+        return jsonify(result), 200
+
+    try:
+        version = apply_repair(current_user.college_id, disruption, result, created_by_id=current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to apply repair: {str(e)}"}), 500
+    return jsonify({**result, "version": version.to_dict()}), 200
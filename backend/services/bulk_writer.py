@@ -0,0 +1,107 @@
+"""
+Bulk persistence for solver output.
+
+Adding Timetable objects to the session runs the before_flush tenant hook
+and identity-map bookkeeping for every row, which for tens of thousands of
+entries takes as long as the solve itself. Generated rows are never read
+back through the session, so they are written with Core statements on the
+session's connection instead (and so inside its transaction):
+
+- PostgreSQL (psycopg2): COPY FROM STDIN.
+- SQLite and anything else: one executemany INSERT of a single compiled
+  statement. Multi-row INSERT ... VALUES batches were measured slower than
+  the ORM on SQLite, because every batch compiles a new statement (see
+  benchmark_scheduler.py --persistence).
+
+None of these go through the ORM, so college_id (and every other column)
+must be on the rows; write_timetable_rows() sets it explicitly and derives
+a missing slot id from day/start_time.
+"""
+
+import io
+import csv
+from datetime import datetime
+
+from extensions import db
+from models import Timetable
+from utils.slot_grid import slot_from_labels
+
+# Columns written for every row; missing keys get the model default
+TIMETABLE_COLUMNS = (
+    "college_id", "version_id", "course_id", "section_id", "faculty_id", "room_id", "day", "start_time", "slot",
+    "is_swapped", "swapped_at", "swapped_by_id", "swap_group_id", "swapped_with_course"
+)
+
+COLUMN_DEFAULTS = {"is_swapped": False}
+
+COPY_NULL = r"\N"
+
+BULK_METHODS = ("copy", "executemany")
+
+
+def default_method(dialect):
+    """Fastest write path for a SQLAlchemy dialect."""
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        return "copy"
+    return "executemany"
+
+
+def _complete(rows, **fixed):
+    completed = []
+    for row in rows:
+        row = {col: fixed[col] if col in fixed else row.get(col, COLUMN_DEFAULTS.get(col))
+               for col in TIMETABLE_COLUMNS}
+        if row["slot"] is None:
+            row["slot"] = slot_from_labels(row["day"], row["start_time"])
+        completed.append(row)
+    return completed
+
+
+def _copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _copy(connection, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[col]) for col in TIMETABLE_COLUMNS])
+    buffer.seek(0)
+    sql = (f"COPY {Timetable.__tablename__} ({', '.join(TIMETABLE_COLUMNS)}) "
+           f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')")
+    # The raw DB-API connection is the one the session's transaction runs on
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+
+def _executemany(connection, rows):
+    connection.execute(Timetable.__table__.insert(), rows)
+
+
+def write_timetable_rows(rows, college_id, version_id=None, method=None):
+    """
+    Insert timetable row dicts for one college in the session's transaction.
+    method is one of BULK_METHODS and defaults to the fastest for the
+    database. Returns the number of rows written; the caller commits.
+    """
+    if not rows:
+        return 0
+    connection = db.session.connection()
+    method = method or default_method(connection.dialect)
+    if method not in BULK_METHODS:
+        raise ValueError(f"Unknown bulk write method '{method}'. Choose one of: {', '.join(BULK_METHODS)}")
+    rows = _complete(rows, college_id=college_id, version_id=version_id)
+    if method == "copy":
+        _copy(connection, rows)
+    else:
+        _executemany(connection, rows)
+    return len(rows)
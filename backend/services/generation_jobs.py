@@ -0,0 +1,207 @@
+"""
+Background timetable generation jobs.
+
+Submitting a job stores a GenerationJob row and hands its id to a local
+process pool, so the solver never runs inside a web worker. The worker
+process runs generate_timetable_internal() (or, for what-if jobs with
+options["scenario"], services.what_if.run_scenario()) with a SolveProgress attached;
+a monitor thread copies that progress into the job row about once a second
+and stops the search when cancel_requested is set. Status polls and cancel
+requests therefore work from any web worker.
+"""
+
+import os
+import sys
+import time
+import uuid
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from extensions import db
+from models import GenerationJob
+
+PROGRESS_INTERVAL = 1.0
+
+# A fresh worker per job, so its peak memory is the job's own (Python 3.11+)
+WORKER_OPTIONS = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+
+_worker_app = None
+
+
+class LocalProcessBackend:
+    """Runs jobs in a process pool owned by this web process. Needs no external services."""
+
+    def __init__(self, max_workers, config_name, database_uri):
+        self.max_workers = max_workers
+        self.config_name = config_name
+        self.database_uri = database_uri
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.config_name, self.database_uri),
+                    **WORKER_OPTIONS
+                )
+            return self._executor.submit(run_generation_job, job_id)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = LocalProcessBackend(
+                max_workers=current_app.config.get("GENERATION_WORKERS", 2),
+                config_name=os.environ.get("FLASK_ENV", "development"),
+                database_uri=current_app.config["SQLALCHEMY_DATABASE_URI"]
+            )
+        return _backend
+
+
+def submit_generation_job(college_id, requested_by_id=None, engine="monolithic", options=None):
+    """Create a queued job and hand it to the worker pool. Returns the GenerationJob."""
+    job = GenerationJob(
+        id=str(uuid.uuid4()),
+        college_id=college_id,
+        requested_by_id=requested_by_id,
+        engine=engine,
+        options=options or {},
+        status="queued",
+        progress={"phase": "queued"}
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    get_backend().submit(job.id)
+    return job
+
+
+def request_cancel(job):
+    """Flag a job for cancellation; the worker stops its solver on the next poll."""
+    if job.is_finished:
+        return False
+    job.cancel_requested = True
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+# --- WORKER PROCESS ---
+
+def _init_worker(config_name, database_uri):
+    """Build a minimal app in the worker: database and mail only, no routes or schedulers."""
+    global _worker_app
+    from flask import Flask
+    from config import config
+    from extensions import init_extensions
+    import models  # noqa: F401  (register tables)
+
+    app = Flask("generation_worker")
+    app.config.from_object(config[config_name])
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    init_extensions(app)
+    _worker_app = app
+
+
+def _update_job(job_id, **fields):
+    job = db.session.get(GenerationJob, job_id)
+    for key, value in fields.items():
+        setattr(job, key, value)
+    db.session.commit()
+    return job
+
+
+def _monitor(app, job_id, progress, done):
+    """Copy progress into the job row and honour cancel requests until done is set."""
+    with app.app_context():
+        while not done.wait(PROGRESS_INTERVAL):
+            try:
+                job = db.session.get(GenerationJob, job_id)
+                db.session.refresh(job)
+                if job.cancel_requested and not progress.cancelled:
+                    progress.cancel()
+                job.progress = progress.snapshot()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"[Jobs] Progress update failed for {job_id}: {e}")
+        db.session.remove()
+
+
+def run_generation_job(job_id):
+    """Entry point executed in the worker process."""
+    from services.scheduler_engines import SolveProgress
+    from services.scheduler_service import generate_timetable_internal
+    from services.what_if import run_scenario
+
+    app = _worker_app
+    with app.app_context():
+        job = db.session.get(GenerationJob, job_id)
+        if job is None or job.status != "queued" or job.cancel_requested:
+            return
+
+        college_id, engine, options = job.college_id, job.engine, dict(job.options or {})
+        _update_job(job_id, status="running", started_at=datetime.utcnow(), progress={"phase": "loading"})
+
+        progress = SolveProgress(job_id=job_id)
+        progress.set_phase("loading")
+        done = threading.Event()
+        monitor = threading.Thread(target=_monitor, args=(app, job_id, progress, done), daemon=True)
+        monitor.start()
+
+        started = time.perf_counter()
+        try:
+            if "scenario" in options:
+                result = run_scenario(options.pop("scenario")["overrides"], engine=engine, college_id=college_id,
+                                      progress=progress, **options)
+            else:
+                result = generate_timetable_internal(engine=engine, college_id=college_id,
+                                                     progress=progress, **options)
+        except Exception as e:
+            traceback.print_exc()
+            result = {"error": str(e)}
+        finally:
+            done.set()
+            monitor.join()
+
+        final = progress.snapshot()
+        final["elapsed"] = round(time.perf_counter() - started, 1)
+        final["phase"] = "finished"
+
+        if result.get("cancelled"):
+            status = "cancelled"
+        elif "error" in result or not result.get("success"):
+            status = "failed"
+        else:
+            status = "succeeded"
+
+        _update_job(
+            job_id,
+            status=status,
+            progress=final,
+            result={"message": result.get("message"), "stats": result.get("stats"),
+                    "diagnosis": result.get("diagnosis"), "scenario": result.get("scenario")},
+            error=result.get("error") or (result.get("message") if status == "failed" else None),
+            finished_at=datetime.utcnow()
+        )
@@ -0,0 +1,194 @@
+"""
+Solver instance files, for reproducing a college's generation offline.
+
+An instance is a zip archive with:
+
+- instance.json: an anonymised load_scheduler_input() snapshot, the engine,
+  its options and solver parameters, and the stats of the run it came from
+- model.pbtxt: the CP-SAT model that engine solves first, exactly as built
+  from that snapshot (text format, including warm-start hints)
+
+Names and e-mails are replaced by ids; everything the solver reads
+(capacities, resources, lab kinds, unavailability, the grid and objective
+weights) is kept, so the instance is as hard as the original. Re-running
+it needs no database: solver_instance.py replays it with other engines or
+parameters, and benchmark_scheduler.py --instances adds it to the suite.
+"""
+
+import os
+import json
+import zipfile
+from datetime import datetime
+
+from flask import current_app
+from ortools.sat.python import cp_model
+
+from extensions import db
+from models import College
+from services.scheduler_engines import ENGINES, ENGINES_USING_TIMETABLE, find_neighbourhood
+from services.scheduler_model import (
+    TimetableModelBuilder, SlotModelBuilder, is_lab_room, load_scheduler_input
+)
+from services.scheduler_intervals import IntervalModelBuilder
+from services.solver_profiles import apply_solver_params, resolve_solver_params, host_worker_cap
+
+FORMAT_VERSION = 1
+
+INSTANCE_FILE = "instance.json"
+MODEL_FILE = "model.pbtxt"
+
+# Engine options that are kept in the file (the rest are runtime objects)
+CHANGED_OPTIONS = ("changed_courses", "changed_faculty", "changed_rooms")
+EXPORTED_OPTIONS = ("time_limit", "inner") + CHANGED_OPTIONS
+
+
+def anonymise(data):
+    """A copy of the snapshot with names and e-mails replaced; ids and solver inputs are unchanged."""
+    rooms = [dict(r, name=f"{'Lab' if is_lab_room(r) else 'Room'} {r['room_id']}") for r in data["rooms"]]
+    return dict(
+        data,
+        college_id=None,
+        courses=[dict(c, name=f"Course {c['course_id']}") for c in data["courses"]],
+        sections=[dict(s, name=f"Section {s['id']}") for s in data["sections"]],
+        rooms=rooms,
+        faculty=[dict(f, faculty_name=f"Faculty {f['faculty_id']}", email=None) for f in data["faculty"]]
+    )
+
+
+def build_model(data, engine="monolithic", options=None):
+    """
+    The first CP-SAT model the engine would solve for this snapshot, built
+    and hinted the same way (see _build_and_solve in scheduler_engines.py).
+    """
+    options = options or {}
+    hints = [e for e in data.get("timetable", []) if e["slot"] is not None]
+    if engine == "two_phase":
+        builder = SlotModelBuilder(data)
+    elif engine == "interval":
+        builder = IntervalModelBuilder(data, assign_rooms=False)
+    elif engine == "incremental":
+        pinned, hints, _ = find_neighbourhood(data, data.get("timetable", []),
+                                              *(options.get(k, ()) for k in CHANGED_OPTIONS))
+        builder = TimetableModelBuilder(data).pin(pinned)
+    else:
+        # decomposed solves components of this same model
+        builder = TimetableModelBuilder(data)
+    if hints or data.get("timetable"):
+        builder.break_symmetry = False
+    builder.build()
+    if hints:
+        builder.add_hints(hints)
+    return builder.model
+
+
+def export_instance(target, data, engine="monolithic", options=None, solver_params=None, stats=None):
+    """
+    Write an instance archive to target (a path or a binary file object).
+    The snapshot is anonymised here; returns the instance metadata.
+    """
+    options = {k: v for k, v in (options or {}).items() if k in EXPORTED_OPTIONS}
+    snapshot = anonymise(data)
+    model = build_model(snapshot, engine, options)
+    proto = model.Proto()
+    instance = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "engine": engine,
+        "options": options,
+        "solver_params": solver_params,
+        "source_stats": {k: v for k, v in (stats or {}).items()
+                         if k in ("status", "variables", "build_time", "solve_time", "objective", "best_bound")},
+        "size": {
+            "courses": len(snapshot["courses"]),
+            "sections": len(snapshot["sections"]),
+            "rooms": len(snapshot["rooms"]),
+            "faculty": len(snapshot["faculty"]),
+            "model_variables": len(proto.variables),
+            "model_constraints": len(proto.constraints)
+        },
+        "snapshot": snapshot
+    }
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(INSTANCE_FILE, json.dumps(instance, default=str))
+        archive.writestr(MODEL_FILE, str(proto))
+    return {k: v for k, v in instance.items() if k != "snapshot"}
+
+
+def export_college(target, college_id, engine="monolithic", profile=None, warm_start=False):
+    """
+    Export a college's current inputs as the generation would load them,
+    with its solver profile (or profile). Raises ValueError for unknown
+    engines or profiles and for colleges with nothing to schedule.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    if profile is None:
+        college = db.session.get(College, college_id)
+        profile = college.solver_profile if college else None
+    solver_params = resolve_solver_params(profile, max_workers=host_worker_cap(current_app.config))
+    data = load_scheduler_input(college_id, include_timetable=warm_start or engine in ENGINES_USING_TIMETABLE)
+    if not data["courses"] or not data["faculty"] or not data["rooms"] or not data["sections"]:
+        raise ValueError("Need courses, faculty, rooms, and sections to export a solver instance")
+    return export_instance(target, data, engine, {"time_limit": solver_params["max_time_in_seconds"]},
+                           solver_params)
+
+
+def dump_problem_run(college_id, data, engine, engine_options, result, run=None):
+    """
+    With SOLVER_EXPORT_DIR configured, export a run that found no timetable
+    or ran into its time limit, so it can be reproduced offline. Returns
+    the file's path, or None; like telemetry it never fails a generation.
+    """
+    directory = current_app.config.get("SOLVER_EXPORT_DIR")
+    if not directory or (result["feasible"] and not (run is not None and run.hit_time_limit)):
+        return None
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    path = os.path.join(directory, f"college{college_id}_{engine}_{stamp}"
+                                   f"{f'_run{run.id}' if run is not None else ''}.zip")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        export_instance(path, data, engine, engine_options, engine_options.get("solver_params"), result["stats"])
+        return path
+    except Exception as e:
+        print(f"[Export] Failed to export solver instance for college {college_id}: {e}")
+        return None
+
+
+def load_instance(source, with_model=True):
+    """
+    Read an instance archive. Raises ValueError for other formats. With
+    with_model, "model" is the exported CpModel (parsing it takes a while on
+    large colleges, and replaying the snapshot through an engine rebuilds it).
+    """
+    with zipfile.ZipFile(source) as archive:
+        instance = json.loads(archive.read(INSTANCE_FILE))
+        if instance.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported instance format {instance.get('format_version')}")
+        if with_model:
+            instance["model"] = cp_model.CpModel()
+            instance["model"].Proto().parse_text_format(archive.read(MODEL_FILE).decode())
+    return instance
+
+
+def solve_model(model, solver_params=None, time_limit=None, overrides=None):
+    """
+    Solve an exported model as it is, with the run's parameters, any
+    CpSolver field overridden by name. Returns timing and search stats.
+    """
+    solver = apply_solver_params(cp_model.CpSolver(), solver_params, time_limit)
+    for name, value in (overrides or {}).items():
+        current = getattr(solver.parameters, name)  # AttributeError names an unknown parameter
+        if isinstance(current, bool):
+            value = str(value).lower() in ("1", "true", "yes")
+        setattr(solver.parameters, name, type(current)(value))
+    status = solver.Solve(model)
+    has_objective = model.HasObjective() and status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "status": solver.StatusName(status),
+        "wall_time": round(solver.WallTime(), 3),
+        "user_time": round(solver.UserTime(), 3),
+        "branches": solver.NumBranches(),
+        "conflicts": solver.NumConflicts(),
+        "objective": solver.ObjectiveValue() if has_objective else None,
+        "best_bound": solver.BestObjectiveBound() if has_objective else None
+    }
@@ -0,0 +1,256 @@
+"""
+In-memory occupancy index of a college's active timetable.
+
+For every faculty member, section and room the index keeps a bitset (a
+Python int, bit n = slot id n) of the slots they are booked in, plus who
+holds each booked cell. A conflict check is then a few bit tests instead
+of three queries, excluding entries that move together (swaps) is a set
+difference on one cell, and "when are these three all free" is an OR of
+three bitsets.
+
+Indexes are cached per process, keyed by database, college and timetable
+version, and kept current two ways:
+
+- committed changes made through this process's sessions are applied to
+  a copy of the cached index, which then replaces it (rows added, moved or
+  deleted; see after_commit below). An index once returned is never
+  changed, so callers can read it without holding the registry's lock
+- TimetableVersion.revision is bumped by every flush that moves rows
+  (models/timetable.py), so an index built or updated here that another
+  process has since changed no longer matches and is rebuilt
+
+Looking up an index therefore costs one small query for the revision, and
+a rebuild one query for the version's placements.
+"""
+
+import threading
+from collections import defaultdict
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import College, Timetable, TimetableVersion
+from models.timetable import changed_placements
+
+KINDS = ("faculty", "section", "room")
+
+# session.info key of the moves a session flushed but has not committed yet
+PENDING_KEY = "occupancy_changes"
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def slot_mask(slots):
+    """The bitset of a collection of slot ids."""
+    mask = 0
+    for slot in slots:
+        mask |= 1 << slot
+    return mask
+
+
+def mask_slots(mask):
+    """The slot ids set in a bitset, in order."""
+    slots = []
+    while mask:
+        low = mask & -mask
+        slots.append(low.bit_length() - 1)
+        mask ^= low
+    return slots
+
+
+class OccupancyIndex:
+    """Bitsets of booked slots per faculty member, section and room of one timetable version."""
+
+    def __init__(self, college_id, version_id, revision=None):
+        self.college_id = college_id
+        self.version_id = version_id
+        self.revision = revision
+        self.entries = {}                                      # timetable_id -> (faculty, section, room, slot)
+        self.masks = {kind: defaultdict(int) for kind in KINDS}  # kind -> owner id -> bitset
+        self.holders = defaultdict(set)                        # (kind, owner id, slot) -> timetable ids
+
+    def copy(self):
+        """
+        An index with the same entries that can be updated without changing
+        this one. put() and remove() replace holder sets rather than
+        mutating them, so the containers are copied but the sets shared.
+        """
+        index = OccupancyIndex(self.college_id, self.version_id, self.revision)
+        index.entries = dict(self.entries)
+        index.masks = {kind: defaultdict(int, masks) for kind, masks in self.masks.items()}
+        index.holders = defaultdict(set, self.holders)
+        return index
+
+    def _cells(self, placement):
+        *owners, slot = placement
+        return [(kind, owner, slot) for kind, owner in zip(KINDS, owners) if owner is not None]
+
+    def put(self, timetable_id, faculty_id, section_id, room_id, slot):
+        """Add an entry, or move it if it is already indexed."""
+        self.remove(timetable_id)
+        if slot is None:
+            return
+        placement = (faculty_id, section_id, room_id, slot)
+        self.entries[timetable_id] = placement
+        for kind, owner, slot in self._cells(placement):
+            self.holders[(kind, owner, slot)] = self.holders.get((kind, owner, slot), set()) | {timetable_id}
+            self.masks[kind][owner] |= 1 << slot
+
+    def remove(self, timetable_id):
+        placement = self.entries.pop(timetable_id, None)
+        if placement is None:
+            return
+        for cell in self._cells(placement):
+            holders = self.holders[cell] - {timetable_id}
+            if holders:
+                self.holders[cell] = holders
+            else:
+                del self.holders[cell]
+                kind, owner, slot = cell
+                self.masks[kind][owner] &= ~(1 << slot)
+
+    def occupied(self, kind, owner_id, exclude=()):
+        """Bitset of the slots owner_id is booked in, ignoring the excluded entries."""
+        if owner_id is None:
+            return 0
+        mask = self.masks[kind].get(owner_id, 0)
+        for timetable_id in exclude:
+            placement = self.entries.get(timetable_id)
+            if placement is None or placement[KINDS.index(kind)] != owner_id:
+                continue
+            slot = placement[3]
+            if not self.holders.get((kind, owner_id, slot), set()) - set(exclude):
+                mask &= ~(1 << slot)
+        return mask
+
+    def holder(self, kind, owner_id, slot, exclude=()):
+        """An entry booking owner_id at slot other than the excluded ones, or None."""
+        if owner_id is None or not self.masks[kind].get(owner_id, 0) >> slot & 1:
+            return None
+        others = self.holders.get((kind, owner_id, slot), set()) - set(exclude)
+        return min(others) if others else None
+
+    def conflict(self, faculty_id, section_id, room_id, slot, exclude=()):
+        """
+        The first clash of a class at slot, as (kind, timetable_id) checked
+        in faculty, section, room order, or None if the slot is free.
+        """
+        for kind, owner in zip(KINDS, (faculty_id, section_id, room_id)):
+            timetable_id = self.holder(kind, owner, slot, exclude)
+            if timetable_id is not None:
+                return kind, timetable_id
+        return None
+
+    def free_slots(self, slots, faculty_id=None, section_id=None, room_id=None, exclude=()):
+        """The slots among `slots` in which every given owner is free."""
+        busy = 0
+        for kind, owner in zip(KINDS, (faculty_id, section_id, room_id)):
+            busy |= self.occupied(kind, owner, exclude)
+        return mask_slots(slot_mask(slots) & ~busy)
+
+    def free_rooms(self, slot, room_ids, exclude=()):
+        """The rooms among room_ids that are free at slot."""
+        return [r for r in room_ids if self.holder("room", r, slot, exclude) is None]
+
+
+# --- REGISTRY ---
+
+def _database_key():
+    return str(db.engine.url)
+
+
+def _load(college_id, version_id, revision):
+    table = Timetable.__table__
+    query = select(table.c.timetable_id, table.c.faculty_id, table.c.section_id, table.c.room_id, table.c.slot)
+    if version_id is None:
+        query = query.where(table.c.version_id.is_(None), table.c.college_id == college_id)
+    else:
+        query = query.where(table.c.version_id == version_id)
+    index = OccupancyIndex(college_id, version_id, revision)
+    for row in db.session.execute(query):
+        index.put(*row)
+    return index
+
+
+def get_occupancy_index(college_id):
+    """
+    The occupancy index of the college's active timetable, as of this
+    session's view of the database. Cached per process and rebuilt when
+    the version or its revision changed since.
+    """
+    colleges, versions = College.__table__, TimetableVersion.__table__
+    version_id, revision = db.session.execute(
+        select(colleges.c.active_timetable_version_id, versions.c.revision)
+        .select_from(colleges.outerjoin(versions, versions.c.id == colleges.c.active_timetable_version_id))
+        .where(colleges.c.id == college_id)
+    ).first() or (None, None)
+
+    key = (_database_key(), college_id, version_id)
+    with _lock:
+        index = _indexes.get(key)
+    if index is not None and revision is not None and index.revision == revision:
+        return index
+
+    index = _load(college_id, version_id, revision)
+    # Unversioned rows have no revision to check, and an index read while
+    # this session has uncommitted moves would outlive a rollback
+    if revision is not None and version_id not in db.session.info.get(PENDING_KEY, {}):
+        with _lock:
+            for stale in [k for k in _indexes if k[:2] == key[:2]]:
+                del _indexes[stale]
+            _indexes[key] = index
+    return index
+
+
+def clear_occupancy_indexes():
+    with _lock:
+        _indexes.clear()
+
+
+# --- TRACKING ---
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session, flush_context):
+    changed, versions = changed_placements(session)
+    if not changed:
+        return
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for version_id in versions:
+        pending.setdefault(version_id, {"flushes": 0, "changes": []})["flushes"] += 1
+    for row, deleted in changed:
+        placement = None if deleted else (row.faculty_id, row.section_id, row.room_id, row.slot)
+        pending.setdefault(row.version_id, {"flushes": 0, "changes": []})["changes"].append(
+            (row.timetable_id, placement))
+        # A row moved to another version leaves the old one
+        for old_version_id in db.inspect(row).attrs.version_id.history.deleted:
+            if old_version_id in pending:
+                pending[old_version_id]["changes"].append((row.timetable_id, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    with _lock:
+        for key, index in list(_indexes.items()):
+            version_id = key[2]
+            if version_id not in pending:
+                continue
+            # Readers may hold the cached index, so changes go to a copy
+            updated = index.copy()
+            for timetable_id, placement in pending[version_id]["changes"]:
+                if placement is None:
+                    updated.remove(timetable_id)
+                else:
+                    updated.put(timetable_id, *placement)
+            # Matches the database unless another process moved rows meanwhile
+            updated.revision = index.revision + pending[version_id]["flushes"]
+            _indexes[key] = updated
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(PENDING_KEY, None)
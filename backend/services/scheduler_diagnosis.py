@@ -0,0 +1,313 @@
+"""
+Infeasibility diagnosis for timetable generation.
+
+Two stages, cheapest first:
+
+1. Capacity checks on the snapshot alone: a section needing more hours than
+   its days allow, a faculty member teaching more hours than they are
+   available, more class-hours than room-slots, and fixed classes that
+   collide or sit in unavailable slots. These catch most bad inputs in
+   milliseconds, before any model is built.
+2. An infeasible core: the slot-level model is rebuilt with every group of
+   constraints (one course-section's hours, one faculty's clashes and
+   unavailability, one section's clashes and daily limit, room capacity,
+   fixed classes) guarded by an assumption literal. When CP-SAT proves the
+   model infeasible it returns a subset of assumptions that is already
+   infeasible, which is then shrunk by deletion within the time budget.
+
+The result names the courses, sections and faculty involved.
+"""
+
+import time
+from collections import defaultdict, Counter
+from ortools.sat.python import cp_model
+
+from services.scheduler_model import SlotModelBuilder, DEFAULT_MAX_HOURS_PER_DAY, is_lab_course
+from utils.slot_grid import slot_name
+
+DIAGNOSIS_TIME_LIMIT = 10.0
+MAX_REPORTED = 20
+
+
+# --- CAPACITY CHECKS ---
+
+def _section_label(section):
+    return f"Year {section['year']} Section {section['name']} (dept {section['dept_id']})"
+
+
+def capacity_checks(data):
+    """Necessary conditions that can be checked without solving. Returns a list of issue dicts."""
+    index = SlotModelBuilder(data)
+    index.build_indexes()
+    slots = index.time_slots
+    slots_per_day = Counter(index.slot_days.values())
+    issues = []
+
+    section_demand = defaultdict(int)
+    section_courses = defaultdict(list)
+    faculty_demand = defaultdict(int)
+    faculty_courses = defaultdict(set)
+    demand = {"all": 0, "lab": 0}
+    lab_capacity = max((index.rooms[r]["capacity"] or 0 for r in index.lab_rooms), default=None)
+    for c in data["courses"]:
+        hours = max(c["hours_per_week"], 0)
+        for section in index.sections_for(c):
+            section_demand[section["id"]] += hours
+            section_courses[section["id"]].append(c["course_id"])
+            if c["faculty_id"] in index.faculty:
+                faculty_demand[c["faculty_id"]] += hours
+                faculty_courses[c["faculty_id"]].add(c["course_id"])
+            demand["all"] += hours
+            # Lab classes are held to lab rooms only when some lab room seats the section
+            if is_lab_course(c) and lab_capacity is not None and lab_capacity >= (section["student_count"] or 0):
+                demand["lab"] += hours
+
+    for section_id, hours in section_demand.items():
+        section = index.sections[section_id]
+        limit = section["max_hours_per_day"] if section["max_hours_per_day"] is not None else DEFAULT_MAX_HOURS_PER_DAY
+        supply = sum(min(limit, count) for count in slots_per_day.values())
+        if hours > supply:
+            issues.append({
+                "kind": "section_overload",
+                "section_id": section_id,
+                "course_ids": section_courses[section_id],
+                "demand": hours,
+                "supply": supply,
+                "message": f"{_section_label(section)} needs {hours} hours a week but "
+                           f"{len(slots_per_day)} days x {limit} hours/day allow only {supply}."
+            })
+
+    for faculty_id, hours in faculty_demand.items():
+        supply = len(slots) - len(index.unavailable_by_faculty.get(faculty_id, ()))
+        if hours > supply:
+            issues.append({
+                "kind": "faculty_overload",
+                "faculty_id": faculty_id,
+                "course_ids": sorted(faculty_courses[faculty_id]),
+                "demand": hours,
+                "supply": supply,
+                "message": f"{index.faculty[faculty_id]['faculty_name']} must teach {hours} hours a week "
+                           f"but is available for only {supply} slots."
+            })
+
+    room_supply = len(index.rooms) * len(slots)
+    if demand["all"] > room_supply:
+        issues.append({
+            "kind": "room_shortage",
+            "demand": demand["all"],
+            "supply": room_supply,
+            "message": f"Classes need {demand['all']} room-hours but {len(index.rooms)} rooms "
+                       f"x {len(slots)} slots give only {room_supply}."
+        })
+    lab_supply = len(index.lab_rooms) * len(slots)
+    if demand["lab"] > lab_supply:
+        issues.append({
+            "kind": "lab_shortage",
+            "demand": demand["lab"],
+            "supply": lab_supply,
+            "message": f"Lab courses need {demand['lab']} lab-hours but {len(index.lab_rooms)} lab rooms "
+                       f"x {len(slots)} slots give only {lab_supply}."
+        })
+
+    issues.extend(_fixed_conflicts(data, index))
+    return issues
+
+
+def _fixed_conflicts(data, index):
+    issues = []
+    holders = defaultdict(set)
+    for c in data["courses"]:
+        if not (c["is_fixed"] and c["fixed_slot"] is not None and c["fixed_room_id"]):
+            continue
+        slot = c["fixed_slot"]
+        if slot in index.unavailable_by_faculty.get(c["faculty_id"], ()):
+            issues.append({
+                "kind": "fixed_unavailable",
+                "course_ids": [c["course_id"]],
+                "faculty_id": c["faculty_id"],
+                "message": f"{c['name']} is fixed at {slot_name(slot)} when its faculty is unavailable."
+            })
+        holders[("room", slot, c["fixed_room_id"])].add(c["course_id"])
+        if c["faculty_id"] is not None:
+            holders[("faculty", slot, c["faculty_id"])].add(c["course_id"])
+        for section in index.sections_for(c):
+            holders[("section", slot, section["id"])].add(c["course_id"])
+
+    for (kind, slot, _key), course_ids in holders.items():
+        if len(course_ids) > 1:
+            names = ", ".join(index.courses[cid]["name"] for cid in sorted(course_ids))
+            issues.append({
+                "kind": "fixed_clash",
+                "course_ids": sorted(course_ids),
+                "message": f"Fixed classes {names} share a {kind} at {slot_name(slot)}."
+            })
+    return issues
+
+
+# --- INFEASIBLE CORE ---
+
+class DiagnosisModelBuilder(SlotModelBuilder):
+    """
+    Slot-level model in which every constraint group is enforced only if its
+    assumption literal is true. Unavailable slots get variables too, so
+    unavailability is a constraint the core can point at instead of pruning.
+    Symmetry breaking and the objective are off so cores only contain the
+    user's hard constraints.
+    """
+
+    break_symmetry = False
+    use_objective = False
+
+    def __init__(self, data, time_slots=None):
+        super().__init__(data, time_slots)
+        self.assumptions = {}
+        self.current_group = None
+
+    def candidate_slots(self, course):
+        return self.time_slots
+
+    def is_blocked(self, owner, slot, faculty_id, section_id):
+        return False
+
+    def literal(self, group):
+        if group not in self.assumptions:
+            self.assumptions[group] = self.model.NewBoolVar("assume_" + "_".join(map(str, group)))
+        return self.assumptions[group]
+
+    def add_constraint(self, family, constraint):
+        constraint.OnlyEnforceIf(self.literal(self.current_group))
+        return super().add_constraint(family, constraint)
+
+    def add_fixed_constraints(self):
+        for (course_id, section_id), cells in self.fixed_cells.items():
+            self.current_group = ("fixed", course_id)
+            for slot, _room_id in cells:
+                var = self.assignments[(course_id, section_id, slot)]
+                self.add_constraint("fixed", self.model.Add(var == 1))
+
+    def add_unavailability_constraints(self):
+        for (course_id, section_id, slot), var in self.assignments.items():
+            faculty_id = self.courses[course_id]["faculty_id"]
+            if slot in self.unavailable_by_faculty.get(faculty_id, ()):
+                self.current_group = ("unavailable", faculty_id)
+                self.add_constraint("unavailable", self.model.Add(var == 0))
+
+    def add_hours_constraints(self):
+        for (course_id, section_id), variables in self.vars_by_course_section.items():
+            self.current_group = ("hours", course_id, section_id)
+            hours = max(self.courses[course_id]["hours_per_week"], 0)
+            self.add_constraint("hours", self.model.Add(cp_model.LinearExpr.Sum(variables) == hours))
+
+    def add_room_constraints(self):
+        self.current_group = ("rooms",)
+        super().add_room_constraints()
+
+    def add_faculty_constraints(self):
+        for (_slot, faculty_id), variables in self.vars_by_slot_faculty.items():
+            if len(variables) > 1:
+                self.current_group = ("faculty", faculty_id)
+                self.add_constraint("faculty", self.model.Add(cp_model.LinearExpr.Sum(variables) <= 1))
+
+    def add_section_constraints(self):
+        for (_slot, section_id), variables in self.vars_by_slot_section.items():
+            if len(variables) > 1:
+                self.current_group = ("section", section_id)
+                self.add_constraint("section", self.model.Add(cp_model.LinearExpr.Sum(variables) <= 1))
+
+    def add_daily_constraints(self):
+        for (section_id, _day), variables in self.vars_by_section_day.items():
+            limit = self.sections[section_id]["max_hours_per_day"]
+            if limit is None:
+                limit = DEFAULT_MAX_HOURS_PER_DAY
+            if len(variables) > limit:
+                self.current_group = ("daily", section_id)
+                self.add_constraint("daily", self.model.Add(cp_model.LinearExpr.Sum(variables) <= limit))
+
+    def build(self):
+        super().build()
+        self.add_unavailability_constraints()
+        return self
+
+    def describe(self, group):
+        kind = group[0]
+        if kind == "hours":
+            course, section = self.courses[group[1]], self.sections[group[2]]
+            return {"kind": kind, "course_id": group[1], "section_id": group[2],
+                    "message": f"{course['name']} needs {course['hours_per_week']} hours for {_section_label(section)}."}
+        if kind in ("section", "daily"):
+            section = self.sections[group[1]]
+            what = "one class at a time" if kind == "section" else "its daily hour limit"
+            return {"kind": kind, "section_id": group[1], "message": f"{_section_label(section)} has {what}."}
+        if kind in ("faculty", "unavailable"):
+            name = self.faculty[group[1]]["faculty_name"] if group[1] in self.faculty else f"Faculty {group[1]}"
+            what = "teaches one class at a time" if kind == "faculty" else "is unavailable in some slots"
+            return {"kind": kind, "faculty_id": group[1], "message": f"{name} {what}."}
+        if kind == "fixed":
+            return {"kind": kind, "course_id": group[1],
+                    "message": f"{self.courses[group[1]]['name']} is fixed to a slot and room."}
+        return {"kind": kind, "message": "Each room holds one class per slot."}
+
+
+def _solve_with(builder, groups, time_limit):
+    builder.model.ClearAssumptions()
+    builder.model.AddAssumptions([builder.assumptions[g] for g in groups])
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(time_limit, 0.1)
+    # Cores are only reported reliably by a single worker
+    solver.parameters.num_workers = 1
+    status = solver.Solve(builder.model)
+    if status != cp_model.INFEASIBLE:
+        return solver.StatusName(status), None
+    literals = {builder.assumptions[g].Index(): g for g in groups}
+    return "INFEASIBLE", [literals[i] for i in solver.SufficientAssumptionsForInfeasibility() if i in literals]
+
+
+def infeasible_core(data, time_limit=DIAGNOSIS_TIME_LIMIT):
+    """
+    Smallest set of constraint groups found (within time_limit) that cannot
+    all hold. Returns (status_name, [described groups]); the list is empty
+    unless the model was proven infeasible.
+    """
+    deadline = time.perf_counter() + time_limit
+    builder = DiagnosisModelBuilder(data).build()
+    status, core = _solve_with(builder, list(builder.assumptions), time_limit)
+    if core is None:
+        return status, []
+
+    # Deletion pass: drop every group the rest stays infeasible without
+    kept = list(core)
+    for group in list(core):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or group not in kept:
+            continue
+        trial = [g for g in kept if g != group]
+        _status, smaller = _solve_with(builder, trial, min(remaining, 2.0))
+        if smaller is not None:
+            kept = smaller or trial
+    return "INFEASIBLE", [builder.describe(g) for g in kept[:MAX_REPORTED]]
+
+
+def diagnose_infeasibility(data, time_limit=DIAGNOSIS_TIME_LIMIT, deep=False):
+    """
+    Explain why the snapshot has no timetable. Capacity checks run first;
+    the core search only runs when they find nothing (or deep=True).
+    """
+    started = time.perf_counter()
+    issues = capacity_checks(data)
+    diagnosis = {"capacity_issues": issues[:MAX_REPORTED], "core": [], "core_status": None}
+    if deep or not issues:
+        diagnosis["core_status"], diagnosis["core"] = infeasible_core(data, time_limit)
+    diagnosis["time"] = round(time.perf_counter() - started, 3)
+    return diagnosis
+
+
+def summarize(diagnosis, limit=3):
+    """One line for error messages: the first few findings."""
+    findings = [i["message"] for i in diagnosis["capacity_issues"]] + [c["message"] for c in diagnosis["core"]]
+    if not findings and diagnosis["core_status"] in ("OPTIMAL", "FEASIBLE"):
+        return ("The constraints can be satisfied; the solver ran out of time or could not place rooms. "
+                "Try a longer time limit or the thorough solver profile.")
+    if not findings:
+        return "No capacity problem or infeasible core was found within the time limit."
+    more = f" (+{len(findings) - limit} more)" if len(findings) > limit else ""
+    return " ".join(findings[:limit]) + more
@@ -0,0 +1,751 @@
+"""
+Solver engines for timetable generation.
+
+Every engine takes a load_scheduler_input() snapshot and returns a plain
+result dict, so the same engines can run inside a request, a background
+worker or a benchmark:
+
+    {"status": "OPTIMAL", "feasible": True, "entries": [...], "stats": {...}}
+
+Entries are {"course_id", "section_id", "faculty_id", "room_id", "slot"}.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import defaultdict
+from ortools.sat.python import cp_model
+
+from services.scheduler_model import (
+    TimetableModelBuilder, SlotModelBuilder, DEFAULT_MAX_HOURS_PER_DAY, is_lab_course, is_lab_room
+)
+from services.scheduler_intervals import IntervalModelBuilder
+from services.solver_profiles import SOLVER_PARAMETERS, apply_solver_params
+
+DEFAULT_TIME_LIMIT = 30.0
+FALLBACK_TIME_LIMIT = 5.0
+
+# Objective values kept per solve in the run's telemetry
+TRAJECTORY_POINTS = 50
+
+
+class SolveProgress:
+    """
+    Progress sink for background runs. Engines report their phase and model
+    size here, a solution callback records solutions and the best objective,
+    and cancel() may be called from any thread to stop the running search.
+    """
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._solver = None
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.state = {"phase": "queued", "solutions": 0, "best_objective": None}
+
+    def set_phase(self, phase, **fields):
+        with self._lock:
+            self.state["phase"] = phase
+            self.state.update(fields)
+
+    def snapshot(self):
+        with self._lock:
+            state = dict(self.state)
+        state["elapsed"] = round(time.perf_counter() - self.started, 1)
+        return state
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def solve(self, solver, model, callback=None):
+        with self._lock:
+            if self.cancelled:
+                return cp_model.UNKNOWN
+            self._solver = solver
+        try:
+            return solver.Solve(model, callback or _SolveCallback(self))
+        finally:
+            with self._lock:
+                self._solver = None
+
+
+class _SolveCallback(cp_model.CpSolverSolutionCallback):
+    """Records the objective trajectory of a search and reports solutions to progress."""
+
+    def __init__(self, progress=None, track_objective=True):
+        super().__init__()
+        self.progress = progress
+        self.track_objective = track_objective
+        self.trajectory = []
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue() if self.track_objective else None
+        if self.track_objective:
+            self.trajectory.append([round(self.WallTime(), 3), objective])
+        if self.progress is not None:
+            with self.progress._lock:
+                self.progress.state["solutions"] += 1
+                self.progress.state["best_objective"] = objective
+
+
+def _solve(solver, model, progress=None):
+    """Solve, reporting to progress. Returns (status, objective trajectory)."""
+    callback = _SolveCallback(progress, track_objective=model.HasObjective())
+    if progress is None:
+        status = solver.Solve(model, callback) if model.HasObjective() else solver.Solve(model)
+    else:
+        status = progress.solve(solver, model, callback)
+    return status, _thin(callback.trajectory)
+
+
+def _thin(points, limit=TRAJECTORY_POINTS):
+    """At most limit points of a trajectory, evenly spread, keeping the last."""
+    if len(points) <= limit:
+        return points
+    step = len(points) / (limit - 1)
+    return [points[int(i * step)] for i in range(limit - 1)] + [points[-1]]
+
+
+def _search_stats(solver, model):
+    """Presolve and search counters of the last Solve(), for the run's telemetry."""
+    response = solver.ResponseProto()
+    proto = model.Proto()
+    return {
+        "presolve": {
+            "variables": len(proto.variables),
+            "constraints": len(proto.constraints),
+            # Left after presolve
+            "booleans": response.num_booleans,
+            "integers": response.num_integers,
+            "fixed_booleans": response.num_fixed_booleans
+        },
+        "wall_time": round(response.wall_time, 3),
+        "user_time": round(response.user_time, 3),
+        "deterministic_time": round(response.deterministic_time, 3),
+        "branches": response.num_branches,
+        "conflicts": response.num_conflicts,
+        "restarts": response.num_restarts,
+        "propagations": response.num_binary_propagations + response.num_integer_propagations,
+        "lp_iterations": response.num_lp_iterations
+    }
+
+
+def _result(status_name, entries, stats):
+    return {
+        "status": status_name,
+        "feasible": status_name in ("OPTIMAL", "FEASIBLE"),
+        "entries": entries,
+        "stats": stats
+    }
+
+
+def _report_model(progress, builder):
+    if progress is not None:
+        stats = builder.stats()
+        progress.set_phase("solving", variables=stats["variables"],
+                          constraints=sum(stats["constraints"].values()))
+
+
+def _warm_start(builder, data):
+    """Hint the previous timetable if the snapshot carries one."""
+    previous = [e for e in data.get("timetable", []) if e["slot"] is not None]
+    return builder.add_hints(previous) if previous else 0
+
+
+def _new_solver(time_limit, solver_params=None):
+    return apply_solver_params(cp_model.CpSolver(), solver_params, time_limit)
+
+
+def _effective_params(solver, solver_params=None):
+    """The parameters a solver actually ran with, for the run's stats."""
+    params = {name: getattr(solver.parameters, name) for name in SOLVER_PARAMETERS}
+    params["profile"] = (solver_params or {}).get("profile")
+    return params
+
+
+def _build_and_solve(builder, engine, time_limit, progress=None, hints=(), solver_params=None):
+    if progress is not None:
+        progress.set_phase("building")
+    build_started = time.perf_counter()
+    if hints or builder.data.get("timetable"):
+        # Ordering interchangeable rooms/sections would contradict the
+        # previous timetable's hints and move classes for no reason
+        builder.break_symmetry = False
+    builder.build()
+    hinted = builder.add_hints(hints) if hints else _warm_start(builder, builder.data)
+    build_time = time.perf_counter() - build_started
+    _report_model(progress, builder)
+
+    solver = _new_solver(time_limit, solver_params)
+    status, trajectory = _solve(solver, builder.model, progress)
+
+    stats = builder.stats()
+    stats.update({
+        "engine": engine,
+        "build_time": round(build_time, 3),
+        "solve_time": round(solver.WallTime(), 3),
+        "status": solver.StatusName(status),
+        "hinted": hinted,
+        "solver_params": _effective_params(solver, solver_params),
+        "search": _search_stats(solver, builder.model),
+        "objective_trajectory": trajectory
+    })
+    if builder.objective_terms and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        # Best solution found within the time limit and how far it may be from optimal
+        stats["objective"] = int(solver.ObjectiveValue())
+        stats["best_bound"] = int(solver.BestObjectiveBound())
+        stats["objective_terms"] = {name: int(solver.Value(expr)) for name, expr in builder.objective_terms.items()}
+    return solver, status, stats
+
+
+def solve_monolithic(data, time_limit=DEFAULT_TIME_LIMIT, progress=None, solver_params=None):
+    """Choose slot and room jointly in one CP-SAT model."""
+    builder = TimetableModelBuilder(data)
+    solver, status, stats = _build_and_solve(builder, "monolithic", time_limit, progress,
+                                             solver_params=solver_params)
+    entries = builder.extract(solver) if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else []
+    return _result(solver.StatusName(status), entries, stats)
+
+
+# --- TWO-PHASE ENGINE ---
+
+def match_rooms(classes):
+    """
+    Maximum bipartite matching of classes to rooms (Kuhn's augmenting paths).
+    classes is a list of (key, candidate_rooms); returns ({key: room_id}, [unmatched keys]).
+    """
+    order = sorted(range(len(classes)), key=lambda i: len(classes[i][1]))
+    candidates = [sorted(rooms) for _, rooms in classes]
+    room_owner = {}
+
+    def augment(i, seen):
+        for room_id in candidates[i]:
+            if room_id in seen:
+                continue
+            seen.add(room_id)
+            if room_id not in room_owner or augment(room_owner[room_id], seen):
+                room_owner[room_id] = i
+                return True
+        return False
+
+    unmatched = [classes[i][0] for i in order if not augment(i, set())]
+    return {classes[i][0]: room_id for room_id, i in room_owner.items()}, unmatched
+
+
+def repair_unmatched(builder, placed, unmatched, time_limit=FALLBACK_TIME_LIMIT, progress=None,
+                     solver_params=None):
+    """
+    Small CP model that re-places classes whose slot had no room matching.
+    Everything already matched stays fixed; each unmatched class may take any
+    free (slot, room) its faculty and section are available for.
+    Returns the new entries, or None if no placement exists.
+    """
+    room_busy = {(e["slot"], e["room_id"]) for e in placed}
+    faculty_busy = {(e["slot"], e["faculty_id"]) for e in placed}
+    section_busy = {(e["slot"], e["section_id"]) for e in placed}
+    day_load = defaultdict(int)
+    for e in placed:
+        day_load[(e["section_id"], builder.slot_days[e["slot"]])] += 1
+
+    model = cp_model.CpModel()
+    cells = {}
+    by_room, by_faculty, by_section, by_day = (defaultdict(list) for _ in range(4))
+
+    for i, e in enumerate(unmatched):
+        course = builder.courses[e["course_id"]]
+        section = builder.sections[e["section_id"]]
+        owner = (e["course_id"], e["section_id"])
+        options = []
+        for slot in builder.candidate_slots(course):
+            if (slot, e["faculty_id"]) in faculty_busy or (slot, e["section_id"]) in section_busy:
+                continue
+            if builder.is_blocked(owner, slot, e["faculty_id"], e["section_id"]):
+                continue
+            for room_id in builder.candidate_rooms(course, section):
+                if (slot, room_id) in room_busy:
+                    continue
+                var = model.NewBoolVar(f"repair_{i}_{slot}_{room_id}")
+                cells[(i, slot, room_id)] = var
+                options.append(var)
+                by_room[(slot, room_id)].append(var)
+                by_section[(slot, e["section_id"])].append(var)
+                by_day[(e["section_id"], builder.slot_days[slot])].append(var)
+                if e["faculty_id"] is not None:
+                    by_faculty[(slot, e["faculty_id"])].append(var)
+        if not options:
+            return None
+        model.AddExactlyOne(options)
+
+    for group in (by_room, by_faculty, by_section):
+        for variables in group.values():
+            if len(variables) > 1:
+                model.AddAtMostOne(variables)
+    for (section_id, day), variables in by_day.items():
+        limit = builder.sections[section_id]["max_hours_per_day"]
+        if limit is None:
+            limit = DEFAULT_MAX_HOURS_PER_DAY
+        model.Add(cp_model.LinearExpr.Sum(variables) <= max(limit - day_load[(section_id, day)], 0))
+
+    solver = _new_solver(time_limit, solver_params)
+    status, _ = _solve(solver, model, progress)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    repaired = []
+    for (i, slot, room_id), var in cells.items():
+        if solver.Value(var) == 1:
+            repaired.append(dict(unmatched[i], slot=slot, room_id=room_id))
+    return repaired
+
+
+def solve_two_phase(data, time_limit=DEFAULT_TIME_LIMIT, max_workers=None, progress=None, solver_params=None):
+    """
+    Phase one picks a slot for every class with per-slot room capacity
+    constraints; phase two assigns rooms slot by slot as independent
+    bipartite matchings, falling back to a small CP model for the rare
+    classes a matching cannot place.
+    """
+    builder = SlotModelBuilder(data)
+    solver, status, stats = _build_and_solve(builder, "two_phase", time_limit, progress,
+                                             solver_params=solver_params)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _result(solver.StatusName(status), [], stats)
+
+    by_slot = defaultdict(list)
+    for e in builder.extract(solver):
+        by_slot[e.pop("slot")].append(e)
+
+    def assign_slot(slot):
+        classes = [((e["course_id"], e["section_id"]), e["rooms"]) for e in by_slot[slot]]
+        matching, unmatched = match_rooms(classes)
+        placed, left = [], []
+        for e in by_slot[slot]:
+            key = (e["course_id"], e["section_id"])
+            entry = {k: v for k, v in e.items() if k != "rooms"}
+            entry["slot"] = slot
+            if key in matching and key not in unmatched:
+                entry["room_id"] = matching[key]
+                placed.append(entry)
+            else:
+                left.append(entry)
+        return placed, left
+
+    if progress is not None:
+        progress.set_phase("assigning_rooms")
+    rooms_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(assign_slot, list(by_slot)))
+    placed = [e for slot_placed, _ in results for e in slot_placed]
+    unmatched = [e for _, slot_left in results for e in slot_left]
+
+    if unmatched:
+        repaired = repair_unmatched(builder, placed, unmatched, progress=progress, solver_params=solver_params)
+        if repaired is None:
+            stats["room_assignment_time"] = round(time.perf_counter() - rooms_started, 3)
+            stats["fallback_classes"] = len(unmatched)
+            stats["status"] = "INFEASIBLE"
+            return _result("INFEASIBLE", [], stats)
+        placed.extend(repaired)
+
+    stats["room_assignment_time"] = round(time.perf_counter() - rooms_started, 3)
+    stats["fallback_classes"] = len(unmatched)
+    return _result(solver.StatusName(status), placed, stats)
+
+
+# --- INCREMENTAL ENGINE ---
+
+def find_neighbourhood(data, previous, changed_courses=(), changed_faculty=(), changed_rooms=()):
+    """
+    Split the previous timetable into entries that can stay pinned and the
+    (course, section) pairs that must be re-solved.
+
+    Seeds are the explicitly changed courses/faculty/rooms plus every pair
+    whose existing entries no longer fit the inputs (deleted rows, faculty
+    reassigned or now unavailable, wrong hour count, clashes). The released
+    neighbourhood is every pair sharing a section, faculty or room with a seed.
+    """
+    index = TimetableModelBuilder(data)
+    index.build_indexes()
+
+    expected = {(c["course_id"], s["id"]) for c in data["courses"] for s in index.sections_for(c)}
+    by_owner = defaultdict(list)
+    seeds = set()
+
+    for e in previous:
+        owner = (e["course_id"], e["section_id"])
+        course = index.courses.get(e["course_id"])
+        valid = (
+            course is not None
+            and owner in expected
+            and e["slot"] is not None
+            and e["room_id"] in index.rooms
+            and e["faculty_id"] == course["faculty_id"]
+            and e["slot"] in index.candidate_slots(course)
+        )
+        if not valid:
+            seeds.add(owner)
+        by_owner[owner].append(e)
+
+    for owner in expected:
+        if len(by_owner.get(owner, [])) != max(index.courses[owner[0]]["hours_per_week"], 0):
+            seeds.add(owner)
+
+    for cell in (lambda e: (e["slot"], e["room_id"]),
+                 lambda e: (e["slot"], e["faculty_id"]),
+                 lambda e: (e["slot"], e["section_id"])):
+        holders = defaultdict(list)
+        for e in previous:
+            if e["slot"] is not None and cell(e)[1] is not None:
+                holders[cell(e)].append((e["course_id"], e["section_id"]))
+        for owners in holders.values():
+            if len(owners) > 1:
+                seeds.update(owners)
+
+    changed_courses, changed_faculty, changed_rooms = set(changed_courses), set(changed_faculty), set(changed_rooms)
+    for owner in expected:
+        course = index.courses[owner[0]]
+        if owner[0] in changed_courses or course["faculty_id"] in changed_faculty:
+            seeds.add(owner)
+    for e in previous:
+        if e["room_id"] in changed_rooms:
+            seeds.add((e["course_id"], e["section_id"]))
+
+    sections = {sid for _, sid in seeds}
+    faculty = {index.courses[cid]["faculty_id"] for cid, _ in seeds if cid in index.courses} - {None}
+    rooms = {e["room_id"] for owner in seeds for e in by_owner.get(owner, [])} | changed_rooms
+
+    released = set(seeds)
+    for owner in expected:
+        if owner[1] in sections or index.courses[owner[0]]["faculty_id"] in faculty:
+            released.add(owner)
+    for owner, entries in by_owner.items():
+        if any(e["room_id"] in rooms for e in entries):
+            released.add(owner)
+
+    pinned = [e for owner, entries in by_owner.items() if owner not in released for e in entries]
+    hints = [e for owner, entries in by_owner.items() if owner in released and owner in expected
+             for e in entries if e["slot"] is not None and e["room_id"] in index.rooms]
+    return pinned, hints, released & expected
+
+
+def solve_incremental(data, changed_courses=(), changed_faculty=(), changed_rooms=(),
+                      time_limit=DEFAULT_TIME_LIMIT, progress=None, solver_params=None):
+    """
+    Repair the current timetable instead of solving from scratch. Entries
+    outside the affected neighbourhood are pinned, the rest is re-solved
+    with the previous assignments as hints. If the neighbourhood cannot be
+    repaired the whole model is solved, still warm-started from the old
+    timetable.
+    """
+    previous = data.get("timetable", [])
+    pinned, hints, released = find_neighbourhood(data, previous, changed_courses, changed_faculty, changed_rooms)
+
+    builder = TimetableModelBuilder(data).pin(pinned)
+    solver, status, stats = _build_and_solve(builder, "incremental", time_limit, progress, hints=hints,
+                                             solver_params=solver_params)
+    stats.update({"pinned_entries": len(pinned), "released_classes": len(released), "fallback": False})
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) and not (progress and progress.cancelled):
+        builder = TimetableModelBuilder(data)
+        all_hints = [e for e in previous if e["slot"] is not None]
+        solver, status, full_stats = _build_and_solve(builder, "incremental", time_limit, progress,
+                                                      hints=all_hints, solver_params=solver_params)
+        full_stats.update({"pinned_entries": 0, "released_classes": len(released), "fallback": True})
+        stats = full_stats
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _result(solver.StatusName(status), [], stats)
+
+    entries = builder.extract(solver)
+    before = {builder.entry_key(e) for e in previous if e["slot"] is not None}
+    stats["moved_entries"] = sum(1 for e in entries if builder.entry_key(e) not in before)
+    return _result(solver.StatusName(status), entries, stats)
+
+
+# --- DECOMPOSED ENGINE ---
+
+def find_components(data):
+    """
+    Group departments that have to be solved together. Sections only meet
+    through faculty and rooms, so departments are coupled when a faculty
+    member teaches in both or a fixed class pins the same room.
+    Returns a list of sorted dept_id lists.
+    """
+    parent = {}
+
+    def find(d):
+        parent.setdefault(d, d)
+        while parent[d] != d:
+            parent[d] = parent[parent[d]]
+            d = parent[d]
+        return d
+
+    def union(depts):
+        depts = [find(d) for d in depts]
+        for d in depts[1:]:
+            parent[d] = depts[0]
+
+    by_faculty, by_fixed_room = defaultdict(set), defaultdict(set)
+    for c in data["courses"]:
+        find(c["dept_id"])
+        if c["faculty_id"] is not None:
+            by_faculty[c["faculty_id"]].add(c["dept_id"])
+        if c["is_fixed"] and c["fixed_room_id"]:
+            by_fixed_room[c["fixed_room_id"]].add(c["dept_id"])
+    for depts in list(by_faculty.values()) + list(by_fixed_room.values()):
+        union(sorted(depts, key=str))
+
+    groups = defaultdict(list)
+    for d in parent:
+        groups[find(d)].append(d)
+    return sorted((sorted(g, key=str) for g in groups.values()), key=lambda g: str(g[0]))
+
+
+def reserve_rooms(data, components):
+    """
+    Split the rooms between components so they can be solved without seeing
+    each other. Fixed rooms go to their owner; the rest are handed out per
+    room kind (lab/lecture) in proportion to the class-hours each component
+    needs, largest rooms first. Returns one list of room ids per component.
+    """
+    component_of = {d: i for i, depts in enumerate(components) for d in depts}
+    section_counts = defaultdict(int)
+    for s in data["sections"]:
+        section_counts[(s["year"], s["dept_id"])] += 1
+
+    demand = defaultdict(lambda: [0] * len(components))
+    for c in data["courses"]:
+        hours = c["hours_per_week"] * section_counts[(c["year"], c["dept_id"])]
+        demand[is_lab_course(c)][component_of[c["dept_id"]]] += hours
+
+    reserved = [[] for _ in components]
+    fixed = {}
+    for c in data["courses"]:
+        if c["is_fixed"] and c["fixed_room_id"]:
+            fixed[c["fixed_room_id"]] = component_of[c["dept_id"]]
+
+    for room in sorted(data["rooms"], key=lambda r: -(r["capacity"] or 0)):
+        if room["room_id"] in fixed:
+            reserved[fixed[room["room_id"]]].append(room["room_id"])
+            continue
+        wanted = demand[is_lab_room(room)]
+        if not any(wanted):
+            wanted = [a + b for a, b in zip(demand[True], demand[False])]
+        # D'Hondt: next room goes to the highest demand per room already held
+        i = max(range(len(components)), key=lambda k: (wanted[k] / (len(reserved[k]) + 1), -k))
+        reserved[i].append(room["room_id"])
+    return reserved
+
+
+def split_by_component(data, components):
+    """Cut a snapshot into one self-contained snapshot per component."""
+    rooms = reserve_rooms(data, components)
+    parts = []
+    for depts, room_ids in zip(components, rooms):
+        depts, room_ids = set(depts), set(room_ids)
+        courses = [c for c in data["courses"] if c["dept_id"] in depts]
+        faculty_ids = {c["faculty_id"] for c in courses}
+        part = dict(
+            data,
+            courses=courses,
+            sections=[s for s in data["sections"] if s["dept_id"] in depts],
+            rooms=[r for r in data["rooms"] if r["room_id"] in room_ids],
+            faculty=[f for f in data["faculty"] if f["faculty_id"] in faculty_ids],
+            unavailability=[u for u in data["unavailability"] if u["faculty_id"] in faculty_ids]
+        )
+        if "timetable" in data:
+            course_ids = {c["course_id"] for c in courses}
+            part["timetable"] = [e for e in data["timetable"]
+                                 if e["course_id"] in course_ids and e["room_id"] in room_ids]
+        parts.append((sorted(depts, key=str), part))
+    return parts
+
+
+def _solve_component(part, inner, time_limit, solver_params=None):
+    """Process pool entry point: solve one component and time it."""
+    started = time.perf_counter()
+    result = run_engine(part, engine=inner, time_limit=time_limit, solver_params=solver_params)
+    result["stats"]["wall_time"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def solve_decomposed(data, inner="two_phase", time_limit=DEFAULT_TIME_LIMIT, max_workers=None,
+                     progress=None, solver_params=None):
+    """
+    Solve independent departments concurrently in a process pool with the
+    inner engine, each on its reserved share of the rooms. Classes of
+    components that come back infeasible are then solved jointly over the
+    whole college with the successful components pinned, and as a last
+    resort the inner engine solves everything at once. The profile's
+    num_workers is shared out between the components solving at once.
+    """
+    if inner not in ENGINES or inner in ("decomposed", "incremental"):
+        raise ValueError(f"Unsupported inner engine '{inner}'")
+
+    components = find_components(data)
+    parts = split_by_component(data, components)
+    if progress is not None:
+        progress.set_phase("solving", components=len(parts), components_done=0)
+
+    results = [None] * len(parts)
+    started = time.perf_counter()
+    if len(parts) == 1 or max_workers == 1:
+        for i, (_, part) in enumerate(parts):
+            if progress is not None and progress.cancelled:
+                break
+            results[i] = _solve_component(part, inner, time_limit, solver_params)
+            if progress is not None:
+                progress.set_phase("solving", components_done=i + 1)
+    else:
+        pool_size = min(max_workers or os.cpu_count() or 1, len(parts))
+        component_params = solver_params
+        if solver_params and solver_params.get("num_workers"):
+            component_params = dict(solver_params, num_workers=max(1, solver_params["num_workers"] // pool_size))
+        pool = ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context("spawn"))
+        futures = {}
+        try:
+            futures = {pool.submit(_solve_component, part, inner, time_limit, component_params): i
+                       for i, (_, part) in enumerate(parts)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress is not None:
+                    progress.set_phase("solving", components_done=done)
+                    if progress.cancelled:
+                        break
+        finally:
+            # With every sub-solve done, waiting only reaps the workers, which
+            # counts their peak memory towards this run's telemetry
+            pool.shutdown(wait=all(future.done() for future in futures), cancel_futures=True)
+    parallel_time = time.perf_counter() - started
+
+    component_stats = []
+    constraints = defaultdict(int)
+    for (depts, part), result in zip(parts, results):
+        stats = result["stats"] if result else {}
+        for family, count in stats.get("constraints", {}).items():
+            constraints[family] += count
+        component_stats.append({
+            "departments": depts,
+            "courses": len(part["courses"]),
+            "sections": len(part["sections"]),
+            "rooms": len(part["rooms"]),
+            "variables": stats.get("variables", 0),
+            "constraints": sum(stats.get("constraints", {}).values()),
+            "build_time": stats.get("build_time"),
+            "solve_time": stats.get("solve_time"),
+            "wall_time": stats.get("wall_time"),
+            "search": stats.get("search"),
+            "status": result["status"] if result else "CANCELLED"
+        })
+    stats = {
+        "engine": "decomposed",
+        "inner_engine": inner,
+        "components": component_stats,
+        "slowest_component": max(component_stats, key=lambda c: c["wall_time"] or 0)["departments"],
+        "parallel_time": round(parallel_time, 3),
+        "variables": sum(c["variables"] for c in component_stats),
+        "constraints": dict(constraints),
+        # Model building happens inside the component processes; solve_time is
+        # the wall time of the whole parallel phase
+        "build_time": round(sum(c["build_time"] or 0 for c in component_stats), 3),
+        "solve_time": round(parallel_time, 3),
+        "solver_params": solver_params,
+        "fallback": None
+    }
+    if progress is not None and progress.cancelled:
+        return _result("UNKNOWN", [], stats)
+
+    solved = [r for r in results if r["feasible"]]
+    entries = [e for r in solved for e in r["entries"]]
+    if len(solved) == len(results):
+        stats["status"] = "FEASIBLE" if any(r["status"] == "FEASIBLE" for r in results) else "OPTIMAL"
+        objectives = [r["stats"].get("objective") for r in results]
+        if objectives and None not in objectives:
+            # Components share no section, faculty member or room, so their penalties add up
+            stats["objective"] = sum(objectives)
+        return _result(stats["status"], entries, stats)
+
+    # Some component did not fit its reserved rooms: re-solve the failed
+    # departments against the whole college around the pinned ones
+    builder = TimetableModelBuilder(data).pin(entries)
+    solver, status, joint_stats = _build_and_solve(builder, "decomposed", time_limit, progress,
+                                                   solver_params=solver_params)
+    stats.update(fallback="joint", joint=joint_stats, variables=joint_stats["variables"])
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        stats["status"] = solver.StatusName(status)
+        stats["objective"] = joint_stats.get("objective")
+        return _result(stats["status"], builder.extract(solver), stats)
+    if progress is not None and progress.cancelled:
+        return _result(solver.StatusName(status), [], stats)
+
+    result = run_engine(data, engine=inner, time_limit=time_limit, progress=progress, solver_params=solver_params)
+    stats.update(fallback="full", full=result["stats"], status=result["status"],
+                 objective=result["stats"].get("objective"))
+    return _result(result["status"], result["entries"], stats)
+
+
+# --- INTERVAL ENGINE ---
+
+def solve_interval(data, time_limit=DEFAULT_TIME_LIMIT, progress=None, solver_params=None):
+    """
+    One interval per session (services/scheduler_intervals.py): labs are
+    taught in contiguous 2-3 hour blocks, lectures hour by hour. Session
+    times are solved against per-room-set capacity, then rooms with the
+    times fixed. If no room assignment fits those times, times and rooms
+    are solved together, hinted with the times found.
+    """
+    builder = IntervalModelBuilder(data, assign_rooms=False)
+    solver, status, stats = _build_and_solve(builder, "interval", time_limit, progress,
+                                             solver_params=solver_params)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _result(solver.StatusName(status), [], stats)
+    starts = builder.extract(solver)
+
+    if progress is not None:
+        progress.set_phase("assigning_rooms")
+    rooms = IntervalModelBuilder(data).fix_starts(starts)
+    rooms.use_objective = False
+    room_solver, room_status, room_stats = _build_and_solve(rooms, "interval", FALLBACK_TIME_LIMIT,
+                                                            solver_params=solver_params)
+    stats["room_assignment_time"] = round(room_stats["build_time"] + room_stats["solve_time"], 3)
+    stats["room_step"] = {"variables": room_stats["variables"], "constraints": room_stats["constraints"],
+                          "search": room_stats["search"]}
+    if room_status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _result(solver.StatusName(status), rooms.extract(room_solver), stats)
+    if progress is not None and progress.cancelled:
+        return _result(room_solver.StatusName(room_status), [], stats)
+
+    joint = IntervalModelBuilder(data)
+    hints = [{"course_id": course_id, "section_id": section_id, "slot": slot, "room_id": None}
+             for (course_id, section_id, index), start in starts.items()
+             for slot in range(start, start + builder.session_length[(course_id, section_id, index)])]
+    joint_solver, joint_status, joint_stats = _build_and_solve(joint, "interval", time_limit, progress,
+                                                               hints=hints, solver_params=solver_params)
+    stats.update(fallback="joint", joint=joint_stats, status=joint_stats["status"],
+                 objective=joint_stats.get("objective"))
+    entries = joint.extract(joint_solver) if joint_status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else []
+    return _result(joint_solver.StatusName(joint_status), entries, stats)
+
+
+ENGINES = {
+    "monolithic": solve_monolithic,
+    "two_phase": solve_two_phase,
+    "incremental": solve_incremental,
+    "decomposed": solve_decomposed,
+    "interval": solve_interval
+}
+
+# Engines that read the current Timetable from the snapshot
+ENGINES_USING_TIMETABLE = {"incremental"}
+
+
+def run_engine(data, engine="monolithic", **options):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    return ENGINES[engine](data, **options)
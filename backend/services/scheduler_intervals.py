@@ -0,0 +1,300 @@
+"""
+Interval model for timetable generation.
+
+The slot models give every class-hour its own variable, so a lab taught
+as one contiguous block would need implications between neighbouring
+hours. Here every session is one interval instead: lectures are sessions
+of one hour, and a lab's weekly hours are split into blocks of 2-3 hours
+(lab_blocks()). A session's start domain keeps the block inside one day
+and clear of its faculty's unavailable hours, and NoOverlap constraints
+keep each faculty member's and section's sessions apart.
+
+Rooms are chosen through optional intervals, one per candidate room class,
+with NoOverlap (or a cumulative limited by the class size) per class. The
+interval engine solves in two steps, like the two-phase engine: times
+first, with a cumulative per candidate room set standing in for the rooms,
+then the room choice with every start fixed.
+"""
+
+from collections import defaultdict
+from ortools.sat.python import cp_model
+
+from services.scheduler_model import TimetableModelBuilder, DEFAULT_MAX_HOURS_PER_DAY, is_lab_course
+from services.scheduler_objective import add_session_objective
+from utils.slot_grid import slot_day
+
+
+def lab_blocks(hours):
+    """Split a lab's weekly hours into contiguous blocks of 2 (and one of 3 if odd)."""
+    if hours < 2:
+        return [hours] if hours > 0 else []
+    blocks = [2] * (hours // 2)
+    if hours % 2:
+        blocks[-1] = 3
+    return blocks
+
+
+class IntervalModelBuilder(TimetableModelBuilder):
+    """
+    Builds the interval model from a load_scheduler_input() snapshot.
+
+    Sessions are keyed (course_id, section_id, index). Each has a start
+    variable and a mandatory interval, plus a day literal per possible day
+    for the daily limits. With assign_rooms it also gets an optional
+    interval and a presence literal per candidate room class; without, it
+    only counts towards the capacity of its candidate room set and
+    extract() returns sessions instead of hourly entries.
+
+    There is no variable per start or per hour: the objective works from the
+    start and day variables (add_session_objective()). Fixed courses pin
+    their first session to the fixed slot and room; pinning whole entries
+    (pin()) is not supported.
+    """
+
+    break_symmetry = False
+
+    def __init__(self, data, time_slots=None, assign_rooms=True):
+        super().__init__(data, time_slots)
+        self.assign_rooms = assign_rooms
+        self.slot_set = set(self.time_slots)
+        self.sessions = []
+        self.session_length = {}
+        self.session_starts = {}
+        self.fixed_sessions = set()
+        self.start_vars = {}
+        self.room_choices = defaultdict(dict)
+        self.intervals_by_faculty = defaultdict(list)
+        self.intervals_by_section = defaultdict(list)
+        self.intervals_by_room = defaultdict(list)
+        self.intervals_by_room_set = defaultdict(list)
+        self.load_by_section_day = defaultdict(list)
+
+    def pin(self, entries):
+        raise ValueError("The interval model cannot pin existing entries")
+
+    def fix_starts(self, starts):
+        """Solve only the rooms: {session: start} from an earlier solve. Call before build()."""
+        self.session_starts = dict(starts)
+        return self
+
+    def session_lengths(self, course):
+        hours = max(course["hours_per_week"], 0)
+        return lab_blocks(hours) if is_lab_course(course) else [1] * hours
+
+    def candidate_starts(self, course, length):
+        """Starts whose whole block lies in the grid on one day and avoids unavailable hours."""
+        unavailable = self.unavailable_by_faculty.get(course["faculty_id"], set())
+        return [slot for slot in self.time_slots
+                if all(s in self.slot_set and s not in unavailable and slot_day(s) == slot_day(slot)
+                       for s in range(slot, slot + length))]
+
+    # --- DECISION VARIABLES ---
+
+    def add_session(self, course, section, index, length, starts, rooms):
+        course_id, section_id, faculty_id = course["course_id"], section["id"], course["faculty_id"]
+        session = (course_id, section_id, index)
+        name = f"course_{course_id}_section_{section_id}_{index}"
+
+        domain = cp_model.Domain.FromValues(starts) if starts else cp_model.Domain(0, 0)
+        start = self.model.NewIntVarFromDomain(domain, f"{name}_start")
+        self.start_vars[session] = start
+
+        # The day the session falls on, for the daily limits
+        starts_by_day = defaultdict(list)
+        for slot in starts:
+            starts_by_day[self.slot_days[slot]].append(slot)
+        days = {}
+        for day, day_starts in starts_by_day.items():
+            days[day] = self.model.NewBoolVar(f"{name}_day_{day}")
+            self.model.AddLinearExpressionInDomain(
+                start, cp_model.Domain.FromValues(day_starts)).OnlyEnforceIf(days[day])
+            self.load_by_section_day[(section_id, day)].append((days[day], length))
+        # Exactly one day; a session without any start cannot be placed
+        self.add_constraint("hours", self.model.AddExactlyOne(days.values()))
+
+        interval = self.model.NewFixedSizeIntervalVar(start, length, f"{name}_interval")
+        self.intervals_by_section[section_id].append(interval)
+        if faculty_id in self.faculty:
+            self.intervals_by_faculty[faculty_id].append(interval)
+
+        if self.assign_rooms:
+            for room_id in rooms:
+                present = self.model.NewBoolVar(f"{name}_in_{self.rooms[room_id]['name']}")
+                self.room_choices[session][room_id] = present
+                self.intervals_by_room[room_id].append(
+                    self.model.NewOptionalFixedSizeIntervalVar(start, length, present, f"{name}_room_{room_id}"))
+            self.add_constraint("room_choice", self.model.AddExactlyOne(self.room_choices[session].values()))
+        else:
+            room_set = frozenset(r for room_id in rooms for r in self.room_class_members.get(room_id, [room_id]))
+            self.intervals_by_room_set[room_set].append(interval)
+
+        self.sessions.append({"session": session, "length": length, "starts": starts, "days": days})
+        self.session_length[session] = length
+
+    def build_variables(self):
+        self.symmetry["room_classes"] = sum(1 for members in self.room_class_members.values() if len(members) > 1)
+        for c in self.data["courses"]:
+            lengths = self.session_lengths(c)
+            starts = {length: self.candidate_starts(c, length) for length in set(lengths)}
+            for section in self.sections_for(c):
+                owner = (c["course_id"], section["id"])
+                self.vars_by_course_section.setdefault(owner, [])
+                rooms = list(dict.fromkeys(self.room_class_of[r] for r in self.candidate_rooms(c, section)))
+                fixed = self.fixed_cells.get(owner, [])
+                for index, length in enumerate(lengths):
+                    session = (c["course_id"], section["id"], index)
+                    session_starts, session_rooms = starts[length], rooms
+                    if index == 0 and fixed:
+                        slot, room_id = fixed[0]
+                        if all(s in self.slot_set and slot_day(s) == slot_day(slot)
+                               for s in range(slot, slot + length)):
+                            session_starts, session_rooms = [slot], [self.room_class_of[room_id]]
+                            self.fixed_sessions.add(session)
+                        else:
+                            self.warnings.append(f"Fixed slot of course {c['course_id']} cannot hold "
+                                                 f"a {length}-hour block; left unfixed.")
+                    if session in self.session_starts:
+                        session_starts = [self.session_starts[session]]
+                    # What the slot model would create for these hours
+                    self.candidate_count += length * len(self.time_slots) * len(self.rooms)
+                    self.add_session(c, section, index, length, session_starts, session_rooms)
+
+    # --- CONSTRAINTS ---
+
+    def add_fixed_constraints(self):
+        # Fixed sessions get a single start and room when they are created
+        pass
+
+    def add_hours_constraints(self):
+        # Each session has exactly one start (see add_session), and same-length
+        # sessions of a class are interchangeable, so keep them in start order
+        by_owner = defaultdict(list)
+        for s in self.sessions:
+            if s["session"] in self.fixed_sessions or s["session"] in self.session_starts:
+                continue
+            course_id, section_id, _ = s["session"]
+            by_owner[(course_id, section_id, s["length"])].append(self.start_vars[s["session"]])
+        for starts in by_owner.values():
+            for before, after in zip(starts, starts[1:]):
+                self.add_constraint("session_order", self.model.Add(before < after))
+
+    def add_room_constraints(self):
+        # Constraint 2: Room conflicts, counting a room class as that many rooms
+        for room_id, intervals in self.intervals_by_room.items():
+            capacity = len(self.room_class_members.get(room_id, [room_id]))
+            if len(intervals) <= capacity:
+                continue
+            if capacity == 1:
+                self.add_constraint("room", self.model.AddNoOverlap(intervals))
+            else:
+                self.add_constraint("room", self.model.AddCumulative(intervals, [1] * len(intervals), capacity))
+
+        # Without room choice: sessions that can only use rooms of a candidate
+        # set never outnumber its rooms at any time
+        for bound in self.intervals_by_room_set:
+            intervals = [interval for rooms, group in self.intervals_by_room_set.items() if rooms <= bound
+                         for interval in group]
+            if len(intervals) > len(bound):
+                self.add_constraint("room_capacity", self.model.AddCumulative(
+                    intervals, [1] * len(intervals), len(bound)))
+
+    def add_faculty_constraints(self):
+        # Constraint 3: Faculty conflicts
+        for intervals in self.intervals_by_faculty.values():
+            if len(intervals) > 1:
+                self.add_constraint("faculty", self.model.AddNoOverlap(intervals))
+
+    def add_section_constraints(self):
+        # Constraint 4: Section conflicts
+        for intervals in self.intervals_by_section.values():
+            if len(intervals) > 1:
+                self.add_constraint("section", self.model.AddNoOverlap(intervals))
+
+    def add_daily_constraints(self):
+        # Constraint 5: Max hours per day for a section, a block counting its length
+        for (section_id, _day), load in self.load_by_section_day.items():
+            limit = self.sections[section_id]["max_hours_per_day"]
+            if limit is None:
+                limit = DEFAULT_MAX_HOURS_PER_DAY
+            if sum(length for _, length in load) > limit:
+                self.add_constraint("daily", self.model.Add(cp_model.LinearExpr.WeightedSum(
+                    [literal for literal, _ in load], [length for _, length in load]) <= limit))
+
+    def add_hints(self, entries):
+        """Hint the sessions onto an earlier timetable's hours where the blocks fit."""
+        hours = defaultdict(set)
+        rooms = {}
+        for e in entries:
+            hours[(e["course_id"], e["section_id"])].add(e["slot"])
+            rooms[(e["course_id"], e["section_id"], e["slot"])] = e["room_id"]
+        hinted = 0
+        for s in self.sessions:
+            course_id, section_id, _ = s["session"]
+            free = hours.get((course_id, section_id), set())
+            start = next((slot for slot in s["starts"]
+                          if all(h in free for h in range(slot, slot + s["length"]))), None)
+            if start is None:
+                continue
+            free.difference_update(range(start, start + s["length"]))
+            self.model.AddHint(self.start_vars[s["session"]], start)
+            self.model.AddHint(s["days"][self.slot_days[start]], 1)
+            room_id = rooms[(course_id, section_id, start)]
+            present = self.room_choices[s["session"]].get(self.room_class_of.get(room_id, room_id))
+            if present is not None:
+                self.model.AddHint(present, 1)
+            self.hinted_rooms[s["session"]] = room_id
+            hinted += s["length"]
+        return hinted
+
+    def add_soft_constraints(self, objective):
+        return add_session_objective(self, objective)
+
+    # --- OUTPUT ---
+
+    def extract(self, solver):
+        """
+        Without assign_rooms: {session: start}. Otherwise one entry per hour
+        of every session. Rooms of a class are handed out in start order,
+        each to a member free by then (the hinted one if possible), which
+        always succeeds because the class never holds more sessions than rooms.
+        """
+        if not self.assign_rooms:
+            return {s["session"]: solver.Value(self.start_vars[s["session"]]) for s in self.sessions}
+
+        chosen = defaultdict(list)
+        for s in self.sessions:
+            start = solver.Value(self.start_vars[s["session"]])
+            room_class = next(room_id for room_id, present in self.room_choices[s["session"]].items()
+                              if solver.Value(present))
+            chosen[room_class].append((start, s))
+
+        entries = []
+        for room_class, placed in chosen.items():
+            members = self.room_class_members.get(room_class, [room_class])
+            busy_until = {room_id: None for room_id in members}
+            for start, s in sorted(placed, key=lambda p: (p[0], p[1]["session"])):
+                free = [r for r in members if busy_until[r] is None or busy_until[r] <= start]
+                hinted = self.hinted_rooms.get(s["session"])
+                room_id = hinted if hinted in free else free[0]
+                busy_until[room_id] = start + s["length"]
+                course_id, section_id, _ = s["session"]
+                for slot in range(start, start + s["length"]):
+                    entries.append({
+                        "course_id": course_id,
+                        "section_id": section_id,
+                        "faculty_id": self.courses[course_id]["faculty_id"],
+                        "room_id": room_id,
+                        "slot": slot
+                    })
+        return entries
+
+    def stats(self):
+        stats = super().stats()
+        variables = len(self.model.Proto().variables)
+        stats.update({
+            "variables": variables,
+            "pruned_variables": self.candidate_count - variables,
+            "sessions": len(self.sessions),
+            "lab_blocks": sum(1 for s in self.sessions if s["length"] > 1)
+        })
+        return stats
@@ -0,0 +1,669 @@
+"""
+CP-SAT model builder for timetable generation.
+
+All solver inputs are loaded once into plain dicts, indexed in memory and
+every constraint family is emitted in a single pass over those indexes,
+so building the model issues a fixed number of queries regardless of the
+college size.
+"""
+
+import re
+from collections import defaultdict
+from ortools.sat.python import cp_model
+
+from utils.slot_grid import DEFAULT_GRID, SlotGrid, slot_day, slot_from_labels
+from services.scheduler_objective import add_objective, resolve_objective
+
+# Slots are integer ids from utils/slot_grid.py; this is the default grid's
+TIME_SLOTS = DEFAULT_GRID.slots
+
+DEFAULT_MAX_HOURS_PER_DAY = 5
+
+# Course.type keywords that mark lab sessions; as a whole word of Classroom.name
+# or a whole comma-separated Classroom.resources entry they mark lab rooms
+LAB_KEYWORDS = ("lab", "laboratory", "practical")
+
+
+def load_scheduler_input(college_id=None, include_timetable=False):
+    """
+    Snapshot everything the solver reads into plain, picklable dicts.
+    Issues one query per table. When college_id is given the rows are
+    filtered explicitly, otherwise the tenant query filter applies.
+    include_timetable adds the current Timetable rows (as solver slots)
+    for warm starts and incremental re-solves.
+
+    Times are integer slot ids; "grid" is the college's slot grid config
+    and "objective" its soft-constraint weights.
+    """
+    from sqlalchemy import func
+    from extensions import db
+    from models import College, Course, Faculty, Classroom, Section, FacultyUnavailability, User
+
+    def scoped(model):
+        query = model.query
+        if college_id is not None:
+            query = query.filter_by(college_id=college_id)
+        return query.all()
+
+    enrolment_query = db.session.query(User.section_id, func.count(User.id)).filter(
+        User.role == "student", User.section_id.isnot(None)
+    )
+    if college_id is not None:
+        enrolment_query = enrolment_query.filter(User.college_id == college_id)
+    enrolment = dict(enrolment_query.group_by(User.section_id).all())
+
+    courses = [{
+        "course_id": c.course_id,
+        "name": c.name,
+        "type": c.type,
+        "credits": c.credits,
+        "year": c.year,
+        "semester": c.semester,
+        "dept_id": c.dept_id,
+        "faculty_id": c.faculty_id,
+        "hours_per_week": c.hours_per_week or 0,
+        "is_fixed": bool(c.is_fixed),
+        "fixed_slot": slot_from_labels(c.fixed_day, c.fixed_slot) if c.is_fixed else None,
+        "fixed_room_id": c.fixed_room_id
+    } for c in scoped(Course)]
+
+    sections = [{
+        "id": s.id,
+        "name": s.name,
+        "year": s.year,
+        "dept_id": s.dept_id,
+        "max_hours_per_day": s.max_hours_per_day,
+        "student_count": enrolment.get(s.id, 0)
+    } for s in scoped(Section)]
+
+    rooms = [{
+        "room_id": r.room_id,
+        "name": r.name,
+        "capacity": r.capacity,
+        "resources": r.resources
+    } for r in scoped(Classroom)]
+
+    faculty = [{
+        "faculty_id": f.faculty_id,
+        "faculty_name": f.faculty_name,
+        "email": f.email
+    } for f in scoped(Faculty)]
+
+    unavailability = [{
+        "faculty_id": u.faculty_id,
+        "slot": u.slot if u.slot is not None else slot_from_labels(u.day, u.start_time)
+    } for u in scoped(FacultyUnavailability)]
+
+    college = db.session.get(College, college_id) if college_id is not None else None
+
+    data = {
+        "college_id": college_id,
+        "grid": SlotGrid.from_config(college.slot_grid if college else None).to_config(),
+        "objective": resolve_objective(college.objective_weights if college else None),
+        "courses": courses,
+        "sections": sections,
+        "rooms": rooms,
+        "faculty": faculty,
+        "unavailability": unavailability
+    }
+    if include_timetable:
+        data["timetable"] = load_timetable_entries(college_id)
+    return data
+
+
+def load_timetable_entries(college_id=None):
+    """Rows of the active timetable version as solver entries."""
+    from services.timetable_versions import active_timetable_query
+
+    return [{
+        "timetable_id": t.timetable_id,
+        "course_id": t.course_id,
+        "section_id": t.section_id,
+        "faculty_id": t.faculty_id,
+        "room_id": t.room_id,
+        "slot": t.slot if t.slot is not None else slot_from_labels(t.day, t.start_time)
+    } for t in active_timetable_query(college_id).all()]
+
+
+def is_lab_course(course):
+    course_type = (course.get("type") or "").lower()
+    return any(keyword in course_type for keyword in LAB_KEYWORDS)
+
+
+def is_lab_room(room):
+    words = re.findall(r"[a-z]+", (room.get("name") or "").lower())
+    resources = [token.strip() for token in (room.get("resources") or "").lower().split(",")]
+    return any(keyword in words or keyword in resources for keyword in LAB_KEYWORDS)
+
+
+def suitable_rooms(rooms, lab_rooms, enrolment, lab, warnings=None):
+    """
+    Ids of the rooms (room_id -> room dict) that seat enrolment students,
+    only lab rooms for a lab course. Falls back to capacity only, then to
+    every room, noting each fallback in warnings.
+    """
+    warnings = [] if warnings is None else warnings
+    fitting = [room_id for room_id, r in rooms.items() if (r["capacity"] or 0) >= enrolment]
+    if not fitting:
+        warnings.append(f"No room can seat {enrolment} students; capacity ignored.")
+        fitting = list(rooms)
+    if not lab:
+        return fitting
+    matching = [room_id for room_id in fitting if room_id in lab_rooms]
+    if not matching:
+        warnings.append(f"No lab room seats {enrolment} students; room type ignored.")
+        matching = fitting
+    return matching
+
+
+class TimetableModelBuilder:
+    """
+    Builds the timetable CP-SAT model from a load_scheduler_input() snapshot.
+
+    Decision variables live in a flat dict keyed by
+    (course_id, section_id, slot, room_id) and are indexed by slot/room,
+    slot/faculty, slot/section and section/day while they are created.
+
+    Combinations that can never be part of a solution are pruned before a
+    BoolVar is created: faculty-unavailable slots, rooms too small for the
+    section, lab courses outside lab rooms and cells taken by fixed classes.
+    A snapshot may also carry "room_unavailability" ({"room_id", "slot"}
+    rows, as timetable repairs do) to keep rooms out of some slots.
+
+    Interchangeable rooms share one variable per room class, limited by the
+    class size and expanded to concrete rooms by extract(). With
+    break_symmetry set, interchangeable sections are also ordered, so the
+    search does not revisit relabelled copies of the same timetable.
+    """
+
+    break_symmetry = True
+    # Minimise the snapshot's soft constraints (data["objective"]) if present
+    use_objective = True
+
+    def __init__(self, data, time_slots=None):
+        self.data = data
+        self.time_slots = list(time_slots or SlotGrid.from_config(data.get("grid")).slots)
+        self.slot_days = {slot: slot_day(slot) for slot in self.time_slots}
+        self.model = cp_model.CpModel()
+
+        self.courses = {c["course_id"]: c for c in data["courses"]}
+        self.sections = {s["id"]: s for s in data["sections"]}
+        self.rooms = {r["room_id"]: r for r in data["rooms"]}
+        self.faculty = {f["faculty_id"]: f for f in data["faculty"]}
+
+        self.sections_by_group = defaultdict(list)
+        self.courses_by_faculty = defaultdict(list)
+        self.unavailable_by_faculty = defaultdict(set)
+        self.unavailable_by_room = defaultdict(set)
+        self.lab_rooms = set()
+
+        # Fixed classes: (course_id, section_id) -> [(slot, room_id)], plus the
+        # room/faculty/section cells they occupy mapped back to their owner.
+        # Locked owners keep exactly their fixed cells and get no other variable.
+        self.fixed_cells = {}
+        self.locked_owners = set()
+        # Hours per (course_id, section_id) instead of the courses' hours_per_week
+        self.required_hours = None
+        self.pinned_entries = []
+        self.kept_entries = []
+        self.fixed_by_slot_room = {}
+        self.fixed_by_slot_faculty = {}
+        self.fixed_by_slot_section = {}
+
+        self.candidate_count = 0
+        self.warnings = []
+        self._room_candidates = {}
+        self.room_class_of = {}
+        self.room_class_members = {}
+        self.hinted_rooms = {}
+
+        self.assignments = {}
+        self.vars_by_course_section = defaultdict(list)
+        self.vars_by_slot_room = defaultdict(list)
+        self.vars_by_slot_faculty = defaultdict(list)
+        self.vars_by_slot_section = defaultdict(list)
+        self.vars_by_section_day = defaultdict(list)
+
+        self.constraint_counts = defaultdict(int)
+        self.symmetry = {"room_classes": 0, "section_classes": 0}
+        self.objective_terms = {}
+
+    # --- INDEXES ---
+
+    def build_indexes(self):
+        for s in self.data["sections"]:
+            self.sections_by_group[(s["year"], s["dept_id"])].append(s)
+        for c in self.data["courses"]:
+            if c["faculty_id"] in self.faculty:
+                self.courses_by_faculty[c["faculty_id"]].append(c)
+        for u in self.data["unavailability"]:
+            self.unavailable_by_faculty[u["faculty_id"]].add(u["slot"])
+        for u in self.data.get("room_unavailability", []):
+            self.unavailable_by_room[u["room_id"]].add(u["slot"])
+        self.lab_rooms = {room_id for room_id, r in self.rooms.items() if is_lab_room(r)}
+
+        for c in self.data["courses"]:
+            if not (c["is_fixed"] and c["fixed_slot"] is not None and c["fixed_room_id"]):
+                continue
+            slot = c["fixed_slot"]
+            if slot not in self.slot_days or c["fixed_room_id"] not in self.rooms:
+                continue
+            for section in self.sections_for(c):
+                self.add_fixed_cell((c["course_id"], section["id"]), slot, c["fixed_room_id"])
+
+        for e in self.pinned_entries:
+            owner = (e["course_id"], e["section_id"])
+            self.locked_owners.add(owner)
+            self.add_fixed_cell(owner, e["slot"], e["room_id"])
+        for e in self.kept_entries:
+            self.add_fixed_cell((e["course_id"], e["section_id"]), e["slot"], e["room_id"])
+
+        self.build_room_classes()
+
+    def add_fixed_cell(self, owner, slot, room_id):
+        cells = self.fixed_cells.setdefault(owner, [])
+        if (slot, room_id) in cells:
+            return
+        cells.append((slot, room_id))
+        faculty_id = self.courses[owner[0]]["faculty_id"]
+        self.fixed_by_slot_room.setdefault((slot, room_id), owner)
+        self.fixed_by_slot_section.setdefault((slot, owner[1]), owner)
+        if faculty_id in self.faculty:
+            self.fixed_by_slot_faculty.setdefault((slot, faculty_id), owner)
+
+    def pin(self, entries):
+        """
+        Lock existing entries in place. Must be called before build(); each
+        pinned (course, section) keeps exactly these cells and nothing else.
+        """
+        self.pinned_entries = list(entries)
+        return self
+
+    def keep(self, entries):
+        """
+        Keep entries in place while the other hours of their (course,
+        section) stay free. Must be called before build().
+        """
+        self.kept_entries = list(entries)
+        return self
+
+    def sections_for(self, course):
+        return self.sections_by_group.get((course["year"], course["dept_id"]), [])
+
+    # --- PRUNING ---
+
+    def candidate_slots(self, course):
+        """Slots the course's faculty is available for."""
+        unavailable = self.unavailable_by_faculty.get(course["faculty_id"])
+        if not unavailable:
+            return self.time_slots
+        return [slot for slot in self.time_slots if slot not in unavailable]
+
+    def candidate_rooms(self, course, section):
+        """
+        Rooms large enough for the section, and lab rooms only for a lab
+        course. Lectures may use any room, so tagging rooms as labs never
+        turns a previously solvable input infeasible; a lab course falls
+        back to capacity only, then to every room.
+        """
+        enrolment = section.get("student_count") or 0
+        lab = is_lab_course(course)
+        cache_key = (enrolment, lab)
+        if cache_key not in self._room_candidates:
+            self._room_candidates[cache_key] = suitable_rooms(self.rooms, self.lab_rooms, enrolment, lab,
+                                                              self.warnings)
+        return self._room_candidates[cache_key]
+
+    def is_blocked(self, owner, slot, faculty_id, section_id):
+        """True if a different fixed class already holds this faculty or section slot."""
+        holder = self.fixed_by_slot_section.get((slot, section_id))
+        if holder is not None and holder != owner:
+            return True
+        holder = self.fixed_by_slot_faculty.get((slot, faculty_id))
+        return holder is not None and holder != owner
+
+    # --- DECISION VARIABLES ---
+
+    def add_variable(self, course, section, slot, room_id):
+        course_id, section_id, faculty_id = course["course_id"], section["id"], course["faculty_id"]
+        var = self.model.NewBoolVar(
+            f"course_{course_id}_section_{section_id}_{slot}_{self.rooms[room_id]['name']}"
+        )
+        self.assignments[(course_id, section_id, slot, room_id)] = var
+        self.vars_by_course_section[(course_id, section_id)].append(var)
+        self.vars_by_slot_room[(slot, room_id)].append(var)
+        self.vars_by_slot_section[(slot, section_id)].append(var)
+        self.vars_by_section_day[(section_id, self.slot_days[slot])].append(var)
+        if faculty_id in self.faculty:
+            self.vars_by_slot_faculty[(slot, faculty_id)].append(var)
+        return var
+
+    def build_variables(self):
+        room_count = len(self.rooms)
+        self.symmetry["room_classes"] = sum(1 for members in self.room_class_members.values() if len(members) > 1)
+        for c in self.data["courses"]:
+            slots = self.candidate_slots(c)
+            for section in self.sections_for(c):
+                owner = (c["course_id"], section["id"])
+                self.candidate_count += len(self.time_slots) * room_count
+                # Register the pair even if no variable survives so the
+                # hours constraint can still flag it as infeasible.
+                self.vars_by_course_section.setdefault(owner, [])
+                # One variable per room class: its members are interchangeable
+                rooms = list(dict.fromkeys(self.room_class_of[r] for r in self.candidate_rooms(c, section)))
+                fixed = self.fixed_cells.get(owner, [])
+                fixed_slots = {slot for slot, _ in fixed}
+
+                if owner not in self.locked_owners:
+                    for slot in slots:
+                        if slot in fixed_slots or self.is_blocked(owner, slot, c["faculty_id"], section["id"]):
+                            continue
+                        for room_id in rooms:
+                            holder = self.fixed_by_slot_room.get((slot, room_id))
+                            if (holder is None or holder == owner) \
+                                    and slot not in self.unavailable_by_room.get(room_id, ()):
+                                self.add_variable(c, section, slot, room_id)
+
+                for slot, room_id in fixed:
+                    self.add_variable(c, section, slot, room_id)
+
+    # --- CONSTRAINTS ---
+
+    def add_constraint(self, family, constraint):
+        self.constraint_counts[family] += 1
+        return constraint
+
+    def add_fixed_constraints(self):
+        # Constraint 0: Pre-assign fixed classes. Faculty unavailability needs
+        # no constraint because those slots never get a variable.
+        for (course_id, section_id), cells in self.fixed_cells.items():
+            for slot, room_id in cells:
+                var = self.assignments[(course_id, section_id, slot, room_id)]
+                self.add_constraint("fixed", self.model.Add(var == 1))
+
+    def add_hints(self, entries):
+        """
+        Seed the search with a previous solution (CP-SAT AddHint). Entries
+        sharing a variable (a double booking, or rooms of one room class)
+        hint it once; CP-SAT rejects a hint with duplicate variables.
+        Returns the number of variables hinted.
+        """
+        hinted = set()
+        for e in entries:
+            key = self.entry_key(e)
+            var = self.assignments.get(key)
+            if var is None:
+                continue
+            self.hinted_rooms.setdefault(key, []).append(e["room_id"])
+            if key not in hinted:
+                self.model.AddHint(var, 1)
+                hinted.add(key)
+        return len(hinted)
+
+    def entry_key(self, entry):
+        room_id = entry["room_id"]
+        return (entry["course_id"], entry["section_id"], entry["slot"], self.room_class_of.get(room_id, room_id))
+
+    def add_hours_constraints(self):
+        # Constraint 1: Each course is scheduled for its required 'hours_per_week'
+        for owner, variables in self.vars_by_course_section.items():
+            if self.required_hours is not None:
+                hours = self.required_hours[owner]
+            else:
+                hours = max(self.courses[owner[0]]["hours_per_week"], 0)
+            self.add_constraint("hours", self.model.Add(cp_model.LinearExpr.Sum(variables) == hours))
+
+    def add_room_constraints(self):
+        # Constraint 2: Room conflicts (one class per room at any time, so
+        # at most as many classes as a room class has rooms)
+        for (_slot, room_id), variables in self.vars_by_slot_room.items():
+            capacity = len(self.room_class_members.get(room_id, [room_id]))
+            if len(variables) > capacity:
+                self.add_constraint("room", self.model.Add(cp_model.LinearExpr.Sum(variables) <= capacity))
+
+    def add_faculty_constraints(self):
+        # Constraint 3: Faculty conflicts (faculty teaches one class at a time)
+        for variables in self.vars_by_slot_faculty.values():
+            if len(variables) > 1:
+                self.add_constraint("faculty", self.model.Add(cp_model.LinearExpr.Sum(variables) <= 1))
+
+    def add_section_constraints(self):
+        # Constraint 4: Section conflicts (section attends one class at a time)
+        for variables in self.vars_by_slot_section.values():
+            if len(variables) > 1:
+                self.add_constraint("section", self.model.Add(cp_model.LinearExpr.Sum(variables) <= 1))
+
+    def add_daily_constraints(self):
+        # Constraint 5: Max classes per day for a section
+        for (section_id, _day), variables in self.vars_by_section_day.items():
+            limit = self.sections[section_id]["max_hours_per_day"]
+            if limit is None:
+                limit = DEFAULT_MAX_HOURS_PER_DAY
+            if len(variables) > limit:
+                self.add_constraint("daily", self.model.Add(cp_model.LinearExpr.Sum(variables) <= limit))
+
+    # --- SYMMETRY BREAKING ---
+
+    def build_room_classes(self):
+        """
+        Group interchangeable rooms: same capacity, resources and lab kind,
+        which is all candidate_rooms() looks at. Each class is represented by
+        its lowest room id; rooms a fixed class holds or that are unavailable
+        at times stay on their own because they are not interchangeable then.
+        """
+        held = {room_id for (_slot, room_id) in self.fixed_by_slot_room} | set(self.unavailable_by_room)
+        groups = defaultdict(list)
+        for room_id in sorted(self.rooms):
+            r = self.rooms[room_id]
+            if room_id in held:
+                groups[("held", room_id)].append(room_id)
+            else:
+                resources = (r["resources"] or "").strip().lower()
+                groups[(r["capacity"] or 0, resources, room_id in self.lab_rooms)].append(room_id)
+        self.room_class_members = {members[0]: members for members in groups.values()}
+        self.room_class_of = {room_id: members[0] for members in groups.values() for room_id in members}
+
+    def section_classes(self):
+        """
+        Groups of interchangeable sections: same year and department (so the
+        same courses and faculty), same daily limit and the same candidate
+        rooms for every course. Sections with fixed or pinned classes are left out.
+        """
+        fixed_sections = {section_id for (_course_id, section_id) in self.fixed_cells}
+        courses_by_group = defaultdict(list)
+        for c in self.data["courses"]:
+            courses_by_group[(c["year"], c["dept_id"])].append(c)
+
+        classes = []
+        for group, sections in self.sections_by_group.items():
+            courses = courses_by_group.get(group, [])
+            signatures = defaultdict(list)
+            for s in sections:
+                if s["id"] in fixed_sections:
+                    continue
+                limit = s["max_hours_per_day"] if s["max_hours_per_day"] is not None else DEFAULT_MAX_HOURS_PER_DAY
+                rooms = tuple(tuple(self.candidate_rooms(c, s)) for c in courses)
+                signatures[(limit, rooms)].append(s["id"])
+            classes.extend(sorted(ids) for ids in signatures.values() if len(ids) > 1)
+        return classes
+
+    def add_symmetry_constraints(self):
+        # Swapping the whole timetables of two equivalent sections gives
+        # another solution, so order them by the slots of one of their courses.
+        section_classes = self.section_classes()
+        slot_terms = defaultdict(list)
+        for key, var in self.assignments.items():
+            slot_terms[(key[0], key[1])].append((key[2], var))
+        for section_ids in section_classes:
+            section = self.sections[section_ids[0]]
+            course = next((c for c in self.data["courses"]
+                           if (c["year"], c["dept_id"]) == (section["year"], section["dept_id"])
+                           and c["hours_per_week"] > 0), None)
+            if course is None:
+                continue
+            position = [cp_model.LinearExpr.WeightedSum(
+                [var for _, var in slot_terms[(course["course_id"], section_id)]],
+                [slot for slot, _ in slot_terms[(course["course_id"], section_id)]]
+            ) for section_id in section_ids]
+            for before, after in zip(position, position[1:]):
+                self.add_constraint("symmetry", self.model.Add(before <= after))
+        self.symmetry["section_classes"] = len(section_classes)
+
+    def build(self):
+        self.build_indexes()
+        self.build_variables()
+        self.add_fixed_constraints()
+        self.add_hours_constraints()
+        self.add_room_constraints()
+        self.add_faculty_constraints()
+        self.add_section_constraints()
+        self.add_daily_constraints()
+        if self.break_symmetry:
+            self.add_symmetry_constraints()
+        if self.use_objective and self.data.get("objective"):
+            self.objective_terms = self.add_soft_constraints(self.data["objective"])
+        return self
+
+    def add_soft_constraints(self, objective):
+        """Minimise the weighted soft constraints; returns {term: expression}."""
+        return add_objective(self, objective)
+
+    # --- OUTPUT ---
+
+    def placements(self):
+        """(course_id, section_id, hours, var) per decision variable: the slots it occupies if true."""
+        for key, var in self.assignments.items():
+            yield key[0], key[1], (key[2],), var
+
+    def extract(self, solver):
+        """
+        Return the chosen assignments as plain entry dicts. Classes placed in
+        a room class get its rooms in order, keeping a hinted room if possible.
+        """
+        chosen = defaultdict(list)
+        for key, var in self.assignments.items():
+            if solver.Value(var) == 1:
+                chosen[(key[2], key[3])].append(key)
+
+        entries = []
+        for (slot, room_class), keys in chosen.items():
+            free = list(self.room_class_members.get(room_class, [room_class]))
+            rooms = {}
+            for key in keys:
+                hinted = next((r for r in self.hinted_rooms.get(key, []) if r in free), None)
+                if hinted is not None:
+                    rooms[key] = hinted
+                    free.remove(hinted)
+            for key in keys:
+                if key not in rooms:
+                    rooms[key] = free.pop(0)
+            for (course_id, section_id, _slot, _class), room_id in rooms.items():
+                entries.append({
+                    "course_id": course_id,
+                    "section_id": section_id,
+                    "faculty_id": self.courses[course_id]["faculty_id"],
+                    "room_id": room_id,
+                    "slot": slot
+                })
+        return entries
+
+    def stats(self):
+        return {
+            "variables": len(self.assignments),
+            "pruned_variables": self.candidate_count - len(self.assignments),
+            "constraints": dict(self.constraint_counts),
+            "symmetry": dict(self.symmetry),
+            "warnings": list(self.warnings)
+        }
+
+
+class SlotModelBuilder(TimetableModelBuilder):
+    """
+    Phase-one model of the two-phase engine: chooses only a slot for every
+    (course, section) hour. Rooms are replaced by per-slot capacity
+    constraints over each class's candidate room set, and are assigned
+    afterwards by bipartite matching.
+    """
+
+    def __init__(self, data, time_slots=None):
+        super().__init__(data, time_slots)
+        self.room_options = {}
+        self.vars_by_slot_room_set = defaultdict(list)
+
+    def add_variable(self, course, section, slot, rooms):
+        course_id, section_id, faculty_id = course["course_id"], section["id"], course["faculty_id"]
+        var = self.model.NewBoolVar(f"course_{course_id}_section_{section_id}_{slot}")
+        key = (course_id, section_id, slot)
+        self.assignments[key] = var
+        self.room_options[key] = rooms
+        self.vars_by_course_section[(course_id, section_id)].append(var)
+        self.vars_by_slot_room_set[(slot, rooms)].append(var)
+        self.vars_by_slot_section[(slot, section_id)].append(var)
+        self.vars_by_section_day[(section_id, self.slot_days[slot])].append(var)
+        if faculty_id in self.faculty:
+            self.vars_by_slot_faculty[(slot, faculty_id)].append(var)
+        return var
+
+    def build_variables(self):
+        for c in self.data["courses"]:
+            slots = self.candidate_slots(c)
+            for section in self.sections_for(c):
+                owner = (c["course_id"], section["id"])
+                self.candidate_count += len(self.time_slots)
+                self.vars_by_course_section.setdefault(owner, [])
+                rooms = frozenset(self.candidate_rooms(c, section))
+                fixed = self.fixed_cells.get(owner, [])
+                fixed_slots = {slot for slot, _ in fixed}
+
+                if owner not in self.locked_owners:
+                    for slot in slots:
+                        if slot in fixed_slots or self.is_blocked(owner, slot, c["faculty_id"], section["id"]):
+                            continue
+                        self.add_variable(c, section, slot, rooms)
+
+                for slot, room_id in fixed:
+                    self.add_variable(c, section, slot, frozenset([room_id]))
+
+    def add_fixed_constraints(self):
+        for (course_id, section_id), cells in self.fixed_cells.items():
+            for slot, _room_id in cells:
+                var = self.assignments[(course_id, section_id, slot)]
+                self.add_constraint("fixed", self.model.Add(var == 1))
+
+    def entry_key(self, entry):
+        return (entry["course_id"], entry["section_id"], entry["slot"])
+
+    def add_room_constraints(self):
+        # Constraint 2: Room capacity per slot. For every candidate room set S
+        # used in a slot (and the union of all of them), the classes that can
+        # only go into rooms of S must not outnumber the rooms in S.
+        sets_by_slot = defaultdict(list)
+        for (slot, rooms) in self.vars_by_slot_room_set:
+            sets_by_slot[slot].append(rooms)
+
+        for slot, room_sets in sets_by_slot.items():
+            bounds = set(room_sets)
+            bounds.add(frozenset().union(*room_sets))
+            for bound in bounds:
+                variables = []
+                for rooms in room_sets:
+                    if rooms <= bound:
+                        variables.extend(self.vars_by_slot_room_set[(slot, rooms)])
+                if len(variables) > len(bound):
+                    self.add_constraint("room_capacity", self.model.Add(
+                        cp_model.LinearExpr.Sum(variables) <= len(bound)
+                    ))
+
+    def extract(self, solver):
+        entries = []
+        for (course_id, section_id, slot), var in self.assignments.items():
+            if solver.Value(var) == 1:
+                entries.append({
+                    "course_id": course_id,
+                    "section_id": section_id,
+                    "faculty_id": self.courses[course_id]["faculty_id"],
+                    "room_id": None,
+                    "slot": slot,
+                    "rooms": self.room_options[(course_id, section_id, slot)]
+                })
+        return entries
@@ -0,0 +1,235 @@
+"""
+Soft constraints for timetable generation.
+
+The hard constraints only ask for a feasible timetable; the objective ranks
+feasible timetables by weighted penalties so the solver keeps improving the
+one it has until the time limit:
+
+- section_gaps / faculty_gaps: idle hours between a section's (faculty
+  member's) first and last class of a day
+- unpreferred: classes outside the college's preferred_hours
+- spread: extra meetings of a course on the same day for one section
+
+Weights are non-negative integers per college (College.objective_weights);
+a weight of 0 switches the term off, and all zeros gives the old pure
+feasibility model. add_objective() reads the slot models' hourly
+variables; add_session_objective() expresses the same terms for the
+interval model.
+"""
+
+from collections import defaultdict
+from ortools.sat.python import cp_model
+
+from utils.slot_grid import slot_day, slot_hour
+
+DEFAULT_OBJECTIVE = {
+    "section_gaps": 3,
+    "faculty_gaps": 2,
+    "spread": 2,
+    "unpreferred": 1,
+    # Hours classes should fall in: all but the default grid's last period
+    "preferred_hours": [9, 10, 11, 12, 13, 14, 15, 16]
+}
+
+OBJECTIVE_TERMS = ("section_gaps", "faculty_gaps", "spread", "unpreferred")
+
+
+def resolve_objective(config=None):
+    """Defaults overlaid with a college's settings. Raises ValueError on bad values."""
+    objective = dict(DEFAULT_OBJECTIVE)
+    for key, value in (config or {}).items():
+        if key in OBJECTIVE_TERMS:
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"Objective weight '{key}' must be a non-negative integer")
+        elif key == "preferred_hours":
+            if not isinstance(value, list) or not all(isinstance(h, int) and 0 <= h < 24 for h in value):
+                raise ValueError("'preferred_hours' must be a list of hours 0-23")
+        else:
+            raise ValueError(f"Unknown objective setting '{key}'. Choose from: "
+                             f"{', '.join(OBJECTIVE_TERMS)}, preferred_hours")
+        objective[key] = value
+    return objective
+
+
+def _idle_hours(model, occupancy, name):
+    """
+    Idle indicators for one day's occupancy (a list of variable lists, one
+    per hour in order). Hour h is idle if nothing is scheduled at h but
+    something is before and after it. The prefix/suffix literals are only
+    bounded from below, which is exact under minimisation.
+    """
+    n = len(occupancy)
+    if n < 3 or sum(1 for variables in occupancy if variables) < 2:
+        return []
+    used = [cp_model.LinearExpr.Sum(variables) if variables else 0 for variables in occupancy]
+    before = [model.NewBoolVar(f"{name}_before_{h}") for h in range(n)]
+    after = [model.NewBoolVar(f"{name}_after_{h}") for h in range(n)]
+    for h in range(n):
+        if occupancy[h]:
+            model.Add(before[h] >= used[h])
+            model.Add(after[h] >= used[h])
+        if h > 0:
+            model.Add(before[h] >= before[h - 1])
+        if h < n - 1:
+            model.Add(after[h] >= after[h + 1])
+
+    idle = []
+    for h in range(1, n - 1):
+        gap = model.NewBoolVar(f"{name}_idle_{h}")
+        model.Add(gap >= before[h - 1] + after[h + 1] - 1 - used[h])
+        idle.append(gap)
+    return idle
+
+
+def add_objective(builder, objective):
+    """
+    Add the weighted soft constraints to a built model and minimise them.
+    Returns {term: expression} for the terms that can be non-zero so their
+    values can be reported after solving.
+    """
+    model = builder.model
+    slots_by_day = defaultdict(list)
+    for slot in sorted(builder.time_slots):
+        slots_by_day[slot_day(slot)].append(slot)
+
+    terms = {}
+    if objective["section_gaps"]:
+        idle = []
+        for section_id in builder.sections:
+            for day, slots in slots_by_day.items():
+                occupancy = [builder.vars_by_slot_section.get((slot, section_id), []) for slot in slots]
+                idle.extend(_idle_hours(model, occupancy, f"section_{section_id}_{day}"))
+        if idle:
+            terms["section_gaps"] = cp_model.LinearExpr.Sum(idle)
+
+    if objective["faculty_gaps"]:
+        idle = []
+        for faculty_id in builder.faculty:
+            for day, slots in slots_by_day.items():
+                occupancy = [builder.vars_by_slot_faculty.get((slot, faculty_id), []) for slot in slots]
+                idle.extend(_idle_hours(model, occupancy, f"faculty_{faculty_id}_{day}"))
+        if idle:
+            terms["faculty_gaps"] = cp_model.LinearExpr.Sum(idle)
+
+    if objective["spread"] or objective["unpreferred"]:
+        per_day = defaultdict(list)
+        unpreferred = []
+        preferred = set(objective["preferred_hours"])
+        for course_id, section_id, hours, var in builder.placements():
+            per_day[(course_id, section_id, slot_day(hours[0]))].append(var)
+            unpreferred.extend(var for slot in hours if slot_hour(slot) not in preferred)
+
+        if objective["spread"]:
+            extra = _extra_meetings(model, builder, per_day)
+            if extra:
+                terms["spread"] = cp_model.LinearExpr.Sum(extra)
+        if objective["unpreferred"] and unpreferred:
+            terms["unpreferred"] = cp_model.LinearExpr.Sum(unpreferred)
+
+    return _minimise(model, terms, objective)
+
+
+def add_session_objective(builder, objective):
+    """
+    add_objective() for the interval model, whose sessions have a start
+    variable and a literal per possible day but nothing per hour. Gaps are
+    an owner's span on a day less the hours its sessions fill, spread counts
+    day literals and a session's unpreferred hours are looked up from its
+    start, so the objective adds a few variables per session and per
+    (owner, day) rather than one per possible start.
+    """
+    model = builder.model
+    slots_by_day = defaultdict(list)
+    for slot in sorted(builder.time_slots):
+        slots_by_day[slot_day(slot)].append(slot)
+    # A session's hours are consecutive grid slots of one day, so its place
+    # among the day's slots measures spans even where the grid skips hours
+    contiguous = all(slots[-1] - slots[0] == len(slots) - 1 for slots in slots_by_day.values())
+    place = {slot: i for slots in slots_by_day.values() for i, slot in enumerate(slots)}
+    positions = {}
+
+    def position(s, day):
+        start = builder.start_vars[s["session"]]
+        if contiguous:
+            return start - slots_by_day[day][0]
+        if s["session"] not in positions:
+            positions[s["session"]] = model.NewIntVar(0, max(place.values()), f"{start.Name()}_position")
+            model.AddElement(start, [place.get(slot, 0) for slot in range(max(s["starts"]) + 1)],
+                             positions[s["session"]])
+        return positions[s["session"]]
+
+    terms = {}
+    for term, owner_of in (("section_gaps", lambda s: s["session"][1]),
+                           ("faculty_gaps", lambda s: builder.courses[s["session"][0]]["faculty_id"])):
+        if not objective[term]:
+            continue
+        by_owner_day = defaultdict(list)
+        for s in builder.sessions:
+            owner = owner_of(s)
+            if term == "faculty_gaps" and owner not in builder.faculty:
+                continue
+            for day, literal in s["days"].items():
+                by_owner_day[(owner, day)].append((s, literal))
+        idle = []
+        for (owner, day), placed in by_owner_day.items():
+            if len(placed) < 2 or len(slots_by_day[day]) < 3:
+                continue
+            span = len(slots_by_day[day])
+            name = f"{term}_{owner}_{day}"
+            first = model.NewIntVar(0, span, f"{name}_first")
+            last = model.NewIntVar(0, span, f"{name}_last")
+            for s, literal in placed:
+                offset = position(s, day)
+                model.Add(first <= offset).OnlyEnforceIf(literal)
+                model.Add(last >= offset + s["length"]).OnlyEnforceIf(literal)
+            gap = model.NewIntVar(0, span, f"{name}_idle")
+            model.Add(gap >= last - first - cp_model.LinearExpr.WeightedSum(
+                [literal for _, literal in placed], [s["length"] for s, _ in placed]))
+            idle.append(gap)
+        if idle:
+            terms[term] = cp_model.LinearExpr.Sum(idle)
+
+    if objective["spread"]:
+        per_day = defaultdict(list)
+        for s in builder.sessions:
+            course_id, section_id, _ = s["session"]
+            for day, literal in s["days"].items():
+                per_day[(course_id, section_id, day)].append(literal)
+        extra = _extra_meetings(model, builder, per_day)
+        if extra:
+            terms["spread"] = cp_model.LinearExpr.Sum(extra)
+
+    if objective["unpreferred"]:
+        preferred = set(objective["preferred_hours"])
+        unpreferred = []
+        for s in builder.sessions:
+            hours = {start: sum(1 for slot in range(start, start + s["length"]) if slot_hour(slot) not in preferred)
+                     for start in s["starts"]}
+            if not any(hours.values()):
+                continue
+            start = builder.start_vars[s["session"]]
+            outside = model.NewIntVar(min(hours.values()), max(hours.values()), f"{start.Name()}_unpreferred")
+            model.AddElement(start, [hours.get(slot, 0) for slot in range(max(hours) + 1)], outside)
+            unpreferred.append(outside)
+        if unpreferred:
+            terms["unpreferred"] = cp_model.LinearExpr.Sum(unpreferred)
+
+    return _minimise(model, terms, objective)
+
+
+def _extra_meetings(model, builder, per_day):
+    """Excess meetings per (course_id, section_id, day) -> literals of that course meeting on that day."""
+    extra = []
+    for (course_id, section_id, day), variables in per_day.items():
+        if len(variables) > 1 and builder.courses[course_id]["hours_per_week"] > 1:
+            excess = model.NewIntVar(0, len(variables) - 1, f"spread_{course_id}_{section_id}_{day}")
+            model.Add(excess >= cp_model.LinearExpr.Sum(variables) - 1)
+            extra.append(excess)
+    return extra
+
+
+def _minimise(model, terms, objective):
+    if terms:
+        model.Minimize(cp_model.LinearExpr.WeightedSum(
+            list(terms.values()), [objective[name] for name in terms]))
+    return terms
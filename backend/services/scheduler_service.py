@@ -4,237 +4,226 @@ Handles the core logic for generating timetables
 """
 
 import os
+import time
 import pandas as pd
-from ortools.sat.python import cp_model
+from flask import current_app
 from extensions import db
-from models import (
-    Course, Faculty, Classroom, Section, Timetable, 
-    FacultyUnavailability
-)
+from models import College, TimetableVersion
 from services.email_service import send_email
+from services.scheduler_engines import run_engine, ENGINES_USING_TIMETABLE
+from services.scheduler_model import load_scheduler_input
+from services.solution_cache import input_fingerprint, get_cached_solution, store_solution
+from services.solver_profiles import resolve_solver_params, host_worker_cap
+from services.solver_telemetry import memory_baseline, record_solver_run
+from services.model_export import dump_problem_run
+from services.scheduler_diagnosis import capacity_checks, infeasible_core, summarize, MAX_REPORTED
+from services.timetable_versions import (
+    active_timetable_query, create_version, activate_version, row_key, AUDIT_FIELDS
+)
+from utils.tenant_middleware import TenantContext
+from utils.slot_grid import slot_labels
+
+
+def generate_timetable_internal(engine="monolithic", college_id=None, progress=None,
+                                warm_start=False, force=False, profile=None, improve=False, **engine_options):
+    """
+    Generate timetable using constraint programming.
+    college_id defaults to the request's tenant; background workers pass it
+    explicitly. progress is an optional SolveProgress for status polling and
+    cancellation. warm_start hints the current timetable to the solver; the
+    incremental engine always does. Remaining keyword arguments go to the
+    engine (e.g. changed_courses for "incremental").
+
+    If the inputs fingerprint to the college's last solution, that solution
+    is reused without solving; force=True always solves.
+
+    profile names a solver profile (see services/solver_profiles.py) and
+    defaults to the college's; the effective parameters end up in the stats.
+
+    The solver minimises the college's soft constraints and returns the best
+    timetable found within the time limit. improve=True spends more time on
+    the active timetable: it is hinted to the solver, and replaced only if
+    the new solution scores better (stats["improved"]).
+
+    Every solve is recorded as a SolverRun (services/solver_telemetry.py).
+    With SOLVER_EXPORT_DIR set, solves that fail or hit the time limit are
+    also exported as instance files (services/model_export.py).
+    """
+    if college_id is None:
+        college_id = TenantContext.get_college_id()
+    if improve:
+        warm_start = force = True
+
+    if profile is None and college_id is not None:
+        college = db.session.get(College, college_id)
+        profile = college.solver_profile if college else None
+    try:
+        solver_params = resolve_solver_params(profile, max_workers=host_worker_cap(current_app.config))
+    except ValueError as e:
+        return {"error": str(e)}
+    engine_options.setdefault("time_limit", solver_params["max_time_in_seconds"])
+    engine_options["solver_params"] = solver_params
 
+    data = load_scheduler_input(college_id, include_timetable=warm_start or engine in ENGINES_USING_TIMETABLE)
 
-def generate_timetable_internal():
-    """Generate timetable using constraint programming"""
-    courses = Course.query.all()
-    faculty = Faculty.query.all()
-    rooms = Classroom.query.all()
-    sections = Section.query.all()
-
-    if not courses or not faculty or not rooms or not sections:
+    if not data["courses"] or not data["faculty"] or not data["rooms"] or not data["sections"]:
         return {"error": "Need courses, faculty, rooms, and sections to generate timetable"}
 
-    time_slots = [
-        "Mon_09", "Mon_10", "Mon_11", "Mon_12", "Mon_13", "Mon_14", "Mon_15", "Mon_16", "Mon_17",
-        "Tue_09", "Tue_10", "Tue_11", "Tue_12", "Tue_13", "Tue_14", "Tue_15", "Tue_16", "Tue_17",
-        "Wed_09", "Wed_10", "Wed_11", "Wed_12", "Wed_13", "Wed_14", "Wed_15", "Wed_16", "Wed_17",
-        "Thu_09", "Thu_10", "Thu_11", "Thu_12", "Thu_13", "Thu_14", "Thu_15", "Thu_16", "Thu_17",
-        "Fri_09", "Fri_10", "Fri_11", "Fri_12", "Fri_13", "Fri_14", "Fri_15", "Fri_16", "Fri_17"
-    ]
-
-    model = cp_model.CpModel()
-    assignments = {}
-
-    faculty_dict = {f.faculty_id: f for f in faculty}
-    room_dict = {r.room_id: r for r in rooms}
-
-    # --- Fetch all unavailability records into an efficient lookup set ---
-    unavailable_slots = {
-        (u.faculty_id, f"{u.day}_{u.start_time}")
-        for u in FacultyUnavailability.query.all()
-    }
-
-    # Decision variables
-    for c in courses:
-        assignments[c.course_id] = {}
-        relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-        for section in relevant_sections:
-            assignments[c.course_id][section.id] = {}
-            for slot in time_slots:
-                for r in rooms:
-                    assignments[c.course_id][section.id][(slot, r.room_id)] = model.NewBoolVar(
-                        f"course_{c.course_id}_section_{section.id}_{slot}_{r.name}"
-                    )
-
-    # --- CONSTRAINTS ---
-
-    # Constraint 0.1: Pre-assign fixed classes
-    for c in courses:
-        if c.is_fixed and c.fixed_day and c.fixed_slot and c.fixed_room_id:
-            fixed_time_slot = f"{c.fixed_day}_{c.fixed_slot}"
-            relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-            for section in relevant_sections:
-                if fixed_time_slot in time_slots:
-                    model.Add(assignments[c.course_id][section.id][(fixed_time_slot, c.fixed_room_id)] == 1)
-
-    # Constraint 0.2: Block assignments in faculty's unavailable slots
-    for f in faculty:
-        for slot in time_slots:
-            if (f.faculty_id, slot) in unavailable_slots:
-                for c in courses:
-                    if c.faculty_id == f.faculty_id:
-                        relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-                        for section in relevant_sections:
-                            for r in rooms:
-                                if (c.course_id in assignments and
-                                    section.id in assignments[c.course_id] and
-                                    (slot, r.room_id) in assignments[c.course_id][section.id]):
-                                    model.Add(assignments[c.course_id][section.id][(slot, r.room_id)] == 0)
-
-    # Constraint 1: Each course is scheduled for its required 'hours_per_week'
-    for c in courses:
-        relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-        for section in relevant_sections:
-            if c.course_id in assignments and section.id in assignments[c.course_id]:
-                if c.hours_per_week > 0:
-                    model.Add(sum(assignments[c.course_id][section.id].values()) == c.hours_per_week)
-                else:
-                    model.Add(sum(assignments[c.course_id][section.id].values()) == 0)
-
-    # Constraint 2: Room conflicts (one class per room at any time)
-    for slot in time_slots:
-        for r in rooms:
-            room_assignments = []
-            for c in courses:
-                relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-                for section in relevant_sections:
-                    if (c.course_id in assignments and
-                        section.id in assignments[c.course_id] and
-                        (slot, r.room_id) in assignments[c.course_id][section.id]):
-                        room_assignments.append(assignments[c.course_id][section.id][(slot, r.room_id)])
-            if room_assignments:
-                model.Add(sum(room_assignments) <= 1)
-
-    # Constraint 3: Faculty conflicts (faculty teaches one class at a time)
-    for slot in time_slots:
-        for f in faculty:
-            faculty_assignments = []
-            for c in courses:
-                if c.faculty_id == f.faculty_id:
-                    relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-                    for section in relevant_sections:
-                        for r in rooms:
-                            if (c.course_id in assignments and
-                                section.id in assignments[c.course_id] and
-                                (slot, r.room_id) in assignments[c.course_id][section.id]):
-                                faculty_assignments.append(assignments[c.course_id][section.id][(slot, r.room_id)])
-            if faculty_assignments:
-                model.Add(sum(faculty_assignments) <= 1)
-
-    # Constraint 4: Section conflicts (section attends one class at a time)
-    for slot in time_slots:
-        for section in sections:
-            section_assignments = []
-            for c in courses:
-                if c.year == section.year and c.dept_id == section.dept_id:
-                    for r in rooms:
-                        if (c.course_id in assignments and
-                            section.id in assignments[c.course_id] and
-                            (slot, r.room_id) in assignments[c.course_id][section.id]):
-                            section_assignments.append(assignments[c.course_id][section.id][(slot, r.room_id)])
-            if section_assignments:
-                model.Add(sum(section_assignments) <= 1)
-
-    # Constraint 5: Max classes per day for a section
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri"]
-    for section in sections:
-        for day in days:
-            daily_slots = [slot for slot in time_slots if slot.startswith(day)]
-            
-            daily_class_sum = []
-            for c in courses:
-                if c.year == section.year and c.dept_id == section.dept_id:
-                    for slot in daily_slots:
-                        for r in rooms:
-                            if (c.course_id in assignments and
-                                section.id in assignments[c.course_id] and
-                                (slot, r.room_id) in assignments[c.course_id][section.id]):
-                                daily_class_sum.append(assignments[c.course_id][section.id][(slot, r.room_id)])
-            
-            if daily_class_sum:
-                model.Add(sum(daily_class_sum) <= section.max_hours_per_day)
-
-    # --- SOLVER AND OUTPUT ---
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 30.0
-    status = solver.Solve(model)
+    options = dict(engine_options, warm_start=True) if warm_start else engine_options
+    fingerprint = input_fingerprint(data, engine, options)
+    cached = None if force or college_id is None else get_cached_solution(college_id, fingerprint)
+
+    if cached is not None:
+        result = {"status": cached.stats.get("status"), "feasible": True,
+                  "entries": [dict(e) for e in cached.entries], "stats": dict(cached.stats, cached=True)}
+    else:
+        # Inputs that fail a capacity check can never be scheduled; say why
+        # instead of letting the solver run into its time limit
+        issues = capacity_checks(data)
+        if issues:
+            diagnosis = {"capacity_issues": issues[:MAX_REPORTED], "core": [], "core_status": None}
+            return {"error": f"The timetable inputs are infeasible. {summarize(diagnosis)}",
+                    "diagnosis": diagnosis}
+        started, baseline = time.perf_counter(), memory_baseline()
+        result = run_engine(data, engine=engine, progress=progress, **engine_options)
+        run = record_solver_run(college_id, engine, result, time.perf_counter() - started,
+                                time_limit=engine_options["time_limit"], kind="improve" if improve else "generate",
+                                job_id=getattr(progress, "job_id", None), baseline=baseline)
+        if run is not None:
+            result["stats"]["solver_run_id"] = run.id
+        exported = dump_problem_run(college_id, data, engine, engine_options, result, run)
+        if exported:
+            result["stats"]["exported_to"] = exported
+    stats = result["stats"]
+    stats["fingerprint"] = fingerprint
+    stats["objective_weights"] = data.get("objective")
+
+    if progress is not None and progress.cancelled:
+        return {"error": "Timetable generation was cancelled.", "cancelled": True, "stats": stats}
+
+    if not result["feasible"]:
+        if progress is not None:
+            progress.set_phase("diagnosing")
+        core_status, core = infeasible_core(data)
+        diagnosis = {"capacity_issues": [], "core": core, "core_status": core_status}
+        return {"error": f"Could not generate a feasible timetable. {summarize(diagnosis)}",
+                "diagnosis": diagnosis, "stats": stats}
+
+    if improve:
+        previous = _active_objective(college_id, data.get("objective"))
+        stats["improved"] = stats.get("objective") is not None and (previous is None or stats["objective"] < previous)
+        if not stats["improved"]:
+            return {"success": True, "message": "No better timetable was found in the extra time", "stats": stats}
+
+    courses = {c["course_id"]: c for c in data["courses"]}
+    sections = {s["id"]: s for s in data["sections"]}
+    rooms = {r["room_id"]: r for r in data["rooms"]}
+    faculty = {f["faculty_id"]: f for f in data["faculty"]}
+
+    if progress is not None:
+        progress.set_phase("saving")
+
+    # The new timetable becomes a new version; placements that did not move
+    # keep their swap history from the active version.
+    active_rows = active_timetable_query(college_id).all()
+    unclaimed = {}
+    for t in active_rows:
+        unclaimed.setdefault(row_key(t), []).append(t)
+
+    rows = []
+    timetable_data = []
+    for e in result["entries"]:
+        c = courses[e["course_id"]]
+        section = sections[e["section_id"]]
+        day, start_time = slot_labels(e["slot"])
+
+        row = {
+            "course_id": e["course_id"],
+            "section_id": e["section_id"],
+            "faculty_id": e["faculty_id"],
+            "room_id": e["room_id"],
+            "day": day,
+            "start_time": start_time,
+            "slot": e["slot"]
+        }
+        matches = unclaimed.get(row_key(row))
+        if matches:
+            previous_row = matches.pop()
+            row.update({f: getattr(previous_row, f) for f in AUDIT_FIELDS})
+        rows.append(row)
+        timetable_data.append({
+            "course": c["name"],
+            "section": section["name"],
+            "faculty": faculty[c["faculty_id"]]["faculty_name"] if c["faculty_id"] in faculty else "N/A",
+            "room": rooms[e["room_id"]]["name"],
+            "day": day,
+            "start_time": start_time,
+            "year": c["year"],
+            "semester": c["semester"]
+        })
+
+    removed = sum(len(matches) for matches in unclaimed.values())
+    stats["rows_kept"] = len(active_rows) - removed
+    stats["rows_deleted"] = removed
+    stats["rows_inserted"] = len(rows) - stats["rows_kept"]
+
+    if cached is None and college_id is not None:
+        store_solution(college_id, fingerprint, engine, result["entries"],
+                       {k: v for k, v in stats.items() if k != "fingerprint"})
+
+    if active_rows and not removed and not stats["rows_inserted"]:
+        db.session.commit()
+        return {"success": True, "message": "Timetable is already up to date", "stats": stats}
 
     try:
-        Timetable.query.delete()
+        # Write the whole version, then flip the active pointer, in one
+        # transaction: readers see either the old or the new timetable.
+        parent = active_rows[0].version_id if active_rows else None
+        version = create_version(college_id, rows, engine=engine, parent_version_id=parent,
+                                 stats={k: v for k, v in stats.items() if k != "fingerprint"})
+        activate_version(version)
         db.session.commit()
+        stats["version_id"] = version.id
     except Exception as e:
         db.session.rollback()
-        return {"error": f"Failed to clear existing timetable: {str(e)}"}
-
-    timetable_entries = []
-    timetable_data = []
-
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for c in courses:
-            relevant_sections = Section.query.filter_by(year=c.year, dept_id=c.dept_id).all()
-            for section in relevant_sections:
-                if (c.course_id in assignments and
-                    section.id in assignments[c.course_id]):
-                    for (slot, room_id), var in assignments[c.course_id][section.id].items():
-                        if solver.Value(var) == 1:
-                            day_map = {
-                                "Mon": "Monday", "Tue": "Tuesday", "Wed": "Wednesday",
-                                "Thu": "Thursday", "Fri": "Friday", "Sat": "Saturday"
-                            }
-                            time_map = {
-                                "09": "09:00", "10": "10:00", "11": "11:00", "12": "12:00",
-                                "13": "13:00", "14": "14:00", "15": "15:00", "16": "16:00", "17": "17:00"
-                            }
-                            
-                            raw_day = slot.split("_")[0]
-                            raw_time = slot.split("_")[1]
-                            
-                            entry = Timetable(
-                                course_id=c.course_id,
-                                section_id=section.id,
-                                faculty_id=c.faculty_id,
-                                room_id=room_id,
-                                day=day_map.get(raw_day, raw_day),
-                                start_time=time_map.get(raw_time, raw_time)
-                            )
-                            timetable_entries.append(entry)
-                            timetable_data.append({
-                                "course": c.name,
-                                "section": section.name,
-                                "faculty": faculty_dict[c.faculty_id].faculty_name if c.faculty_id else "N/A",
-                                "room": room_dict[room_id].name,
-                                "day": entry.day,
-                                "start_time": entry.start_time,
-                                "year": c.year,
-                                "semester": c.semester
-                            })
-        try:
-            db.session.add_all(timetable_entries)
-            db.session.commit()
-            os.makedirs("output", exist_ok=True)
-
-            # Save CSV
-            file_path = "output/timetable_final.csv"
-            pd.DataFrame(timetable_data).to_csv(file_path, index=False)
-            print("Timetable generated successfully!")
-
-            # --- Send email with attachment ---
-            try: 
-                faculty_emails = [f.email for f in faculty if f.email]
-                send_email(
-                    subject="New Timetable Generated",
-                    recipients=faculty_emails,
-                    body="Hello,\n\nThe new timetable has been updated successfully please check it.\n\nRegards,\nTimetable System",
-                    attachment_path=file_path
-                )
-            except Exception as e:
-                print(f"⚠️ Failed to send email: {str(e)}")
-
-            return {"success": True, "message": "Timetable generated successfully and emailed"}
+        return {"success": False, "message": f"Error: {str(e)}"}
 
+    try:
+        os.makedirs("output", exist_ok=True)
+
+        # Save CSV
+        file_path = "output/timetable_final.csv"
+        pd.DataFrame(timetable_data).to_csv(file_path, index=False)
+        print("Timetable generated successfully!")
+
+        # --- Send email with attachment ---
+        try: 
+            faculty_emails = [f["email"] for f in data["faculty"] if f["email"]]
+            send_email(
+                subject="New Timetable Generated",
+                recipients=faculty_emails,
+                body="Hello,\n\nThe new timetable has been updated successfully please check it.\n\nRegards,\nTimetable System",
+                attachment_path=file_path
+            )
         except Exception as e:
-            db.session.rollback()
-            return {"success": False, "message": f"Error: {str(e)}"}
+            print(f"⚠️ Failed to send email: {str(e)}")
 
-    else:
-        return {"error": "Could not generate a feasible timetable. Try reducing constraints or adding more resources."}
+        return {"success": True, "message": "Timetable generated successfully and emailed", "stats": stats}
+
+    except Exception as e:
+        # The new version is already live; only the CSV export failed
+        return {"success": True, "message": f"Timetable generated, but the CSV export failed: {str(e)}",
+                "stats": stats}
+
+
+def _active_objective(college_id, objective):
+    """
+    Objective value of the active timetable version, if it was scored with
+    the same weights (values under other weights are not comparable).
+    """
+    college = db.session.get(College, college_id) if college_id is not None else None
+    if college is None or college.active_timetable_version_id is None:
+        return None
+    version = db.session.get(TimetableVersion, college.active_timetable_version_id)
+    stats = (version.stats or {}) if version else {}
+    return stats.get("objective") if stats.get("objective_weights") == objective else None
@@ -0,0 +1,127 @@
+"""
+Alternative slots for moving one timetable entry.
+
+Given an entry of the active timetable, list every (slot, room) it could
+move to without a clash, plus the two-way swaps that would work: slots
+held by exactly one class of the same faculty member or section, which
+can take the entry's current slot in exchange (how admin_approve_swap
+performs a swap; both classes keep their rooms).
+
+Everything is read from the occupancy index (services/occupancy_index.py)
+and a handful of per-college queries, never one query per candidate.
+Suggestions are ordered by disruption: moves before swaps, then keeping
+the room, keeping the day, and the fewest hours moved.
+"""
+
+from sqlalchemy import func
+
+from extensions import db
+from models import College, Classroom, Course, FacultyUnavailability, Timetable, User
+from services.occupancy_index import get_occupancy_index, KINDS
+from services.scheduler_model import suitable_rooms, is_lab_room, is_lab_course
+from utils.slot_grid import SlotGrid, slot_day, slot_hour, slot_labels, slot_from_labels
+
+
+def _unavailable_slots(college_id):
+    """faculty_id -> slots the faculty member is unavailable in."""
+    unavailable = {}
+    for u in FacultyUnavailability.query.filter_by(college_id=college_id):
+        slot = u.slot if u.slot is not None else slot_from_labels(u.day, u.start_time)
+        if slot is not None:
+            unavailable.setdefault(u.faculty_id, set()).add(slot)
+    return unavailable
+
+
+def _entry_summary(entry):
+    return {
+        "timetable_id": entry.timetable_id,
+        "course": entry.course.name if entry.course else None,
+        "faculty": entry.faculty.faculty_name if entry.faculty else None,
+        "section_id": entry.section_id,
+        "room": entry.room.name if entry.room else None,
+        "day": entry.day,
+        "start_time": entry.start_time
+    }
+
+
+def suggest_alternatives(entry, limit=None):
+    """
+    Conflict-free moves and workable two-way swaps for a Timetable entry,
+    most convenient first. Returns a list of suggestion dicts.
+    """
+    college = db.session.get(College, entry.college_id)
+    grid = SlotGrid.from_config(college.slot_grid if college else None)
+    index = get_occupancy_index(entry.college_id)
+    unavailable = _unavailable_slots(entry.college_id)
+    current = entry.slot if entry.slot is not None else slot_from_labels(entry.day, entry.start_time)
+
+    rooms = {r.room_id: {"room_id": r.room_id, "name": r.name, "capacity": r.capacity, "resources": r.resources}
+             for r in Classroom.query.filter_by(college_id=entry.college_id)}
+    enrolment = db.session.query(func.count(User.id)).filter(
+        User.role == "student", User.section_id == entry.section_id).scalar() or 0
+    course = db.session.get(Course, entry.course_id)
+    lab = is_lab_course({"type": course.type if course else None})
+    candidates = suitable_rooms(rooms, {i for i, r in rooms.items() if is_lab_room(r)}, enrolment, lab)
+    # The entry's own room first, so ties keep it
+    candidates = sorted(candidates, key=lambda room_id: (room_id != entry.room_id, room_id))
+
+    own = {entry.timetable_id}
+    blocked = unavailable.get(entry.faculty_id, set())
+    suggestions, partners = [], {}
+    for slot in grid.slots:
+        if slot == current or slot in blocked:
+            continue
+        free = index.free_slots([slot], entry.faculty_id, entry.section_id, exclude=own)
+        if free:
+            for room_id in index.free_rooms(slot, candidates, exclude=own):
+                suggestions.append(_suggestion("move", slot, room_id, rooms, entry, current))
+            continue
+
+        # A swap needs the slot to be held by one class of the same faculty member or section
+        holders = {index.holder(kind, owner, slot, own)
+                   for kind, owner in zip(KINDS, (entry.faculty_id, entry.section_id, entry.room_id))}
+        holders.discard(None)
+        if len(holders) != 1 or current is None:
+            continue
+        partner_id = holders.pop()
+        faculty_id, section_id, room_id, _ = index.entries[partner_id]
+        if faculty_id != entry.faculty_id and section_id != entry.section_id:
+            continue
+        pair = {entry.timetable_id, partner_id}
+        if current in unavailable.get(faculty_id, ()) \
+                or index.conflict(entry.faculty_id, entry.section_id, entry.room_id, slot, pair) \
+                or index.conflict(faculty_id, section_id, room_id, current, pair):
+            continue
+        partners[partner_id] = None
+        suggestions.append(dict(_suggestion("swap", slot, entry.room_id, rooms, entry, current),
+                                swap_with=partner_id))
+
+    # Load only the swap partners, in one query
+    if partners:
+        for partner in Timetable.query.filter(Timetable.timetable_id.in_(partners)):
+            partners[partner.timetable_id] = _entry_summary(partner)
+        for s in suggestions:
+            if s["type"] == "swap":
+                s["swap_with"] = partners[s["swap_with"]]
+
+    suggestions.sort(key=lambda s: (s["type"] != "move", s["room_changed"], s["day_changed"],
+                                    s["hours_moved"], s["slot"], s["room_id"]))
+    return suggestions[:limit] if limit else suggestions
+
+
+def _suggestion(kind, slot, room_id, rooms, entry, current):
+    day, start_time = slot_labels(slot)
+    same_day = current is not None and slot_day(slot) == slot_day(current)
+    return {
+        "type": kind,
+        "day": day,
+        "start_time": start_time,
+        "slot": slot,
+        "room_id": room_id,
+        "room": rooms[room_id]["name"] if room_id in rooms else None,
+        "room_changed": room_id != entry.room_id,
+        "day_changed": not same_day,
+        # Change in time of day, whichever day the class lands on
+        "hours_moved": abs(slot_hour(slot) - slot_hour(current)) if current is not None else 0,
+        "swap_with": None
+    }
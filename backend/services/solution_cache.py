@@ -0,0 +1,70 @@
+"""
+Fingerprint cache for timetable generation.
+
+The fingerprint is a SHA-256 over a canonical form of everything the solver
+reads: courses, sections (with enrolment), rooms, faculty ids, faculty
+unavailability, the slot grid, the objective weights, the engine and its options (time limit, seed, ...). Rows
+are sorted and keys ordered, so the same inputs always hash the same no
+matter what order the database returns them in. Names and e-mails that
+only appear in the CSV/e-mail output are left out.
+"""
+
+import json
+import hashlib
+from datetime import datetime
+
+from extensions import db
+from models import SolutionCache
+
+# Bump when an engine change makes old solutions unsuitable for reuse
+FINGERPRINT_VERSION = 2
+
+ENTRY_KEYS = ("course_id", "section_id", "faculty_id", "room_id", "slot")
+
+
+def _sorted_rows(rows, *keys):
+    return sorted(rows, key=lambda r: tuple(str(r.get(k)) for k in keys))
+
+
+def input_fingerprint(data, engine, options=None):
+    """Hex digest identifying a solve request. options are the engine keyword arguments."""
+    canonical = {
+        "version": FINGERPRINT_VERSION,
+        "engine": engine,
+        "options": options or {},
+        "courses": _sorted_rows(data["courses"], "course_id"),
+        "sections": _sorted_rows(data["sections"], "id"),
+        "rooms": _sorted_rows(data["rooms"], "room_id"),
+        "faculty": sorted(f["faculty_id"] for f in data["faculty"]),
+        "unavailability": _sorted_rows(data["unavailability"], "faculty_id", "slot"),
+        "grid": data.get("grid"),
+        "objective": data.get("objective")
+    }
+    if "timetable" in data:
+        # Warm-started and incremental solves also depend on the current timetable
+        canonical["timetable"] = _sorted_rows(
+            [{k: e[k] for k in ENTRY_KEYS} for e in data["timetable"]], *ENTRY_KEYS)
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_solution(college_id, fingerprint):
+    """Return the cached SolutionCache row if it was stored under this fingerprint."""
+    cached = SolutionCache.query.filter_by(college_id=college_id).first()
+    if cached is None or cached.fingerprint != fingerprint:
+        return None
+    return cached
+
+
+def store_solution(college_id, fingerprint, engine, entries, stats):
+    """Replace the college's cached solution. The caller commits."""
+    cached = SolutionCache.query.filter_by(college_id=college_id).first()
+    if cached is None:
+        cached = SolutionCache(college_id=college_id)
+        db.session.add(cached)
+    cached.fingerprint = fingerprint
+    cached.engine = engine
+    cached.entries = [{k: e[k] for k in ENTRY_KEYS} for e in entries]
+    cached.stats = stats
+    cached.created_at = datetime.utcnow()
+    return cached
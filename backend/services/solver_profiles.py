@@ -0,0 +1,88 @@
+"""
+CP-SAT solver profiles.
+
+A profile bundles the CpSolver parameters for one kind of run. Colleges pick
+a default profile (College.solver_profile) and a generate request may name
+another one. The worker count is capped per host so one large tenant cannot
+take every core while other generation jobs are running: by default each of
+the GENERATION_WORKERS job processes gets an equal share of the CPUs, and
+SOLVER_MAX_WORKERS overrides that share.
+
+With num_workers > 1 a time-limited search is only reproducible when
+interleave_search is set, which the thorough profile does not do because it
+costs throughput. The seed still makes single-worker runs repeatable.
+"""
+
+import os
+
+DEFAULT_PROFILE = "balanced"
+
+SOLVER_PROFILES = {
+    # Small colleges and interactive "try it" runs
+    "quick": {
+        "num_workers": 2,
+        "max_time_in_seconds": 10.0,
+        "random_seed": 0,
+        "cp_model_presolve": True,
+        "max_presolve_iterations": 1,
+        "linearization_level": 0
+    },
+    "balanced": {
+        "num_workers": 4,
+        "max_time_in_seconds": 30.0,
+        "random_seed": 0,
+        "cp_model_presolve": True,
+        "max_presolve_iterations": 3,
+        "linearization_level": 1
+    },
+    # Large colleges, overnight or background regeneration
+    "thorough": {
+        "num_workers": 16,
+        "max_time_in_seconds": 120.0,
+        "random_seed": 0,
+        "cp_model_presolve": True,
+        "max_presolve_iterations": 3,
+        "linearization_level": 2,
+        "symmetry_level": 2
+    }
+}
+
+# CpSolver fields a profile may set
+SOLVER_PARAMETERS = (
+    "num_workers", "max_time_in_seconds", "random_seed", "cp_model_presolve",
+    "max_presolve_iterations", "linearization_level", "symmetry_level", "interleave_search"
+)
+
+
+def host_worker_cap(config=None):
+    """CP-SAT workers one generation job may use on this host."""
+    config = config or {}
+    if config.get("SOLVER_MAX_WORKERS"):
+        return max(1, int(config["SOLVER_MAX_WORKERS"]))
+    jobs = max(1, int(config.get("GENERATION_WORKERS", 1)))
+    return max(1, (os.cpu_count() or 1) // jobs)
+
+
+def resolve_solver_params(profile=None, max_workers=None):
+    """
+    Effective parameters for a run: the profile's settings with num_workers
+    capped at max_workers. The result records the profile name and is what
+    engines apply and what gets stored with the run.
+    """
+    name = profile or DEFAULT_PROFILE
+    if name not in SOLVER_PROFILES:
+        raise ValueError(f"Unknown solver profile '{name}'. Choose one of: {', '.join(SOLVER_PROFILES)}")
+    params = dict(SOLVER_PROFILES[name], profile=name)
+    if max_workers is not None:
+        params["num_workers"] = max(1, min(params["num_workers"], max_workers))
+    return params
+
+
+def apply_solver_params(solver, params, time_limit=None):
+    """Copy known parameters onto a CpSolver. An explicit time_limit wins over the profile."""
+    for name in SOLVER_PARAMETERS:
+        if params and name in params:
+            setattr(solver.parameters, name, params[name])
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    return solver
@@ -0,0 +1,198 @@
+"""
+Solver telemetry.
+
+Every engine run (generation, improvement or what-if scenario) is stored
+as a SolverRun: model size per constraint family, build/solve timings,
+CP-SAT presolve and search counters (branches, conflicts, ...), the
+objective trajectory and the run's peak memory. Engines put the raw
+numbers in their stats (see _search_stats in scheduler_engines.py); this
+module condenses them into one record per run and summarises recent runs
+per college, so colleges getting close to their time limit stand out
+before they start timing out.
+"""
+
+import sys
+from collections import defaultdict
+
+from flask import current_app
+from extensions import db
+from models import SolverRun
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+SEARCH_COUNTERS = ("wall_time", "user_time", "deterministic_time", "branches", "conflicts",
+                   "restarts", "propagations", "lp_iterations")
+
+# Runs a college's scaling summary looks at
+RECENT_RUNS = 20
+
+# A run that used this share of its time limit without proving optimality hit it
+TIME_LIMIT_SHARE = 0.95
+
+
+def memory_baseline():
+    """
+    High-water marks of resident memory of this process and of its finished
+    child processes (the decomposed engine's pool), taken when a run starts.
+    None where unsupported.
+    """
+    if resource is None:
+        return None
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def peak_memory_mb(baseline):
+    """
+    Peak resident memory of the largest process of a run started at
+    baseline. ru_maxrss only ever grows over a process's life, so a mark
+    that has not moved since baseline was set by an earlier run; None if
+    neither has moved or memory is not measured.
+    """
+    if baseline is None:
+        return None
+    peaks = [peak for peak, before in zip(memory_baseline(), baseline) if peak > before]
+    if not peaks:
+        return None
+    # Kilobytes on Linux, bytes on macOS
+    return round(max(peaks) / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _searches(stats):
+    """Every search-statistics dict in a run's stats, including those of sub-solves."""
+    found = []
+    if isinstance(stats, dict):
+        for key, value in stats.items():
+            if key == "search" and isinstance(value, dict):
+                found.append(value)
+            else:
+                found.extend(_searches(value))
+    elif isinstance(stats, list):
+        for value in stats:
+            found.extend(_searches(value))
+    return found
+
+
+def build_telemetry(stats, total_time, baseline=None):
+    """The structured record of a run from its engine stats and its memory_baseline()."""
+    searches = _searches(stats)
+    search = {name: round(sum(s.get(name) or 0 for s in searches), 3) for name in SEARCH_COUNTERS}
+    search["solves"] = len(searches)
+    return {
+        "model": {
+            "variables": stats.get("variables", 0),
+            "pruned_variables": stats.get("pruned_variables"),
+            "constraints": dict(stats.get("constraints") or {}),
+            "symmetry": stats.get("symmetry")
+        },
+        "timings": {
+            "build": stats.get("build_time"),
+            "solve": stats.get("solve_time"),
+            "room_assignment": stats.get("room_assignment_time"),
+            "total": round(total_time, 3)
+        },
+        "presolve": [s["presolve"] for s in searches if "presolve" in s],
+        "search": search,
+        "objective": stats.get("objective"),
+        "best_bound": stats.get("best_bound"),
+        "objective_terms": stats.get("objective_terms"),
+        "objective_trajectory": stats.get("objective_trajectory", []),
+        "solver_params": stats.get("solver_params"),
+        "peak_memory_mb": peak_memory_mb(baseline)
+    }
+
+
+def record_solver_run(college_id, engine, result, total_time, time_limit=None, kind="generate", job_id=None,
+                      baseline=None):
+    """
+    Store a SolverRun for an engine result and commit it; baseline is the
+    memory_baseline() taken before the engine ran. Telemetry must never
+    fail a generation, so errors are logged and None is returned.
+    """
+    if college_id is None:
+        return None
+    stats = result.get("stats") or {}
+    try:
+        telemetry = build_telemetry(stats, total_time, baseline)
+        status = result.get("status") or stats.get("status")
+        solve_time = stats.get("solve_time")
+        run = SolverRun(
+            college_id=college_id,
+            job_id=job_id,
+            kind=kind,
+            engine=engine,
+            status=status,
+            feasible=bool(result.get("feasible")),
+            hit_time_limit=bool(status in ("FEASIBLE", "UNKNOWN") and time_limit and solve_time
+                                and solve_time >= TIME_LIMIT_SHARE * time_limit),
+            variables=telemetry["model"]["variables"],
+            constraints=sum(telemetry["model"]["constraints"].values()),
+            build_time=stats.get("build_time"),
+            solve_time=solve_time,
+            total_time=telemetry["timings"]["total"],
+            time_limit=time_limit,
+            branches=int(telemetry["search"]["branches"]),
+            conflicts=int(telemetry["search"]["conflicts"]),
+            peak_memory_mb=telemetry["peak_memory_mb"],
+            telemetry=telemetry
+        )
+        db.session.add(run)
+        db.session.flush()
+        prune_solver_runs(college_id)
+        db.session.commit()
+        return run
+    except Exception as e:
+        db.session.rollback()
+        print(f"[Telemetry] Failed to record solver run for college {college_id}: {e}")
+        return None
+
+
+def prune_solver_runs(college_id, keep=None):
+    """Delete a college's oldest runs beyond the retention limit."""
+    if keep is None:
+        keep = current_app.config.get("SOLVER_RUNS_KEPT", 200)
+    expired = [run_id for (run_id,) in db.session.query(SolverRun.id)
+               .filter(SolverRun.college_id == college_id)
+               .order_by(SolverRun.id.desc()).offset(keep)]
+    if expired:
+        SolverRun.query.filter(SolverRun.id.in_(expired)).delete(synchronize_session=False)
+    return len(expired)
+
+
+def scaling_summary(college_ids=None, recent=RECENT_RUNS):
+    """
+    Per college, the last `recent` runs condensed: largest model, slowest
+    solve, share of the time limit used and how many runs hit it. Sorted by
+    time-limit share, the colleges closest to their limits first.
+    """
+    query = SolverRun.query
+    if college_ids is not None:
+        query = query.filter(SolverRun.college_id.in_(college_ids))
+    runs = defaultdict(list)
+    for run in query.order_by(SolverRun.id.desc()):
+        if len(runs[run.college_id]) < recent:
+            runs[run.college_id].append(run)
+
+    summary = []
+    for college_id, college_runs in runs.items():
+        shares = [r.solve_time / r.time_limit for r in college_runs if r.solve_time is not None and r.time_limit]
+        latest = college_runs[0]
+        summary.append({
+            "college_id": college_id,
+            "runs": len(college_runs),
+            "latest_run_at": latest.created_at.isoformat() if latest.created_at else None,
+            "latest_status": latest.status,
+            "max_variables": max(r.variables or 0 for r in college_runs),
+            "max_constraints": max(r.constraints or 0 for r in college_runs),
+            "max_solve_time": max((r.solve_time or 0 for r in college_runs), default=0),
+            "max_time_limit_share": round(max(shares), 3) if shares else None,
+            "time_limit_hits": sum(1 for r in college_runs if r.hit_time_limit),
+            "infeasible_runs": sum(1 for r in college_runs if not r.feasible),
+            "peak_memory_mb": max((r.peak_memory_mb for r in college_runs if r.peak_memory_mb is not None),
+                                  default=None)
+        })
+    summary.sort(key=lambda s: (s["max_time_limit_share"] or 0, s["time_limit_hits"]), reverse=True)
+    return summary
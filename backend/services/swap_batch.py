@@ -0,0 +1,295 @@
+"""
+Batch approval of swap requests.
+
+Approving requests one at a time makes the outcome depend on the order:
+a request whose slot another request is about to vacate fails if it comes
+first, and two requests for the same slot both look fine until the second
+is approved. Here all pending requests are decided together.
+
+Each request is an action that moves its entry to the proposed slot; with
+force_swap, a request blocked by a single class of the same faculty member
+or section may instead swap with it (that class takes the old slot, as
+admin_approve_swap does). Actions are linked into a conflict graph when
+they compete for a faculty/section/room cell, vacate a cell another one
+needs, or move the same class. A request alone in its component whose
+target cells are free is approved as is; each other component is solved
+as a small CP-SAT model for the largest set of actions that leaves no
+cell more booked than it is now, preferring moves over swaps and older
+requests over newer ones.
+
+The chosen actions are applied in one transaction (moving classes are
+parked first, see park_entries), and every request gets an outcome:
+approved, swapped, conflict or invalid. Requests that are not approved
+stay pending.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from ortools.sat.python import cp_model
+
+from extensions import db
+from models import SwapRequest, Timetable
+from services.occupancy_index import get_occupancy_index, KINDS
+from services.solver_profiles import resolve_solver_params, apply_solver_params, host_worker_cap
+from utils.slot_grid import slot_from_labels, slot_labels
+
+# Seconds the solver may spend on one component of the conflict graph
+COMPONENT_TIME_LIMIT = 5.0
+
+MAX_BATCH = 1000
+
+
+def move_entry(entry, day, start_time, approved_by_id, swap_group_id=None, swapped_with_course=None):
+    """Move a timetable entry and record the audit fields of an approved swap request."""
+    entry.day = day
+    entry.start_time = start_time
+    entry.is_swapped = True
+    entry.swapped_at = datetime.utcnow()
+    entry.swapped_by_id = approved_by_id
+    entry.swap_group_id = swap_group_id
+    entry.swapped_with_course = swapped_with_course
+
+
+def park_entries(entries):
+    """
+    Take entries out of their slots and flush. Entries that move into each
+    other's slots (swaps, chains) are parked first, so no intermediate
+    UPDATE trips the unique (version, faculty/section/room, slot) constraints.
+    """
+    for entry in entries:
+        entry.day = entry.start_time = entry.slot = None
+    db.session.flush()
+
+
+def _cells(placement, slot):
+    faculty_id, section_id, room_id, _ = placement
+    return [(kind, owner, slot) for kind, owner in zip(KINDS, (faculty_id, section_id, room_id))
+            if owner is not None]
+
+
+def _actions(requests, index, force_swap):
+    """
+    Candidate actions per request: a move, and with force_swap a swap with
+    the one class blocking the target. Returns (actions, invalid outcomes).
+    """
+    actions, invalid = [], {}
+    for rank, r in enumerate(requests):
+        placement = index.entries.get(r.original_timetable_id)
+        target = slot_from_labels(r.proposed_day, r.proposed_start_time)
+        if placement is None:
+            invalid[r.id] = "The class is not part of the active timetable."
+        elif target is None:
+            invalid[r.id] = "Invalid proposed_day or proposed_start_time."
+        elif target == placement[3]:
+            invalid[r.id] = "The class is already at the proposed time."
+        if r.id in invalid:
+            continue
+        entry_id, current = r.original_timetable_id, placement[3]
+        actions.append({"request": r, "rank": rank, "kind": "move", "moves": [(entry_id, target)]})
+
+        if not force_swap:
+            continue
+        holders = {index.holder(kind, owner, target, {entry_id}) for kind, owner, _ in _cells(placement, target)}
+        holders.discard(None)
+        if len(holders) == 1:
+            partner_id = holders.pop()
+            partner = index.entries[partner_id]
+            if partner[0] == placement[0] or partner[1] == placement[1]:
+                actions.append({"request": r, "rank": rank, "kind": "swap", "partner": partner_id,
+                                "moves": [(entry_id, target), (partner_id, current)]})
+    return actions, invalid
+
+
+def _components(actions, index):
+    """Group actions that interact: shared landing cells, cells vacated for another, shared classes."""
+    parent = list(range(len(actions)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        parent[find(i)] = find(j)
+
+    first_by_key = {}
+    for i, action in enumerate(actions):
+        keys = [("request", action["request"].id)]
+        for entry_id, slot in action["moves"]:
+            keys.append(("entry", entry_id))
+            for cell in _cells(index.entries[entry_id], slot):
+                keys.append(("cell", cell))
+                # Whoever holds the cell now may be moved by another action
+                keys.extend(("entry", holder) for holder in index.holders.get(cell, ()))
+        for key in keys:
+            if key in first_by_key:
+                union(i, first_by_key[key])
+            else:
+                first_by_key[key] = i
+
+    groups = defaultdict(list)
+    for i in range(len(actions)):
+        groups[find(i)].append(actions[i])
+    return list(groups.values())
+
+
+def _solve_component(actions, index, solver_params):
+    """The chosen actions of one component (all of them, if compatible)."""
+    if len(actions) == 1:
+        action = actions[0]
+        entry_id, slot = action["moves"][0]
+        if action["kind"] == "move" and index.conflict(*index.entries[entry_id][:3], slot, {entry_id}) is None:
+            return actions, "trivial"
+
+    model = cp_model.CpModel()
+    chosen = [model.NewBoolVar(f"action_{i}") for i in range(len(actions))]
+    by_request, moved, landing = defaultdict(list), defaultdict(list), defaultdict(list)
+    for var, action in zip(chosen, actions):
+        by_request[action["request"].id].append(var)
+        for entry_id, slot in action["moves"]:
+            moved[entry_id].append(var)
+            for cell in _cells(index.entries[entry_id], slot):
+                landing[cell].append(var)
+
+    for variables in list(by_request.values()) + list(moved.values()):
+        model.Add(sum(variables) <= 1)
+    for cell, variables in landing.items():
+        # Occupants stay unless an action moves them; never book a cell more than it is now
+        occupants = index.holders.get(cell, set())
+        staying = [1 - sum(moved[o]) if o in moved else 1 for o in occupants]
+        model.Add(sum(variables) + sum(staying) <= max(1, len(occupants)))
+
+    # Lexicographic: most requests approved, then fewest swaps, then the oldest requests.
+    # Ranks are renumbered within the component so the weights stay small.
+    n = len(actions)
+    order = {rank: i for i, rank in enumerate(sorted({a["rank"] for a in actions}))}
+    rank_weight = n * n + 1
+    approval_weight = (n + 1) * rank_weight
+    model.Maximize(sum(var * (approval_weight - (rank_weight if a["kind"] == "swap" else 0) - order[a["rank"]])
+                       for var, a in zip(chosen, actions)))
+
+    solver = apply_solver_params(cp_model.CpSolver(), solver_params, COMPONENT_TIME_LIMIT)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return [], solver.StatusName(status)
+    return [a for var, a in zip(chosen, actions) if solver.Value(var)], solver.StatusName(status)
+
+
+def _conflict_message(request, final, index, moved_by):
+    """Why a request was left out, against the timetable as it will be."""
+    entry_id = request.original_timetable_id
+    if entry_id in moved_by:
+        return f"The class moves with swap request #{moved_by[entry_id]} instead."
+    target = slot_from_labels(request.proposed_day, request.proposed_start_time)
+    conflict = final.conflict(*index.entries[entry_id][:3], target, {entry_id})
+    if conflict is None:
+        return "Not approved with the rest of the batch."
+    kind, holder_id = conflict
+    holder = db.session.get(Timetable, holder_id)
+    course = holder.course.name if holder and holder.course else "another class"
+    by = f" (moved there by swap request #{moved_by[holder_id]})" if holder_id in moved_by else ""
+    if kind == "faculty":
+        return f"Faculty is already assigned to '{course}' at that time{by}."
+    if kind == "section":
+        return f"Section is already scheduled for '{course}' at that time{by}."
+    return f"Room is already booked for '{course}' at that time{by}."
+
+
+def approve_batch(college_id, approved_by, request_ids=None, force_swap=False, dry_run=False):
+    """
+    Decide pending swap requests together and apply the approved ones in
+    one transaction (unless dry_run). Returns the per-request report; the
+    caller commits.
+    """
+    query = SwapRequest.query.filter_by(college_id=college_id, status="pending")
+    if request_ids is not None:
+        query = query.filter(SwapRequest.id.in_(request_ids))
+    requests = query.order_by(SwapRequest.created_at, SwapRequest.id).limit(MAX_BATCH).all()
+
+    index = get_occupancy_index(college_id)
+    actions, invalid = _actions(requests, index, force_swap)
+    solver_params = resolve_solver_params("quick", max_workers=host_worker_cap(current_app.config))
+
+    selected, statuses = [], defaultdict(int)
+    components = _components(actions, index)
+    for component in components:
+        chosen, status = _solve_component(component, index, solver_params)
+        selected.extend(chosen)
+        statuses[status] += 1
+
+    # The timetable after the selected actions, for reporting the rest
+    final = index.copy()
+    moved_by = {}
+    for action in selected:
+        for entry_id, slot in action["moves"]:
+            final.put(entry_id, *index.entries[entry_id][:3], slot)
+            moved_by[entry_id] = action["request"].id
+
+    entries = {}
+    needed = {entry_id for a in selected for entry_id, _ in a["moves"]}
+    if needed:
+        entries = {t.timetable_id: t for t in Timetable.query.filter(Timetable.timetable_id.in_(needed))}
+    names = {entry_id: t.course.name if t.course else None for entry_id, t in entries.items()}
+    if entries and not dry_run:
+        park_entries(entries.values())
+
+    results = {}
+    for action in selected:
+        r = action["request"]
+        entry_id, target = action["moves"][0]
+        day, start_time = r.proposed_day, r.proposed_start_time
+        result = {"request_id": r.id, "timetable_id": entry_id, "outcome": "approved",
+                  "day": day, "start_time": start_time}
+        if action["kind"] == "swap":
+            partner_id = action["partner"]
+            result.update(outcome="swapped", swapped_with=partner_id,
+                          message=f"Exchanged with '{names.get(partner_id)}'.")
+        results[r.id] = result
+        if dry_run:
+            continue
+
+        if action["kind"] == "swap":
+            group_id = str(uuid.uuid4())
+            old_day, old_start_time = slot_labels(index.entries[entry_id][3])
+            move_entry(entries[entry_id], day, start_time, approved_by.id, group_id, names.get(partner_id))
+            move_entry(entries[partner_id], old_day, old_start_time, approved_by.id, group_id, names.get(entry_id))
+            r.admin_notes = (f"Swap approved in batch (exchanged with {names.get(partner_id)}) "
+                             f"by {approved_by.username}.")
+        else:
+            move_entry(entries[entry_id], day, start_time, approved_by.id)
+            r.admin_notes = f"Approved in batch by {approved_by.username}."
+        r.status = "approved"
+
+    competing = defaultdict(set)
+    for component in components:
+        ids = {a["request"].id for a in component}
+        for request_id in ids:
+            competing[request_id] = ids - {request_id}
+
+    report = []
+    for r in requests:
+        if r.id in results:
+            report.append(results[r.id])
+        elif r.id in invalid:
+            report.append({"request_id": r.id, "timetable_id": r.original_timetable_id, "outcome": "invalid",
+                           "message": invalid[r.id]})
+        else:
+            report.append({"request_id": r.id, "timetable_id": r.original_timetable_id, "outcome": "conflict",
+                           "message": _conflict_message(r, final, index, moved_by),
+                           "competing_requests": sorted(competing[r.id])})
+
+    counts = defaultdict(int)
+    for item in report:
+        counts[item["outcome"]] += 1
+    return {
+        "dry_run": dry_run,
+        "requests": len(requests),
+        "outcomes": dict(counts),
+        "components": len(components),
+        "solver_status": dict(statuses),
+        "results": report
+    }
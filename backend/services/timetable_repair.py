@@ -0,0 +1,324 @@
+"""
+Repairs of the active timetable after a disruption.
+
+A disruption is a faculty member becoming unavailable for some slots, or a
+room becoming unavailable (for some slots, or altogether). Instead of
+regenerating, only the entries it hits plus a bounded neighbourhood of
+entries around them (same section, faculty member or room, nearest in
+time first) are released; everything else stays where it is. The small
+model left is solved for the fewest changes: moving an entry to another
+slot costs more than changing only its room. If the neighbourhood is too
+tight it is doubled, a few times at most, so a repair takes about a
+second and yields a diff the admin can review before applying it.
+"""
+
+import time
+from collections import Counter, defaultdict
+from ortools.sat.python import cp_model
+
+from extensions import db
+from models import College, FacultyUnavailability
+from services.scheduler_model import TimetableModelBuilder
+from services.solver_profiles import apply_solver_params
+from services.timetable_versions import (
+    active_timetable_query, create_version, activate_version, AUDIT_FIELDS, ROW_FIELDS
+)
+from utils.slot_grid import slot_from_labels, slot_labels
+
+DISRUPTIONS = ("faculty_unavailable", "room_unavailable")
+
+# Entries released around the affected ones in the first round, the
+# solver time per round (seconds) and how often the neighbourhood doubles.
+# Large disruptions (a busy room removed) may need a longer time limit.
+NEIGHBOURHOOD_SIZE = 12
+REPAIR_TIME_LIMIT = 1.0
+MAX_REPAIR_TIME_LIMIT = 60
+MAX_ROUNDS = 3
+
+
+# --- DISRUPTIONS ---
+
+def parse_disruption(payload):
+    """Validate a disruption from a request. Raises ValueError."""
+    if not isinstance(payload, dict) or payload.get("type") not in DISRUPTIONS:
+        raise ValueError(f"'disruption.type' must be one of: {', '.join(DISRUPTIONS)}")
+    key = "faculty_id" if payload["type"] == "faculty_unavailable" else "room_id"
+    target = payload.get(key)
+    if not isinstance(target, int) or isinstance(target, bool):
+        raise ValueError(f"'disruption.{key}' must be an id")
+
+    slots = payload.get("slots")
+    if slots is None:
+        if key == "faculty_id":
+            raise ValueError("'disruption.slots' is required for faculty_unavailable")
+        return {"type": payload["type"], key: target, "slots": None}
+    if not isinstance(slots, list) or not slots:
+        raise ValueError("'disruption.slots' must be a non-empty list")
+
+    parsed = set()
+    for value in slots:
+        if isinstance(value, dict):
+            slot = slot_from_labels(value.get("day"), value.get("start_time"))
+        elif isinstance(value, int) and not isinstance(value, bool):
+            slot = value
+        else:
+            slot = None
+        if slot is None:
+            raise ValueError(f"Invalid slot {value!r}: use a slot id or {{\"day\", \"start_time\"}}")
+        parsed.add(slot)
+    return {"type": payload["type"], key: target, "slots": sorted(parsed)}
+
+
+def apply_disruption(data, disruption):
+    """The snapshot with the disruption added to its unavailability (or the room removed)."""
+    if disruption["type"] == "faculty_unavailable":
+        added = [{"faculty_id": disruption["faculty_id"], "slot": slot} for slot in disruption["slots"]]
+        return dict(data, unavailability=data["unavailability"] + added)
+    if disruption["slots"] is None:
+        return dict(data, rooms=[r for r in data["rooms"] if r["room_id"] != disruption["room_id"]])
+    added = [{"room_id": disruption["room_id"], "slot": slot} for slot in disruption["slots"]]
+    return dict(data, room_unavailability=data.get("room_unavailability", []) + added)
+
+
+def is_affected(entry, disruption):
+    if disruption["type"] == "faculty_unavailable":
+        return entry["faculty_id"] == disruption["faculty_id"] and entry["slot"] in disruption["slots"]
+    return entry["room_id"] == disruption["room_id"] and (
+        disruption["slots"] is None or entry["slot"] in disruption["slots"])
+
+
+def describe(disruption):
+    """Short label for a disruption, used on the repaired timetable version."""
+    if disruption["type"] == "faculty_unavailable":
+        return f"faculty {disruption['faculty_id']} unavailable for {len(disruption['slots'])} slot(s)"
+    if disruption["slots"] is None:
+        return f"room {disruption['room_id']} removed"
+    return f"room {disruption['room_id']} unavailable for {len(disruption['slots'])} slot(s)"
+
+
+# --- NEIGHBOURHOOD ---
+
+def nearest_entries(entries, affected, size, same_slot=False):
+    """
+    Up to size unaffected entries that share a section, faculty member or
+    room with an affected entry, closest in time to one first. Moving these
+    is what frees a slot or room for the affected entries. With same_slot,
+    entries in the slot of an affected one (holding the rooms it could move
+    to) count as well.
+    """
+    affected_ids = {e["timetable_id"] for e in affected}
+    distance = {}
+    for e in entries:
+        if e["timetable_id"] in affected_ids:
+            continue
+        for a in affected:
+            if e["section_id"] == a["section_id"] or e["faculty_id"] == a["faculty_id"] \
+                    or e["room_id"] == a["room_id"] or (same_slot and e["slot"] == a["slot"]):
+                gap = abs(e["slot"] - a["slot"])
+                distance[e["timetable_id"]] = min(gap, distance.get(e["timetable_id"], gap))
+    ranked = sorted((d, timetable_id) for timetable_id, d in distance.items())
+    chosen = {timetable_id for _, timetable_id in ranked[:size]}
+    return [e for e in entries if e["timetable_id"] in chosen]
+
+
+def _solve_neighbourhood(data, entries, released, time_limit, solver_params=None):
+    """Re-solve the released entries around the rest. Returns (status name, new entries, model stats)."""
+    released_ids = {e["timetable_id"] for e in released}
+    owners = {(e["course_id"], e["section_id"]) for e in released}
+    builder = TimetableModelBuilder(data)
+    builder.use_objective = False
+    builder.break_symmetry = False
+    builder.pin([e for e in entries if (e["course_id"], e["section_id"]) not in owners])
+    kept = [e for e in entries if (e["course_id"], e["section_id"]) in owners and e["timetable_id"] not in released_ids]
+    # Classes keep as many hours as they have now, even if that is not what
+    # their course asks for (a class never scheduled stays unscheduled)
+    builder.required_hours = Counter((e["course_id"], e["section_id"]) for e in entries)
+    builder.keep(kept).build()
+
+    # Fewest changes: keeping an entry's slot and its room both count
+    keys_by_cell = defaultdict(list)
+    for key in builder.assignments:
+        keys_by_cell[key[:3]].append(key)
+    kept_terms = []
+    for e in released:
+        kept_terms.extend(builder.assignments[key]
+                          for key in keys_by_cell.get((e["course_id"], e["section_id"], e["slot"]), []))
+        room_var = builder.assignments.get(builder.entry_key(e))
+        if room_var is not None:
+            kept_terms.append(room_var)
+    builder.model.Maximize(cp_model.LinearExpr.Sum(kept_terms))
+    builder.add_hints(released)
+    _hint_room_changes(builder, released, keys_by_cell)
+
+    solver = apply_solver_params(cp_model.CpSolver(), solver_params, time_limit)
+    status = solver.Solve(builder.model)
+    stats = {"released": len(released), "variables": len(builder.assignments),
+             "status": solver.StatusName(status), "solve_time": round(solver.WallTime(), 3)}
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver.StatusName(status), [], stats
+
+    # Drop the kept cells of the released classes again, leaving their new entries
+    leftover = defaultdict(int)
+    for e in kept:
+        leftover[(e["course_id"], e["section_id"], e["slot"], e["room_id"])] += 1
+    placed = []
+    for e in builder.extract(solver):
+        cell = (e["course_id"], e["section_id"], e["slot"], e["room_id"])
+        if (e["course_id"], e["section_id"]) not in owners:
+            continue
+        if leftover[cell]:
+            leftover[cell] -= 1
+            continue
+        placed.append(e)
+    return solver.StatusName(status), placed, stats
+
+
+def _hint_room_changes(builder, released, keys_by_cell):
+    """
+    Hint released entries that lost their cell into another free room at
+    the same slot where there is one. Moving rooms only is the cheapest
+    repair, and a complete hint spares the solver finding it.
+    """
+    used = defaultdict(int)
+    stuck = []
+    for e in released:
+        key = builder.entry_key(e)
+        if key in builder.assignments:
+            used[key[2:]] += 1
+        else:
+            stuck.append(e)
+    for e in stuck:
+        for key in keys_by_cell.get((e["course_id"], e["section_id"], e["slot"]), []):
+            room_class = key[3]
+            if used[key[2:]] < len(builder.room_class_members.get(room_class, [room_class])):
+                used[key[2:]] += 1
+                builder.model.AddHint(builder.assignments[key], 1)
+                break
+
+
+# --- DIFF ---
+
+def _position(e):
+    day, start_time = slot_labels(e["slot"])
+    return {"slot": e["slot"], "day": day, "start_time": start_time, "room_id": e["room_id"]}
+
+
+def diff_entries(released, placed):
+    """
+    Pair each released entry with its new placement, preferring the same
+    slot and room, then the same slot. Returns the changes only; an entry
+    without a partner is a removal ("to": None) or an addition ("from": None).
+    """
+    before, after = defaultdict(list), defaultdict(list)
+    for e in released:
+        before[(e["course_id"], e["section_id"])].append(e)
+    for e in placed:
+        after[(e["course_id"], e["section_id"])].append(e)
+
+    changes = []
+    for owner in sorted(set(before) | set(after)):
+        old, new = sorted(before[owner], key=lambda e: e["slot"]), sorted(after[owner], key=lambda e: e["slot"])
+        for same in (lambda a, b: (a["slot"], a["room_id"]) == (b["slot"], b["room_id"]),
+                     lambda a, b: a["slot"] == b["slot"],
+                     lambda a, b: True):
+            for a in list(old):
+                b = next((b for b in new if same(a, b)), None)
+                if b is None:
+                    continue
+                old.remove(a)
+                new.remove(b)
+                if (a["slot"], a["room_id"]) != (b["slot"], b["room_id"]):
+                    changes.append({"timetable_id": a["timetable_id"], "course_id": owner[0], "section_id": owner[1],
+                                    "faculty_id": b["faculty_id"], "from": _position(a), "to": _position(b)})
+        changes.extend({"timetable_id": a["timetable_id"], "course_id": owner[0], "section_id": owner[1],
+                        "faculty_id": a["faculty_id"], "from": _position(a), "to": None} for a in old)
+        changes.extend({"timetable_id": None, "course_id": owner[0], "section_id": owner[1],
+                        "faculty_id": b["faculty_id"], "from": None, "to": _position(b)} for b in new)
+    return changes
+
+
+def repair_timetable(data, disruption, neighbourhood=NEIGHBOURHOOD_SIZE, time_limit=REPAIR_TIME_LIMIT,
+                     solver_params=None):
+    """
+    Repair the snapshot's timetable (load_scheduler_input(include_timetable=True))
+    for a parsed disruption. Nothing is written; the result lists the changes:
+
+        {"status", "feasible", "changes": [...], "unchanged": n, "stats": {...}}
+    """
+    started = time.perf_counter()
+    entries = [e for e in data.get("timetable", []) if e["slot"] is not None]
+    affected = [e for e in entries if is_affected(e, disruption)]
+    stats = {"affected_entries": len(affected), "rounds": []}
+    if not affected:
+        return {"status": "UNCHANGED", "feasible": True, "changes": [], "unchanged": len(entries), "stats": stats}
+
+    disrupted = apply_disruption(data, disruption)
+    courses = {c["course_id"] for c in disrupted["courses"]}
+    sections = {s["id"] for s in disrupted["sections"]}
+    rooms = {r["room_id"] for r in disrupted["rooms"]}
+    # Rows left dangling by deleted courses, sections or rooms are not the repair's business
+    usable = [e for e in entries if e in affected or
+              (e["course_id"] in courses and e["section_id"] in sections and e["room_id"] in rooms)]
+
+    size = max(neighbourhood, len(affected))
+    status, placed, released = "UNKNOWN", [], affected
+    for _ in range(MAX_ROUNDS):
+        released = affected + nearest_entries(usable, affected, size,
+                                              same_slot=disruption["type"] == "room_unavailable")
+        status, placed, round_stats = _solve_neighbourhood(disrupted, usable, released, time_limit, solver_params)
+        stats["rounds"].append(round_stats)
+        if placed or status == "OPTIMAL" or len(released) == len(usable):
+            break
+        size *= 2
+
+    feasible = status in ("OPTIMAL", "FEASIBLE")
+    changes = diff_entries(released, placed) if feasible else []
+    stats["time"] = round(time.perf_counter() - started, 3)
+    return {
+        "status": status,
+        "feasible": feasible,
+        "changes": changes,
+        "unchanged": len(entries) - sum(1 for c in changes if c["timetable_id"] is not None),
+        "stats": stats
+    }
+
+
+# --- APPLYING ---
+
+def apply_repair(college_id, disruption, result, created_by_id=None):
+    """
+    Write the repaired timetable as a new active version: the active rows
+    with the result's changes applied. A faculty disruption is also stored
+    as unavailability so later generations respect it. The caller commits.
+    """
+    college = db.session.get(College, college_id)
+    changed = {c["timetable_id"] for c in result["changes"] if c["timetable_id"] is not None}
+    rows = [{f: getattr(t, f) for f in ROW_FIELDS + AUDIT_FIELDS}
+            for t in active_timetable_query(college_id).all() if t.timetable_id not in changed]
+    for c in result["changes"]:
+        if c["to"] is None:
+            continue
+        rows.append({
+            "course_id": c["course_id"],
+            "section_id": c["section_id"],
+            "faculty_id": c["faculty_id"],
+            "room_id": c["to"]["room_id"],
+            "day": c["to"]["day"],
+            "start_time": c["to"]["start_time"],
+            "slot": c["to"]["slot"]
+        })
+
+    if disruption["type"] == "faculty_unavailable":
+        known = {u.slot for u in FacultyUnavailability.query.filter_by(
+            college_id=college_id, faculty_id=disruption["faculty_id"])}
+        for slot in disruption["slots"]:
+            if slot not in known:
+                day, start_time = slot_labels(slot)
+                db.session.add(FacultyUnavailability(college_id=college_id, faculty_id=disruption["faculty_id"],
+                                                     day=day, start_time=start_time, slot=slot))
+
+    version = create_version(college_id, rows, engine="repair", label=describe(disruption),
+                             stats=dict(result["stats"], changes=len(result["changes"])),
+                             created_by_id=created_by_id,
+                             parent_version_id=college.active_timetable_version_id if college else None)
+    return activate_version(version)
@@ -0,0 +1,121 @@
+"""
+Versioned timetables.
+
+Generation writes a complete new TimetableVersion next to the live one and
+then points College.active_timetable_version_id at it, all in a single
+transaction. Readers (see utils/query_filter.py) only ever see the active
+version, so they never observe a half-written or empty timetable, and a
+failed write leaves the previous version live. Archived versions are kept
+for diffing and rollback, up to TIMETABLE_VERSIONS_KEPT per college.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import update
+
+from extensions import db
+from models import College, Timetable, TimetableVersion
+from utils.query_filter import active_timetable_criterion
+from utils.slot_grid import slot_from_labels
+from services.bulk_writer import write_timetable_rows
+
+# Swap history copied onto unchanged rows of a new version
+AUDIT_FIELDS = ("is_swapped", "swapped_at", "swapped_by_id", "swap_group_id", "swapped_with_course")
+
+ROW_FIELDS = ("course_id", "section_id", "faculty_id", "room_id", "day", "start_time", "slot")
+
+
+def all_versions_query():
+    """Timetable query that is not limited to the active version."""
+    return Timetable.query.execution_options(all_timetable_versions=True)
+
+
+def active_timetable_query(college_id=None):
+    """Rows of the active version. Explicit, so it also works where the query filter is not installed."""
+    query = all_versions_query().filter(active_timetable_criterion(Timetable))
+    if college_id is not None:
+        query = query.filter(Timetable.college_id == college_id)
+    return query
+
+
+def row_key(row):
+    """Placement identity of a row dict or Timetable object: who, where and when."""
+    get = row.get if isinstance(row, dict) else lambda f: getattr(row, f)
+    slot = get("slot")
+    if slot is None:
+        slot = slot_from_labels(get("day"), get("start_time"))
+    return (get("course_id"), get("section_id"), get("faculty_id"), get("room_id"), slot)
+
+
+def create_version(college_id, rows, engine=None, label=None, stats=None, created_by_id=None,
+                   parent_version_id=None):
+    """Insert a draft version and bulk-write its rows. The caller activates and commits."""
+    version = TimetableVersion(
+        college_id=college_id,
+        engine=engine,
+        label=label,
+        stats=stats,
+        created_by_id=created_by_id,
+        parent_version_id=parent_version_id,
+        entry_count=len(rows),
+        status="draft"
+    )
+    db.session.add(version)
+    db.session.flush()
+    write_timetable_rows(rows, college_id, version_id=version.id)
+    return version
+
+
+def activate_version(version):
+    """Make version the one readers see. Runs in the caller's transaction; the caller commits."""
+    db.session.execute(
+        update(College)
+        .where(College.id == version.college_id)
+        .values(active_timetable_version_id=version.id)
+    )
+    TimetableVersion.query.filter(
+        TimetableVersion.college_id == version.college_id,
+        TimetableVersion.status == "active",
+        TimetableVersion.id != version.id
+    ).update({"status": "archived"}, synchronize_session=False)
+    version.status = "active"
+    version.activated_at = datetime.utcnow()
+    prune_versions(version.college_id)
+    return version
+
+
+def prune_versions(college_id, keep=None):
+    """Delete the oldest archived versions (and their rows) beyond the retention limit."""
+    if keep is None:
+        keep = current_app.config.get("TIMETABLE_VERSIONS_KEPT", 10)
+    archived = TimetableVersion.query.filter_by(college_id=college_id, status="archived") \
+        .order_by(TimetableVersion.created_at.desc(), TimetableVersion.id.desc()).all()
+    expired = [v.id for v in archived[keep:]]
+    if not expired:
+        return 0
+    # Versions derived from an expired one lose their parent link
+    TimetableVersion.query.filter(TimetableVersion.parent_version_id.in_(expired)) \
+        .update({"parent_version_id": None}, synchronize_session=False)
+    Timetable.query.filter(Timetable.version_id.in_(expired)).delete(synchronize_session=False)
+    TimetableVersion.query.filter(TimetableVersion.id.in_(expired)).delete(synchronize_session=False)
+    return len(expired)
+
+
+def diff_versions(old_version_id, new_version_id):
+    """Placements added and removed between two versions of the same college."""
+    def placements(version_id):
+        rows = all_versions_query().filter(Timetable.version_id == version_id).all()
+        counts = {}
+        for t in rows:
+            counts.setdefault(row_key(t), []).append({f: getattr(t, f) for f in ROW_FIELDS})
+        return counts
+
+    old, new = placements(old_version_id), placements(new_version_id)
+    added, removed, unchanged = [], [], 0
+    for key in set(old) | set(new):
+        before, after = old.get(key, []), new.get(key, [])
+        unchanged += min(len(before), len(after))
+        added.extend(after[len(before):])
+        removed.extend(before[len(after):])
+    return {"added": added, "removed": removed, "unchanged": unchanged}
@@ -0,0 +1,226 @@
+"""
+What-if timetable scenarios.
+
+A scenario is the college's current data with overrides on top ("what if
+we add two rooms", "what if faculty 3 drops Wednesday"). It is solved like
+a normal generation but entirely in memory: no timetable or cache rows
+are written (only the run's telemetry), no e-mail is sent and the live
+timetable is left alone. The result is a summary to
+compare scenarios by: feasibility, room utilisation, faculty hours and the
+changes against the active timetable.
+
+Scenarios run as generation jobs (options["scenario"] = {"name",
+"overrides"}), so several can be solved side by side in the worker pool.
+"""
+
+import time
+from collections import Counter
+
+from flask import current_app
+from extensions import db
+from models import College
+from services.scheduler_engines import run_engine
+from services.scheduler_model import load_scheduler_input
+from services.scheduler_diagnosis import capacity_checks, MAX_REPORTED
+from services.solver_profiles import resolve_solver_params, host_worker_cap
+from services.solver_telemetry import memory_baseline, record_solver_run
+from utils.slot_grid import SlotGrid, parse_day, make_slot, slot_from_labels
+
+OVERRIDES = ("add_rooms", "remove_rooms", "faculty_unavailable", "update_courses")
+
+# Course fields a scenario may change
+COURSE_FIELDS = ("faculty_id", "hours_per_week")
+
+MAX_SCENARIOS = 5
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _list_of(overrides, key):
+    value = overrides.get(key, [])
+    if not isinstance(value, list):
+        raise ValueError(f"'{key}' must be a list")
+    return value
+
+
+def parse_overrides(overrides):
+    """
+    Validate scenario overrides and normalise them. Raises ValueError.
+
+        {"add_rooms": [{"name", "capacity", "resources"}],
+         "remove_rooms": [room_id],
+         "faculty_unavailable": [{"faculty_id", "days": [...]} or {"faculty_id", "slots": [...]}],
+         "update_courses": [{"course_id", "faculty_id"?, "hours_per_week"?}]}
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("'overrides' must be an object")
+    unknown = set(overrides) - set(OVERRIDES)
+    if unknown:
+        raise ValueError(f"Unknown override(s) {', '.join(sorted(unknown))}. Choose from: {', '.join(OVERRIDES)}")
+
+    parsed = {key: [] for key in OVERRIDES}
+    for i, room in enumerate(_list_of(overrides, "add_rooms")):
+        if not isinstance(room, dict) or not _is_id(room.get("capacity")) or room["capacity"] <= 0:
+            raise ValueError("Each added room needs a positive integer 'capacity'")
+        parsed["add_rooms"].append({"name": str(room.get("name") or f"New room {i + 1}"),
+                                    "capacity": room["capacity"], "resources": room.get("resources") or ""})
+
+    for room_id in _list_of(overrides, "remove_rooms"):
+        if not _is_id(room_id):
+            raise ValueError("'remove_rooms' must be a list of room ids")
+        parsed["remove_rooms"].append(room_id)
+
+    for item in _list_of(overrides, "faculty_unavailable"):
+        if not isinstance(item, dict) or not _is_id(item.get("faculty_id")):
+            raise ValueError("Each 'faculty_unavailable' entry needs a 'faculty_id'")
+        days = [parse_day(d) for d in item.get("days", [])]
+        if None in days:
+            raise ValueError(f"Unknown day in {item.get('days')}; use e.g. 'Wednesday' or 'Wed'")
+        slots = []
+        for value in item.get("slots", []):
+            slot = slot_from_labels(value.get("day"), value.get("start_time")) if isinstance(value, dict) \
+                else value if _is_id(value) else None
+            if slot is None:
+                raise ValueError(f"Invalid slot {value!r}: use a slot id or {{\"day\", \"start_time\"}}")
+            slots.append(slot)
+        if not days and not slots:
+            raise ValueError("Each 'faculty_unavailable' entry needs 'days' or 'slots'")
+        parsed["faculty_unavailable"].append({"faculty_id": item["faculty_id"], "days": days, "slots": slots})
+
+    for item in _list_of(overrides, "update_courses"):
+        if not isinstance(item, dict) or not _is_id(item.get("course_id")):
+            raise ValueError("Each 'update_courses' entry needs a 'course_id'")
+        changes = {k: v for k, v in item.items() if k != "course_id"}
+        bad = [k for k, v in changes.items() if k not in COURSE_FIELDS or not _is_id(v) or v < 0]
+        if bad or not changes:
+            raise ValueError(f"'update_courses' may set {', '.join(COURSE_FIELDS)} to non-negative integers")
+        parsed["update_courses"].append(dict(changes, course_id=item["course_id"]))
+    return parsed
+
+
+def apply_overrides(data, overrides):
+    """The snapshot with parsed overrides applied. Raises ValueError for ids not in the college."""
+    courses = {c["course_id"]: dict(c) for c in data["courses"]}
+    rooms = {r["room_id"]: r for r in data["rooms"]}
+    faculty = {f["faculty_id"] for f in data["faculty"]}
+    unavailability = list(data["unavailability"])
+
+    for room_id in overrides["remove_rooms"]:
+        if rooms.pop(room_id, None) is None:
+            raise ValueError(f"Room {room_id} not found")
+    # Added rooms get negative ids so they never collide with real ones
+    for i, room in enumerate(overrides["add_rooms"]):
+        rooms[-(i + 1)] = dict(room, room_id=-(i + 1))
+
+    hours = SlotGrid.from_config(data.get("grid")).hours
+    for item in overrides["faculty_unavailable"]:
+        if item["faculty_id"] not in faculty:
+            raise ValueError(f"Faculty {item['faculty_id']} not found")
+        slots = set(item["slots"]) | {make_slot(d, h) for d in item["days"] for h in hours}
+        unavailability.extend({"faculty_id": item["faculty_id"], "slot": slot} for slot in sorted(slots))
+
+    for item in overrides["update_courses"]:
+        course = courses.get(item["course_id"])
+        if course is None:
+            raise ValueError(f"Course {item['course_id']} not found")
+        if "faculty_id" in item and item["faculty_id"] not in faculty:
+            raise ValueError(f"Faculty {item['faculty_id']} not found")
+        course.update({k: v for k, v in item.items() if k != "course_id"})
+
+    return dict(data, courses=list(courses.values()), rooms=list(rooms.values()), unavailability=unavailability)
+
+
+# --- SUMMARY ---
+
+def summarize_scenario(data, entries, active_entries):
+    """Metrics of a solved scenario, compared with the active timetable."""
+    grid_size = len(SlotGrid.from_config(data.get("grid")).slots) or 1
+    booked = Counter(e["room_id"] for e in entries)
+    rooms = [{
+        "room_id": r["room_id"],
+        "name": r["name"],
+        "hours": booked.get(r["room_id"], 0),
+        "utilisation": round(booked.get(r["room_id"], 0) / grid_size, 3)
+    } for r in data["rooms"]]
+
+    hours_now = Counter(e["faculty_id"] for e in entries)
+    hours_before = Counter(e["faculty_id"] for e in active_entries)
+    faculty = [{
+        "faculty_id": f["faculty_id"],
+        "name": f["faculty_name"],
+        "hours": hours_now.get(f["faculty_id"], 0),
+        "active_hours": hours_before.get(f["faculty_id"], 0)
+    } for f in data["faculty"]]
+
+    def placement(e):
+        return (e["course_id"], e["section_id"], e["faculty_id"], e["room_id"], e["slot"])
+
+    new, old = Counter(map(placement, entries)), Counter(map(placement, active_entries))
+    unchanged = sum((new & old).values())
+    moved = {key[:2] for key in (new - old) + (old - new)}
+    return {
+        "room_utilisation": round(sum(booked.values()) / (grid_size * len(rooms)), 3) if rooms else 0.0,
+        "rooms": rooms,
+        "faculty": faculty,
+        "changes": {
+            "unchanged": unchanged,
+            "added": len(entries) - unchanged,
+            "removed": len(active_entries) - unchanged,
+            "classes_changed": len(moved)
+        }
+    }
+
+
+def run_scenario(overrides, engine="monolithic", college_id=None, progress=None, profile=None,
+                 **engine_options):
+    """
+    Solve the college's data with overrides applied, without writing
+    anything. Returns the generate_timetable_internal() result shape with
+    the summary under "scenario" (an infeasible scenario is still a result).
+    """
+    try:
+        overrides = parse_overrides(overrides)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if profile is None and college_id is not None:
+        college = db.session.get(College, college_id)
+        profile = college.solver_profile if college else None
+    try:
+        solver_params = resolve_solver_params(profile, max_workers=host_worker_cap(current_app.config))
+    except ValueError as e:
+        return {"error": str(e)}
+    engine_options.setdefault("time_limit", solver_params["max_time_in_seconds"])
+    engine_options["solver_params"] = solver_params
+
+    active = load_scheduler_input(college_id, include_timetable=True)
+    if not active["courses"] or not active["faculty"] or not active["rooms"] or not active["sections"]:
+        return {"error": "Need courses, faculty, rooms, and sections to generate timetable"}
+    try:
+        data = apply_overrides(active, overrides)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    issues = capacity_checks(data)
+    if issues:
+        return {"success": True, "message": "The scenario is infeasible", "stats": {},
+                "diagnosis": {"capacity_issues": issues[:MAX_REPORTED], "core": [], "core_status": None},
+                "scenario": {"feasible": False}}
+
+    started, baseline = time.perf_counter(), memory_baseline()
+    result = run_engine(data, engine=engine, progress=progress, **engine_options)
+    record_solver_run(college_id, engine, result, time.perf_counter() - started,
+                      time_limit=engine_options["time_limit"], kind="what_if",
+                      job_id=getattr(progress, "job_id", None), baseline=baseline)
+    stats = result["stats"]
+    if progress is not None and progress.cancelled:
+        return {"error": "Scenario was cancelled.", "cancelled": True, "stats": stats}
+    if not result["feasible"]:
+        return {"success": True, "message": "No timetable was found for the scenario", "stats": stats,
+                "scenario": {"feasible": False, "status": stats.get("status")}}
+
+    summary = summarize_scenario(data, result["entries"], active["timetable"])
+    summary.update(feasible=True, status=stats.get("status"), objective=stats.get("objective"))
+    return {"success": True, "message": "Scenario solved", "stats": stats, "scenario": summary}
@@ -0,0 +1,160 @@
+"""
+Export and replay solver instances (services/model_export.py).
+
+An instance file holds a college's anonymised scheduler inputs and the
+exact CP-SAT model the engine built from them, so a slow or failed
+generation can be reproduced and tuned without the production database.
+
+Commands:
+    export       write a college's instance file (needs the app's database)
+    info         show what an instance file contains
+    run          replay the inputs through engines and solver profiles and
+                 compare model size, timings and status side by side
+    solve-model  solve the exported model itself with CpSolver parameters
+                 overridden by name, for parameter tuning
+
+Instance files can also be added to the benchmark suite:
+    python benchmark_scheduler.py --instances college7.zip --engines two_phase
+
+Usage:
+    python solver_instance.py export --college-id 7 --engine two_phase -o college7.zip
+    python solver_instance.py info college7.zip
+    python solver_instance.py run college7.zip --engines monolithic,interval --profiles quick,balanced
+    python solver_instance.py solve-model college7.zip --param num_workers=8 --param linearization_level=2
+"""
+
+import sys
+import json
+import argparse
+import time
+
+from services.model_export import load_instance, solve_model
+from services.scheduler_engines import run_engine, ENGINES
+from services.solver_profiles import SOLVER_PROFILES, resolve_solver_params, host_worker_cap
+
+
+def _split(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def export(args):
+    from app import create_app
+    from services.model_export import export_college
+
+    app = create_app()
+    with app.app_context():
+        try:
+            meta = export_college(args.output, args.college_id, args.engine, args.profile, args.warm_start)
+        except ValueError as e:
+            sys.exit(str(e))
+    size = meta["size"]
+    print(f"Wrote {args.output}: {size['courses']} courses, {size['sections']} sections, {size['rooms']} rooms, "
+          f"{size['model_variables']} variables, {size['model_constraints']} constraints ({args.engine})")
+
+
+def info(args):
+    instance = load_instance(args.instance, with_model=False)
+    print(json.dumps({k: v for k, v in instance.items() if k != "snapshot"}, indent=2))
+
+
+def replay(args):
+    """Solve the instance's inputs with each engine and profile; returns the result records."""
+    instance = load_instance(args.instance, with_model=False)
+    engines = _split(args.engines) or [instance["engine"]]
+    profiles = _split(args.profiles) or [None]
+    unknown = [e for e in engines if e not in ENGINES] + [p for p in profiles if p and p not in SOLVER_PROFILES]
+    if unknown:
+        sys.exit(f"Unknown engine(s) or profile(s): {', '.join(unknown)}")
+    time_limit = args.time_limit or instance["options"].get("time_limit") or 30.0
+
+    results = []
+    print(f"{'engine':<12} {'profile':<10} {'vars':>8} {'build':>7} {'solve':>7} {'total':>7} {'objective':>10}  status")
+    for engine in engines:
+        for profile in profiles:
+            # No profile replays with the parameters the instance was exported with
+            solver_params = resolve_solver_params(profile, max_workers=host_worker_cap()) if profile \
+                else instance["solver_params"]
+            # changed_courses, inner, ... belong to the exported engine
+            options = {k: v for k, v in instance["options"].items()
+                       if k != "time_limit" and engine == instance["engine"]}
+            started = time.perf_counter()
+            stats = run_engine(instance["snapshot"], engine=engine, time_limit=time_limit,
+                               solver_params=solver_params, **options)["stats"]
+            record = {
+                "engine": engine,
+                "profile": profile or (solver_params or {}).get("profile"),
+                "variables": stats.get("variables"),
+                "build_time": stats.get("build_time"),
+                "solve_time": stats.get("solve_time"),
+                "total_time": round(time.perf_counter() - started, 3),
+                "objective": stats.get("objective"),
+                "status": stats.get("status")
+            }
+            results.append(record)
+            print(f"{engine:<12} {str(record['profile']):<10} {record['variables'] or 0:>8} "
+                  f"{record['build_time'] or 0:>6.2f}s {record['solve_time'] or 0:>6.2f}s "
+                  f"{record['total_time']:>6.2f}s {str(record['objective']):>10}  {record['status']}")
+
+    source = instance.get("source_stats") or {}
+    if source.get("status"):
+        print(f"Exported run: {source['status']} in {source.get('solve_time')}s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"instance": args.instance, "time_limit": time_limit, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return results
+
+
+def _parse_params(pairs):
+    params = {}
+    for pair in pairs or []:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            sys.exit(f"Parameters are name=value, got '{pair}'")
+        params[name.strip()] = value.strip()
+    return params
+
+
+def solve(args):
+    instance = load_instance(args.instance)
+    try:
+        stats = solve_model(instance["model"], instance["solver_params"],
+                            args.time_limit or instance["options"].get("time_limit"), _parse_params(args.param))
+    except (AttributeError, ValueError) as e:
+        sys.exit(f"Invalid solver parameter: {e}")
+    print(json.dumps(stats, indent=2))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and replay timetable solver instances")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("export", help="export a college's solver instance")
+    p.add_argument("--college-id", type=int, required=True)
+    p.add_argument("--engine", default="monolithic", help=f"one of: {', '.join(ENGINES)}")
+    p.add_argument("--profile", help="solver profile (default: the college's)")
+    p.add_argument("--warm-start", action="store_true", help="include the active timetable as hints")
+    p.add_argument("-o", "--output", required=True, help="instance file to write (.zip)")
+    p.set_defaults(func=export)
+
+    p = commands.add_parser("info", help="show an instance file's metadata")
+    p.add_argument("instance")
+    p.set_defaults(func=info)
+
+    p = commands.add_parser("run", help="replay an instance with engines and profiles")
+    p.add_argument("instance")
+    p.add_argument("--engines", help="comma-separated engines (default: the exported engine)")
+    p.add_argument("--profiles", help="comma-separated solver profiles (default: the exported parameters)")
+    p.add_argument("--time-limit", type=float, help="seconds per solve (default: the exported limit)")
+    p.add_argument("--output", help="write the results to this JSON file")
+    p.set_defaults(func=replay)
+
+    p = commands.add_parser("solve-model", help="solve the exported CP-SAT model with parameter overrides")
+    p.add_argument("instance")
+    p.add_argument("--param", action="append", metavar="NAME=VALUE", help="CpSolver parameter, repeatable")
+    p.add_argument("--time-limit", type=float, help="seconds (default: the exported limit)")
+    p.set_defaults(func=solve)
+
+    args = parser.parse_args()
+    args.func(args)
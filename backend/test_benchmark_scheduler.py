@@ -0,0 +1,33 @@
+"""
+Tests for the scheduler benchmark harness.
+Run with: python -m pytest test_benchmark_scheduler.py
+"""
+
+from benchmark_scheduler import SUITE, benchmark_case, diff_results
+
+
+def test_benchmark_case_records_machine_readable_metrics():
+    record = benchmark_case("small", dict(SUITE["small"], seed=1), "two_phase", time_limit=10.0)
+
+    assert record["status"] in ("OPTIMAL", "FEASIBLE")
+    assert record["variables"] > 0 and record["constraints"] > 0
+    for metric in ("build_time", "solve_time", "total_time"):
+        assert record[metric] >= 0
+    assert record["peak_rss_mb"] is None or record["peak_rss_mb"] > 0
+
+    # Same seed, same model
+    again = benchmark_case("small", dict(SUITE["small"], seed=1), "two_phase", time_limit=10.0)
+    assert (again["variables"], again["constraints"]) == (record["variables"], record["constraints"])
+
+
+def test_diff_flags_slowdowns_and_lost_feasibility_only():
+    def report(solve_time, status, rss):
+        return {"results": [{"case": "small", "engine": "two_phase", "service": False, "profile": None,
+                             "solve_time": solve_time, "status": status, "peak_rss_mb": rss,
+                             "variables": 100, "constraints": 200}]}
+
+    baseline = report(1.0, "OPTIMAL", 100.0)
+    assert diff_results(baseline, report(1.1, "OPTIMAL", 104.0), threshold=0.2) == []
+
+    regressions = diff_results(baseline, report(2.0, "INFEASIBLE", 160.0), threshold=0.2)
+    assert {r["metric"] for r in regressions} == {"solve_time", "status", "peak_rss_mb"}
@@ -0,0 +1,110 @@
+"""
+Tests for background timetable generation jobs.
+Run with: python -m pytest test_generation_jobs.py
+"""
+
+import time
+import inspect
+import threading
+
+from extensions import db
+from benchmark_scheduler import make_synthetic_college
+from services.scheduler_engines import SolveProgress, run_engine
+
+
+def test_generate_route_queues_job_that_persists_timetable(app, college_id):
+    from models import GenerationJob, Timetable, User
+    from routes.admin_routes import generate_timetable
+    from services.generation_jobs import get_backend
+
+    with app.test_request_context(method="POST", json={"engine": "two_phase"}):
+        admin = User(college_id=college_id, username="admin", password_hash="x", role="admin")
+        db.session.add(admin)
+        db.session.commit()
+
+        # The request only queues the job; the solve runs in the worker pool
+        response, status = inspect.unwrap(generate_timetable)(admin)
+        assert status == 202
+        job_id = response.get_json()["job_id"]
+        assert db.session.get(GenerationJob, job_id).requested_by_id == admin.id
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            db.session.expire_all()
+            job = db.session.get(GenerationJob, job_id)
+            if job.is_finished:
+                break
+            time.sleep(0.5)
+
+        try:
+            assert job.status == "succeeded", job.error
+            assert job.progress["phase"] == "finished"
+            assert job.progress["variables"] > 0
+            assert Timetable.query.filter_by(college_id=college_id).count() == 9
+        finally:
+            get_backend().shutdown()
+
+
+def test_cancel_stops_running_search():
+    data = make_synthetic_college(departments=4, years=4, sections_per_year=2,
+                                  courses_per_year=5, rooms=20)
+    progress = SolveProgress()
+    outcome = {}
+
+    worker = threading.Thread(target=lambda: outcome.update(
+        run_engine(data, engine="monolithic", time_limit=60.0, progress=progress)))
+    worker.start()
+    while progress.snapshot()["phase"] != "solving":
+        time.sleep(0.1)
+
+    started = time.time()
+    progress.cancel()
+    worker.join(timeout=30)
+
+    assert not worker.is_alive()
+    assert time.time() - started < 30
+    assert progress.cancelled
+
+
+def test_what_if_scenarios_run_in_pool_without_touching_timetable(app, college_id, monkeypatch):
+    from models import GenerationJob, Timetable, TimetableVersion
+    from services import scheduler_service
+    from services import generation_jobs
+    from services.generation_jobs import submit_generation_job, get_backend
+
+    monkeypatch.setattr(generation_jobs, "_backend", None)  # a pool for this test's database
+    app.config["GENERATION_WORKERS"] = 2
+    with app.app_context():
+        scheduler_service.generate_timetable_internal(engine="monolithic", college_id=college_id)
+        rows = Timetable.query.filter_by(college_id=college_id).count()
+
+        faculty_id = Timetable.query.first().faculty_id
+        scenarios = {
+            "more rooms": {"add_rooms": [{"name": "Annex", "capacity": 40}]},
+            "no wednesday": {"faculty_unavailable": [{"faculty_id": faculty_id, "days": ["Wednesday"]}]},
+            "overbooked": {"remove_rooms": [1, 2, 3]}
+        }
+        job_ids = {name: submit_generation_job(college_id, options={"scenario": {"name": name, "overrides": o}}).id
+                   for name, o in scenarios.items()}
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            db.session.expire_all()
+            jobs = {name: db.session.get(GenerationJob, job_id) for name, job_id in job_ids.items()}
+            if all(job.is_finished for job in jobs.values()):
+                break
+            time.sleep(0.5)
+
+        try:
+            assert all(job.status == "succeeded" for job in jobs.values()), [j.error for j in jobs.values()]
+            annex = jobs["more rooms"].result["scenario"]
+            assert annex["feasible"] and any(r["name"] == "Annex" for r in annex["rooms"])
+            assert sum(f["hours"] for f in annex["faculty"]) == rows
+            assert 0 < annex["room_utilisation"] <= 1
+            assert annex["changes"]["unchanged"] + annex["changes"]["removed"] == rows
+            assert jobs["no wednesday"].result["scenario"]["feasible"]
+            assert jobs["overbooked"].result["scenario"] == {"feasible": False}
+
+            # Nothing was written: same rows, still a single version
+            assert Timetable.query.filter_by(college_id=college_id).count() == rows
+            assert TimetableVersion.query.filter_by(college_id=college_id).count() == 1
+        finally:
+            get_backend().shutdown()
@@ -0,0 +1,58 @@
+"""
+Tests for solver instance export and replay.
+Run with: python -m pytest test_model_export.py
+"""
+
+import io
+
+from benchmark_scheduler import make_synthetic_college
+from services.scheduler_engines import run_engine
+
+
+def test_instance_round_trip_is_anonymised_and_replays():
+    from services.model_export import export_instance, load_instance, build_model, solve_model
+
+    data = make_synthetic_college(departments=1, years=2, sections_per_year=2, courses_per_year=3, rooms=5)
+    data["faculty"][0]["email"] = "someone@example.edu"
+    buffer = io.BytesIO()
+    meta = export_instance(buffer, data, "two_phase", {"time_limit": 10, "progress": object()},
+                           {"num_workers": 1, "profile": "quick"}, {"status": "UNKNOWN", "solve_time": 10.0})
+    assert meta["options"] == {"time_limit": 10}  # runtime objects are dropped
+    buffer.seek(0)
+    instance = load_instance(buffer)
+
+    snapshot = instance["snapshot"]
+    assert instance["engine"] == "two_phase" and instance["source_stats"]["status"] == "UNKNOWN"
+    assert {f["email"] for f in snapshot["faculty"]} == {None}
+    assert all(f["faculty_name"] == f"Faculty {f['faculty_id']}" for f in snapshot["faculty"])
+    assert all(c["name"] == f"Course {c['course_id']}" for c in snapshot["courses"])
+    # What the solver reads is unchanged
+    assert [r["capacity"] for r in snapshot["rooms"]] == [r["capacity"] for r in data["rooms"]]
+    assert [c["faculty_id"] for c in snapshot["courses"]] == [c["faculty_id"] for c in data["courses"]]
+
+    # The stored model is the one the engine builds
+    assert str(instance["model"].Proto()) == str(build_model(data, "two_phase").Proto())
+    stats = solve_model(instance["model"], instance["solver_params"], 10, {"cp_model_presolve": "false"})
+    assert stats["status"] in ("OPTIMAL", "FEASIBLE")
+    replay = run_engine(snapshot, engine="interval", time_limit=10)
+    assert replay["feasible"]
+
+
+def test_college_export_and_dump_of_failed_runs(app, college_id, tmp_path):
+    from services.model_export import export_college, dump_problem_run, load_instance
+
+    app.config["SOLVER_EXPORT_DIR"] = str(tmp_path / "instances")
+    with app.app_context():
+        path = str(tmp_path / "college.zip")
+        meta = export_college(path, college_id, engine="monolithic", profile="quick")
+        assert meta["size"]["courses"] == 3 and meta["solver_params"]["profile"] == "quick"
+        data = load_instance(path, with_model=False)["snapshot"]
+        assert data["college_id"] is None
+        assert {r["name"] for r in data["rooms"]}.isdisjoint({"R0", "R1", "R2"})
+
+        options = {"time_limit": 5}
+        feasible = {"feasible": True, "entries": [], "stats": {"status": "OPTIMAL"}}
+        assert dump_problem_run(college_id, data, "monolithic", options, feasible) is None
+        failed = {"feasible": False, "entries": [], "stats": {"status": "UNKNOWN"}}
+        dumped = dump_problem_run(college_id, data, "monolithic", options, failed)
+        assert dumped and load_instance(dumped)["source_stats"] == {"status": "UNKNOWN"}
@@ -0,0 +1,116 @@
+"""
+Tests for the in-memory occupancy index.
+Run with: python -m pytest test_occupancy_index.py
+"""
+
+from extensions import db
+
+
+def test_index_checks_conflicts_with_exclusions_and_free_slots():
+    from services.occupancy_index import OccupancyIndex
+
+    index = OccupancyIndex(college_id=1, version_id=1)
+    index.put(1, 10, 20, 30, 33)   # faculty 10, section 20, room 30, Monday 09:00
+    index.put(2, 11, 21, 30, 34)
+    index.put(3, 10, 22, 31, 34)
+
+    assert index.conflict(10, 29, 39, 33) == ("faculty", 1)
+    assert index.conflict(19, 21, 39, 34) == ("section", 2)
+    assert index.conflict(19, 29, 30, 33) == ("room", 1)
+    assert index.conflict(19, 29, 39, 33) is None
+    # Both halves of a swap move together
+    assert index.conflict(10, 20, 30, 34, exclude={1, 3}) == ("room", 2)
+    assert index.conflict(10, 20, 31, 34, exclude={1, 3}) is None
+
+    assert index.free_slots(range(33, 37), faculty_id=10, room_id=30) == [35, 36]
+    assert index.free_slots(range(33, 37), faculty_id=10, exclude={3}) == [34, 35, 36]
+    assert index.free_rooms(34, [30, 31, 32]) == [32]
+
+    index.put(1, 10, 20, 30, 35)   # moved
+    index.remove(3)
+    assert index.free_slots(range(33, 37), faculty_id=10) == [33, 34, 36]
+
+    # A copy is updated without touching the original
+    copy = index.copy()
+    copy.put(4, 12, 21, 30, 33)
+    copy.remove(2)
+    assert copy.conflict(19, 29, 30, 33) == ("room", 4) and copy.holder("room", 30, 34) is None
+    assert index.conflict(19, 29, 30, 33) is None and index.holder("room", 30, 34) == 2
+
+
+def test_conflict_checks_follow_commits_rollbacks_and_other_processes(app, college_id):
+    from models import Timetable, TimetableVersion
+    from services import scheduler_service
+    from services.occupancy_index import get_occupancy_index, clear_occupancy_indexes
+    from utils.timetable_utils import check_for_conflict
+    from utils.slot_grid import SlotGrid, slot_labels
+
+    with app.app_context():
+        clear_occupancy_indexes()
+        version_id = scheduler_service.generate_timetable_internal(
+            engine="two_phase", college_id=college_id)["stats"]["version_id"]
+        query = Timetable.query.filter_by(version_id=version_id).order_by(Timetable.timetable_id)
+        first, *others = query.all()
+
+        # The one section has a class in every booked slot
+        booked = others[0]
+        reason, conflicting = check_for_conflict(first, booked.day, booked.start_time)
+        assert conflicting.slot == booked.slot and "already" in reason
+        index = get_occupancy_index(college_id)
+        free = index.free_slots(range(168), section_id=first.section_id)
+        assert first.slot not in free and booked.slot not in free
+
+        # A committed move replaces the cached index with an updated copy,
+        # leaving the one already handed out as it was
+        slot = index.free_slots(SlotGrid().slots, first.faculty_id, first.section_id, first.room_id)[0]
+        day, hour = slot_labels(slot)
+        assert check_for_conflict(first, day, hour) == (None, None)
+        first.day, first.start_time = day, hour
+        db.session.commit()
+        assert index.entries[first.timetable_id][3] != first.slot and index.revision == 0
+        updated = get_occupancy_index(college_id)
+        assert updated is not index and updated.entries[first.timetable_id][3] == first.slot
+        assert updated.revision == db.session.get(TimetableVersion, version_id).revision == 1
+        assert check_for_conflict(others[1], day, hour)[1].timetable_id == first.timetable_id
+
+        # A rolled back move is not applied
+        others[1].day, others[1].start_time = "Saturday", "09:00"
+        db.session.flush()
+        db.session.rollback()
+        assert get_occupancy_index(college_id) is updated
+        assert check_for_conflict(first, "Saturday", "09:00") == (None, None)
+
+        # A move made elsewhere bumps the revision, so the index is rebuilt
+        db.session.execute(db.update(Timetable.__table__).where(
+            Timetable.__table__.c.timetable_id == others[2].timetable_id).values(day="Saturday", slot=129))
+        db.session.execute(db.update(TimetableVersion.__table__).values(revision=2))
+        db.session.commit()
+        assert get_occupancy_index(college_id) is not updated
+        assert check_for_conflict(first, "Saturday", "09:00")[1].timetable_id == others[2].timetable_id
+
+
+def test_alternatives_are_conflict_free_and_least_disruptive_first(app, college_id):
+    from models import Timetable
+    from services import scheduler_service
+    from services.occupancy_index import get_occupancy_index
+    from services.slot_suggestions import suggest_alternatives
+    from utils.slot_grid import SlotGrid
+
+    with app.app_context():
+        scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        entry = Timetable.query.order_by(Timetable.timetable_id).first()
+        index = get_occupancy_index(college_id)
+
+        alternatives = suggest_alternatives(entry)
+        moves = [a for a in alternatives if a["type"] == "move"]
+        swaps = [a for a in alternatives if a["type"] == "swap"]
+        # Every slot of the default grid the section's 9 classes leave free, in any of the three rooms
+        assert len(moves) == (len(SlotGrid().slots) - 9) * 3
+        for a in moves:
+            assert index.conflict(entry.faculty_id, entry.section_id, a["room_id"], a["slot"],
+                                  {entry.timetable_id}) is None
+        # The section's other classes can trade places with it
+        assert swaps and all(a["swap_with"]["section_id"] == entry.section_id for a in swaps)
+        assert alternatives[:len(moves)] == moves
+        assert not moves[0]["room_changed"] and not moves[0]["day_changed"]
+        assert suggest_alternatives(entry, limit=5) == alternatives[:5]
@@ -0,0 +1,91 @@
+"""
+Tests for optimistic concurrency on timetable edits and swaps.
+Run with: python -m pytest test_optimistic_locking.py
+"""
+
+import inspect
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from extensions import db
+
+
+def test_stale_updates_and_double_bookings_are_rejected(app, college_id):
+    from models import Timetable
+    from services import scheduler_service
+    from utils.timetable_utils import is_write_conflict
+
+    with app.app_context():
+        scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        first, second = Timetable.query.order_by(Timetable.timetable_id).limit(2).all()
+        assert first.row_version == 1
+
+        # Another writer updated the row since it was read
+        db.session.execute(db.update(Timetable.__table__)
+                           .where(Timetable.__table__.c.timetable_id == first.timetable_id)
+                           .values(row_version=2, is_swapped=True))
+        first.swapped_with_course = "C9"
+        with pytest.raises(StaleDataError) as stale:
+            db.session.commit()
+        assert is_write_conflict(stale.value)
+        db.session.rollback()
+
+        # The one section cannot be in two classes at once
+        first = db.session.get(Timetable, first.timetable_id)
+        first.day, first.start_time = second.day, second.start_time
+        with pytest.raises(IntegrityError) as booked:
+            db.session.commit()
+        assert is_write_conflict(booked.value)
+        db.session.rollback()
+
+
+def test_routes_answer_lost_races_with_409(app, college_id):
+    from models import SwapRequest, Timetable, User
+    from services import scheduler_service
+    from routes.admin_routes import admin_approve_swap
+    from routes.timetable_routes import update_timetable_entry
+
+    with app.app_context():
+        scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        admin = User(college_id=college_id, username="admin", password_hash="x", role="admin")
+        db.session.add(admin)
+        first, second = Timetable.query.order_by(Timetable.timetable_id).limit(2).all()
+        swap = SwapRequest(college_id=college_id, requesting_faculty_id=first.faculty_id,
+                           original_timetable_id=first.timetable_id,
+                           proposed_day=second.day, proposed_start_time=second.start_time)
+        db.session.add(swap)
+        db.session.commit()
+        first_slot, second_slot = first.slot, second.slot
+        admin_id, swap_id, entry_id, other_id = admin.id, swap.id, first.timetable_id, second.timetable_id
+
+    approve = inspect.unwrap(admin_approve_swap)
+    update = inspect.unwrap(update_timetable_entry)
+
+    with app.test_request_context(json={"force_swap": True, "row_version": 0}):
+        _, status = approve(db.session.get(User, admin_id), swap_id)
+        assert status == 409
+
+    # Both classes leave their slots before either takes the other's
+    with app.test_request_context(json={"force_swap": True, "row_version": 1}):
+        response = approve(db.session.get(User, admin_id), swap_id)
+        assert "Swap successful" in response.get_json()["message"]
+        moved, other = db.session.get(Timetable, entry_id), db.session.get(Timetable, other_id)
+        assert (moved.slot, other.slot) == (second_slot, first_slot)
+        row_version, room_id, other_day, other_start = moved.row_version, moved.room_id, other.day, other.start_time
+        assert row_version > 1
+
+    # An edit made against an older copy of the entry
+    with app.test_request_context(json={"room_id": room_id, "row_version": row_version - 1}):
+        response, status = update(db.session.get(User, admin_id), entry_id)
+        assert status == 409 and response.get_json()["retryable"]
+
+    # An edit that would double-book the section
+    with app.test_request_context(json={"day": other_day, "start_time": other_start,
+                                        "row_version": row_version}):
+        response, status = update(db.session.get(User, admin_id), entry_id)
+        assert status == 409 and response.get_json()["retryable"]
+
+    with app.app_context():
+        assert db.session.get(Timetable, entry_id).slot == second_slot
@@ -0,0 +1,44 @@
+"""
+Tests for infeasibility diagnosis.
+Run with: python -m pytest test_scheduler_diagnosis.py
+"""
+
+import time
+
+from benchmark_scheduler import make_synthetic_college
+from services.scheduler_model import TIME_SLOTS
+from services.scheduler_diagnosis import capacity_checks, diagnose_infeasibility
+
+
+def test_capacity_checks_name_overloaded_section_and_faculty():
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=1,
+                                  courses_per_year=3, rooms=4, unavailability_density=0)
+    assert capacity_checks(data) == []
+
+    data["courses"][0]["hours_per_week"] = 46  # more than the 45 slots in a week
+    kinds = {(i["kind"], i.get("section_id"), i.get("faculty_id")) for i in capacity_checks(data)}
+    assert ("section_overload", 1, None) in kinds
+    assert ("faculty_overload", None, data["courses"][0]["faculty_id"]) in kinds
+
+
+def test_core_points_at_clashing_availability():
+    data = make_synthetic_college(departments=2, years=1, sections_per_year=1,
+                                  courses_per_year=3, rooms=6, unavailability_density=0)
+    # Two courses of one section whose faculty are only free in the same three slots
+    first, second = [c for c in data["courses"] if c["dept_id"] == 1][:2]
+    for course in (first, second):
+        for slot in TIME_SLOTS[3:]:
+            data["unavailability"].append({"faculty_id": course["faculty_id"], "slot": slot})
+
+    started = time.perf_counter()
+    diagnosis = diagnose_infeasibility(data, time_limit=10.0)
+    assert time.perf_counter() - started < 10
+
+    assert diagnosis["capacity_issues"] == []
+    assert diagnosis["core_status"] == "INFEASIBLE"
+    core = {(c["kind"], c.get("course_id"), c.get("faculty_id")) for c in diagnosis["core"]}
+    assert ("unavailable", None, first["faculty_id"]) in core
+    assert ("unavailable", None, second["faculty_id"]) in core
+    # Nothing from the untouched department
+    assert not any(c.get("course_id") not in (None, first["course_id"], second["course_id"])
+                   for c in diagnosis["core"])
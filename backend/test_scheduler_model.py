@@ -0,0 +1,389 @@
+"""
+Tests for the index-driven timetable model builder.
+Run with: python -m pytest test_scheduler_model.py
+"""
+
+from collections import Counter
+
+from flask import Flask
+from ortools.sat.python import cp_model
+from sqlalchemy import event
+
+from extensions import db
+from benchmark_scheduler import make_synthetic_college
+from services.scheduler_model import TimetableModelBuilder, load_scheduler_input
+from utils.slot_grid import slot_from_labels, slot_labels
+
+
+def _solve(data):
+    builder = TimetableModelBuilder(data).build()
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 20.0
+    status = solver.Solve(builder.model)
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return builder, builder.extract(solver)
+
+
+def test_solution_respects_hard_constraints():
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2,
+                                  courses_per_year=3, rooms=6, unavailability_density=0.1)
+    builder, entries = _solve(data)
+
+    hours = Counter((e["course_id"], e["section_id"]) for e in entries)
+    for c in data["courses"]:
+        for s in builder.sections_for(c):
+            assert hours[(c["course_id"], s["id"])] == c["hours_per_week"]
+
+    assert max(Counter((e["slot"], e["room_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["faculty_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["section_id"]) for e in entries).values()) == 1
+
+    unavailable = {(u["faculty_id"], u["slot"]) for u in data["unavailability"]}
+    assert not any((e["faculty_id"], e["slot"]) in unavailable for e in entries)
+
+
+def test_fixed_course_is_pinned():
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=1,
+                                  courses_per_year=2, rooms=3, unavailability_density=0)
+    course = data["courses"][0]
+    course.update(is_fixed=True, fixed_slot=slot_from_labels("Wed", "11"), fixed_room_id=2)
+
+    _, entries = _solve(data)
+    assert any(e["course_id"] == course["course_id"] and slot_labels(e["slot"]) == ("Wednesday", "11:00")
+               and e["room_id"] == 2
+               for e in entries)
+
+
+def test_pruning_drops_infeasible_combinations():
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=1,
+                                  courses_per_year=2, rooms=5, unavailability_density=0)
+    data["sections"][0]["student_count"] = 50
+    data["rooms"][0]["capacity"] = 20            # too small for the section
+    lecture, lab = data["courses"]
+    lecture["type"], lab["type"] = "theory", "Lab"
+    data["unavailability"].append({"faculty_id": lecture["faculty_id"], "slot": slot_from_labels("Mon", "09")})
+
+    builder = TimetableModelBuilder(data).build()
+    keys = builder.assignments.keys()
+
+    assert not any(room_id == 1 for (_, _, _, room_id) in keys)
+    assert {room_id for (cid, _, _, room_id) in keys if cid == lab["course_id"]} == {5}
+    # Only lab courses are held to lab rooms
+    assert 5 in {room_id for (cid, _, _, room_id) in keys if cid == lecture["course_id"]}
+    assert not any(cid == lecture["course_id"] and slot == 9 for (cid, _, slot, _) in keys)
+    assert "unavailability" not in builder.stats()["constraints"]
+    assert builder.stats()["pruned_variables"] > 0
+
+
+def test_lab_tagged_rooms_keep_lecture_inputs_feasible():
+    from services.scheduler_model import is_lab_room
+
+    # 48 lecture hours do not fit one room's 45 slots
+    data = make_synthetic_college(departments=1, years=4, sections_per_year=1, courses_per_year=4,
+                                  rooms=4, lab_share=0, unavailability_density=0)
+    for room in data["rooms"]:
+        room["capacity"] = 100
+    _solve(data)
+
+    # Neither a computer nor "lab" inside a longer word makes a lab
+    data["rooms"][0]["name"] = "Collaboration Hall"
+    data["rooms"][1]["resources"] = "Projector, Computer"
+    assert not any(is_lab_room(r) for r in data["rooms"])
+
+    for room in data["rooms"][:3]:
+        room["resources"] = "Projector, Lab"
+    assert [is_lab_room(r) for r in data["rooms"]] == [True, True, True, False]
+    builder, entries = _solve(data)
+    assert len(entries) == 48 and not builder.warnings
+
+
+def test_loader_issues_one_query_per_table():
+    from models import College, Department, Faculty, Course, Section, Classroom
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        college = College(name="Bench College", college_code="BENCH")
+        db.session.add(college)
+        db.session.flush()
+        dept = Department(dept_name="CSE", college_id=college.id)
+        db.session.add(dept)
+        db.session.flush()
+        for i in range(3):
+            f = Faculty(faculty_name=f"F{i}", college_id=college.id, dept_id=dept.id)
+            db.session.add(f)
+            db.session.flush()
+            db.session.add(Course(name=f"C{i}", type="theory", year=1, dept_id=dept.id,
+                                  faculty_id=f.faculty_id, college_id=college.id))
+            db.session.add(Section(name=chr(ord("A") + i), year=1, dept_id=dept.id, college_id=college.id))
+            db.session.add(Classroom(name=f"R{i}", capacity=40, college_id=college.id))
+        db.session.commit()
+        college_id = college.id
+        db.session.expunge_all()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            data = load_scheduler_input(college_id=college_id)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        assert len(data["courses"]) == 3 and len(data["sections"]) == 3
+        assert len(statements) == 7
+        db.drop_all()
+
+
+def test_two_phase_engine_assigns_valid_rooms():
+    from services.scheduler_engines import run_engine
+
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2,
+                                  courses_per_year=3, rooms=6, unavailability_density=0.1)
+    result = run_engine(data, engine="two_phase", time_limit=20.0)
+    assert result["feasible"]
+
+    entries = result["entries"]
+    builder = TimetableModelBuilder(data)
+    builder.build_indexes()
+    hours = Counter((e["course_id"], e["section_id"]) for e in entries)
+    for c in data["courses"]:
+        for s in builder.sections_for(c):
+            assert hours[(c["course_id"], s["id"])] == c["hours_per_week"]
+            assert all(e["room_id"] in builder.candidate_rooms(c, s)
+                       for e in entries if e["course_id"] == c["course_id"] and e["section_id"] == s["id"])
+
+    assert max(Counter((e["slot"], e["room_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["faculty_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["section_id"]) for e in entries).values()) == 1
+
+
+def test_match_rooms_reports_unmatched():
+    from services.scheduler_engines import match_rooms
+
+    matching, unmatched = match_rooms([("a", {1, 2}), ("b", {1}), ("c", {1})])
+    assert matching["b"] == 1 or matching["c"] == 1
+    assert matching["a"] == 2
+    assert len(unmatched) == 1
+
+
+def test_incremental_change_keeps_untouched_entries():
+    from services.scheduler_engines import run_engine
+
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2,
+                                  courses_per_year=3, rooms=6, unavailability_density=0.05)
+    _, entries = _solve(data)
+    data["timetable"] = [dict(e, timetable_id=i) for i, e in enumerate(entries)]
+
+    # The faculty of one class becomes unavailable at one of its slots
+    moved = entries[0]
+    data["unavailability"].append({"faculty_id": moved["faculty_id"], "slot": moved["slot"]})
+
+    result = run_engine(data, engine="incremental", time_limit=20.0)
+    assert result["feasible"]
+    assert not result["stats"]["fallback"]
+    assert result["stats"]["pinned_entries"] > 0
+
+    after = {(e["course_id"], e["section_id"], e["slot"], e["room_id"]) for e in result["entries"]}
+    assert (moved["course_id"], moved["section_id"], moved["slot"], moved["room_id"]) not in after
+    assert max(Counter((e["slot"], e["faculty_id"]) for e in result["entries"]).values()) == 1
+    assert result["stats"]["moved_entries"] < len(entries) // 2
+
+
+def test_warm_start_hints_each_variable_once():
+    from services.scheduler_engines import run_engine
+
+    data = make_synthetic_college(departments=1, years=2, sections_per_year=2, courses_per_year=3, rooms=5)
+    _, entries = _solve(data)
+    # A legacy double booking: the same class twice in one slot
+    data["timetable"] = [dict(e, timetable_id=i) for i, e in enumerate(entries + entries[:1])]
+
+    result = run_engine(data, engine="monolithic", time_limit=20.0)
+    assert result["feasible"], result["stats"]["status"]
+    assert result["stats"]["hinted"] == len(entries)
+
+
+def test_decomposed_engine_splits_departments():
+    from services.scheduler_engines import find_components, run_engine
+
+    data = make_synthetic_college(departments=3, years=2, sections_per_year=2,
+                                  courses_per_year=3, rooms=12, unavailability_density=0.05)
+    assert find_components(data) == [[1], [2], [3]]
+
+    # One faculty member teaching in departments 1 and 3 couples them
+    shared = next(c for c in data["courses"] if c["dept_id"] == 3)
+    shared["faculty_id"] = data["courses"][0]["faculty_id"]
+    assert find_components(data) == [[1, 3], [2]]
+
+    result = run_engine(data, engine="decomposed", time_limit=20.0, max_workers=2)
+    assert result["feasible"]
+    assert [c["departments"] for c in result["stats"]["components"]] == [[1, 3], [2]]
+    assert all(c["wall_time"] is not None for c in result["stats"]["components"])
+
+    entries = result["entries"]
+    assert len(entries) == sum(c["hours_per_week"] * 2 for c in data["courses"])
+    assert max(Counter((e["slot"], e["room_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["faculty_id"]) for e in entries).values()) == 1
+    assert max(Counter((e["slot"], e["section_id"]) for e in entries).values()) == 1
+
+
+def test_solver_profile_parameters_are_applied_and_recorded():
+    import pytest
+    from services.scheduler_engines import run_engine
+    from services.solver_profiles import resolve_solver_params
+
+    params = resolve_solver_params("thorough", max_workers=2)
+    assert params["num_workers"] == 2 and params["profile"] == "thorough"
+    with pytest.raises(ValueError):
+        resolve_solver_params("turbo")
+
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=1,
+                                  courses_per_year=2, rooms=3, unavailability_density=0)
+    result = run_engine(data, engine="monolithic", time_limit=5.0,
+                        solver_params=dict(resolve_solver_params("quick", max_workers=1), random_seed=7))
+    recorded = result["stats"]["solver_params"]
+    assert result["feasible"]
+    assert recorded["profile"] == "quick"
+    assert recorded["num_workers"] == 1 and recorded["random_seed"] == 7
+    assert recorded["linearization_level"] == 0
+    assert recorded["max_time_in_seconds"] == 5.0
+
+
+def test_interchangeable_rooms_and_sections_are_merged_and_ordered():
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=3,
+                                  courses_per_year=3, rooms=8, unavailability_density=0)
+    for room in data["rooms"]:
+        room.update(name=f"Room-{room['room_id']:03d}", capacity=60, resources="Projector")
+    for section in data["sections"]:
+        section["student_count"] = 40
+    for course in data["courses"]:
+        course["type"] = "theory"
+
+    builder, entries = _solve(data)
+    assert builder.stats()["symmetry"] == {"room_classes": 1, "section_classes": 1}
+    assert len({room_id for (_, _, _, room_id) in builder.assignments}) == 1
+
+    # Expanded back to concrete, distinct rooms
+    assert len({e["room_id"] for e in entries}) > 1
+    assert max(Counter((e["slot"], e["room_id"]) for e in entries).values()) == 1
+
+    first = data["courses"][0]["course_id"]
+    positions = [sum(e["slot"] for e in entries if e["course_id"] == first and e["section_id"] == s["id"])
+                 for s in data["sections"]]
+    assert positions == sorted(positions)
+
+
+def test_objective_minimises_weighted_soft_constraints():
+    import pytest
+    from services.scheduler_engines import run_engine
+    from services.scheduler_objective import resolve_objective
+    from utils.slot_grid import slot_day, slot_hour
+
+    with pytest.raises(ValueError):
+        resolve_objective({"spread": -1})
+    with pytest.raises(ValueError):
+        resolve_objective({"lunch": 2})
+
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=2,
+                                  courses_per_year=3, rooms=4, unavailability_density=0)
+    data["objective"] = resolve_objective({"preferred_hours": [10, 11, 12, 13, 14]})
+    result = run_engine(data, engine="monolithic", time_limit=20.0)
+    stats = result["stats"]
+    assert result["status"] == "OPTIMAL"
+    assert stats["objective"] == stats["best_bound"] == 0
+    assert set(stats["objective_terms"]) == {"section_gaps", "faculty_gaps", "spread", "unpreferred"}
+
+    # Checked independently of the model: no gaps, no early/late classes, one meeting a day
+    entries = result["entries"]
+    assert all(slot_hour(e["slot"]) in range(10, 15) for e in entries)
+    for section in data["sections"]:
+        by_day = {}
+        for e in entries:
+            if e["section_id"] == section["id"]:
+                by_day.setdefault(slot_day(e["slot"]), []).append(slot_hour(e["slot"]))
+        assert all(max(hours) - min(hours) + 1 == len(hours) for hours in by_day.values())
+    assert max(Counter((e["course_id"], e["section_id"], slot_day(e["slot"])) for e in entries).values()) == 1
+
+    # All weights zero: a pure feasibility model again
+    data["objective"] = resolve_objective({term: 0 for term in ("section_gaps", "faculty_gaps",
+                                                                "spread", "unpreferred")})
+    builder = TimetableModelBuilder(data).build()
+    assert builder.objective_terms == {} and not builder.model.HasObjective()
+
+
+def test_interval_engine_schedules_labs_in_contiguous_blocks():
+    from services.scheduler_engines import run_engine
+    from services.scheduler_intervals import lab_blocks
+    from services.scheduler_model import is_lab_course
+    from utils.slot_grid import slot_day
+
+    assert lab_blocks(1) == [1] and lab_blocks(3) == [3] and lab_blocks(4) == [2, 2] and lab_blocks(5) == [2, 3]
+
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2, courses_per_year=4,
+                                  rooms=15, lab_share=0.3, hours_per_week=4, unavailability_density=0.1)
+    data["courses"][0].update(type="Lab", hours_per_week=3)
+    result = run_engine(data, engine="interval", time_limit=20.0)
+    assert result["feasible"]
+    assert result["stats"]["lab_blocks"] > 0
+
+    entries = result["entries"]
+    for key in ("room_id", "faculty_id", "section_id"):
+        assert max(Counter((e["slot"], e[key]) for e in entries).values()) == 1
+    unavailable = {(u["faculty_id"], u["slot"]) for u in data["unavailability"]}
+    assert not any((e["faculty_id"], e["slot"]) in unavailable for e in entries)
+
+    # Every lab block is a run of consecutive hours on one day, in one room
+    courses = {c["course_id"]: c for c in data["courses"]}
+    hours = {}
+    for e in entries:
+        hours.setdefault((e["course_id"], e["section_id"]), []).append((e["slot"], e["room_id"]))
+    for (course_id, _), placed in hours.items():
+        course = courses[course_id]
+        assert len(placed) == course["hours_per_week"]
+        if not is_lab_course(course):
+            continue
+        runs, previous = [], None
+        for slot, room_id in sorted(placed):
+            if previous and slot == previous[0] + 1 and room_id == previous[1] and slot_day(slot) == slot_day(previous[0]):
+                runs[-1] += 1
+            else:
+                runs.append(1)
+            previous = (slot, room_id)
+        # Two blocks may touch and form a longer run, but no lab hour stands alone
+        assert all(run >= 2 for run in runs)
+
+
+def test_interval_objective_stays_smaller_than_slot_model():
+    from services.scheduler_intervals import IntervalModelBuilder
+    from services.scheduler_objective import OBJECTIVE_TERMS, resolve_objective
+
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2, courses_per_year=4,
+                                  rooms=10, lab_share=0.5, unavailability_density=0.05)
+    data["objective"] = resolve_objective()
+    intervals = IntervalModelBuilder(data).build()
+    assert set(intervals.objective_terms) == set(OBJECTIVE_TERMS)
+    assert intervals.stats()["variables"] < TimetableModelBuilder(data).build().stats()["variables"]
+
+    # Without labs both models give a timetable the same score
+    data = make_synthetic_college(departments=1, years=1, sections_per_year=2, courses_per_year=3, rooms=2,
+                                  lab_share=0, hours_per_week=5, unavailability_density=0.3, seed=3)
+    data["objective"] = resolve_objective({"preferred_hours": [9, 10, 11, 12]})
+    scores = []
+    slot_model = TimetableModelBuilder(data).build()
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 20.0
+    assert solver.Solve(slot_model.model) == cp_model.OPTIMAL
+    scores.append({term: solver.Value(expr) for term, expr in slot_model.objective_terms.items()})
+    hours = {}
+    for e in slot_model.extract(solver):
+        hours.setdefault((e["course_id"], e["section_id"]), []).append(e["slot"])
+    starts = {(course_id, section_id, index): slot for (course_id, section_id), slots in hours.items()
+              for index, slot in enumerate(sorted(slots))}
+
+    intervals = IntervalModelBuilder(data, assign_rooms=False).fix_starts(starts).build()
+    solver = cp_model.CpSolver()
+    assert solver.Solve(intervals.model) == cp_model.OPTIMAL
+    scores.append({term: solver.Value(expr) for term, expr in intervals.objective_terms.items()})
+    assert scores[0] == scores[1] and sum(scores[0].values()) > 0
@@ -0,0 +1,41 @@
+"""
+Tests for the integer slot grid.
+Run with: python -m pytest test_slot_grid.py
+"""
+
+import pytest
+
+from extensions import db
+from utils.slot_grid import SlotGrid, slot_from_labels, slot_labels, slot_day, DEFAULT_GRID
+
+
+def test_labels_round_trip_and_grid():
+    assert slot_from_labels("Monday", "09:00") == slot_from_labels("mon", "9") == 9
+    assert slot_labels(slot_from_labels("Wed", "14")) == ("Wednesday", "14:00")
+    assert slot_from_labels("Funday", "09:00") is None and slot_from_labels("Mon", "noon") is None
+
+    assert len(DEFAULT_GRID) == 45
+    grid = SlotGrid.from_config({"days": ["Sat", "Mon"], "hours": ["08:00", 12]})
+    assert grid.to_config() == {"days": ["Mon", "Sat"], "hours": [8, 12]}
+    assert [slot_day(s) for s in grid.slots] == [0, 0, 5, 5]
+    assert slot_from_labels("Saturday", "12:00") in grid and 9 not in grid
+    with pytest.raises(ValueError):
+        SlotGrid(days=["Someday"])
+
+
+def test_rows_keep_slot_in_step_with_labels(app, college_id):
+    from models import Timetable, FacultyUnavailability
+
+    with app.app_context():
+        row = Timetable(college_id=college_id, course_id=1, section_id=1, faculty_id=1, room_id=1,
+                        day="Tuesday", start_time="10:00")
+        labelled_by_slot = FacultyUnavailability(college_id=college_id, faculty_id=1,
+                                                 slot=slot_from_labels("Fri", "16"))
+        db.session.add_all([row, labelled_by_slot])
+        db.session.commit()
+        assert row.slot == slot_from_labels("Tue", "10")
+        assert (labelled_by_slot.day, labelled_by_slot.start_time) == ("Friday", "16:00")
+
+        row.day = "Thursday"
+        db.session.commit()
+        assert slot_labels(row.slot) == ("Thursday", "10:00")
@@ -0,0 +1,64 @@
+"""
+Tests for the generation input fingerprint cache.
+Run with: python -m pytest test_solution_cache.py
+"""
+
+import random
+
+from extensions import db
+from benchmark_scheduler import make_synthetic_college
+from services.solution_cache import input_fingerprint
+
+
+def test_fingerprint_ignores_row_order_but_not_content():
+    data = make_synthetic_college(departments=2, years=2, sections_per_year=2, courses_per_year=3, rooms=6)
+    shuffled = {k: list(v) if isinstance(v, list) else v for k, v in data.items()}
+    for rows in shuffled.values():
+        if isinstance(rows, list):
+            random.Random(1).shuffle(rows)
+
+    base = input_fingerprint(data, "two_phase", {"time_limit": 10})
+    assert input_fingerprint(shuffled, "two_phase", {"time_limit": 10}) == base
+    assert input_fingerprint(data, "monolithic", {"time_limit": 10}) != base
+    assert input_fingerprint(data, "two_phase", {"time_limit": 20}) != base
+
+    data["unavailability"].append({"faculty_id": 1, "slot": 9})
+    assert input_fingerprint(data, "two_phase", {"time_limit": 10}) != base
+
+
+def test_repeated_generation_reuses_cached_solution(app, college_id, monkeypatch, tmp_path):
+    from models import Timetable, FacultyUnavailability
+    from services import scheduler_service
+
+    with app.app_context():
+        first = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        assert first["success"] and "cached" not in first["stats"]
+        rows = {t.timetable_id for t in Timetable.query.filter_by(college_id=college_id)}
+
+        def no_solve(*args, **kwargs):
+            raise AssertionError("solver should not run on a cache hit")
+
+        monkeypatch.setattr(scheduler_service, "run_engine", no_solve)
+        second = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        assert second["stats"]["cached"]
+        assert second["stats"]["rows_inserted"] == 0
+        assert {t.timetable_id for t in Timetable.query.filter_by(college_id=college_id)} == rows
+
+        # Manual edits are rolled back to the cached solution, still without solving
+        Timetable.query.filter_by(college_id=college_id).first().day = "Saturday"
+        db.session.commit()
+        third = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        assert third["success"] and third["stats"]["rows_inserted"] == 1
+
+        monkeypatch.undo()
+        monkeypatch.chdir(tmp_path)
+        forced = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id,
+                                                               force=True)
+        assert forced["success"] and "cached" not in forced["stats"]
+
+        faculty_id = Timetable.query.filter_by(college_id=college_id).first().faculty_id
+        db.session.add(FacultyUnavailability(college_id=college_id, faculty_id=faculty_id,
+                                             day="Friday", start_time="16:00"))
+        db.session.commit()
+        changed = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        assert changed["success"] and "cached" not in changed["stats"]
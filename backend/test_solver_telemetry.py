@@ -0,0 +1,68 @@
+"""
+Tests for per-run solver telemetry.
+Run with: python -m pytest test_solver_telemetry.py
+"""
+
+import pytest
+
+from benchmark_scheduler import make_synthetic_college
+from services.scheduler_engines import run_engine
+from services.scheduler_objective import resolve_objective
+
+
+def test_engine_stats_carry_search_counters_and_trajectory():
+    data = make_synthetic_college(departments=1, years=2, sections_per_year=2, courses_per_year=3, rooms=5)
+    data["objective"] = resolve_objective()
+    stats = run_engine(data, engine="monolithic", time_limit=10.0)["stats"]
+
+    assert stats["search"]["presolve"]["variables"] >= stats["variables"]
+    assert stats["search"]["branches"] >= 0 and stats["search"]["wall_time"] > 0
+    objectives = [objective for _, objective in stats["objective_trajectory"]]
+    assert objectives and objectives == sorted(objectives, reverse=True)
+    assert objectives[-1] == stats["objective"]
+
+
+def test_peak_memory_is_only_reported_for_the_run_that_set_it():
+    from services.solver_telemetry import memory_baseline, peak_memory_mb
+
+    baseline = memory_baseline()
+    if baseline is None:
+        pytest.skip("resident memory is not measured on this platform")
+    # Neither high-water mark moved: whatever set them ran before
+    assert peak_memory_mb(baseline) is None
+    own, children = baseline
+    assert peak_memory_mb((own - 1, children)) > 0
+
+
+def test_generation_records_solver_run_and_scaling_summary(app, college_id):
+    from models import SolverRun
+    from services import scheduler_service
+    from services.solver_telemetry import scaling_summary
+
+    app.config["SOLVER_RUNS_KEPT"] = 2
+    with app.app_context():
+        for engine in ("monolithic", "two_phase", "interval"):
+            result = scheduler_service.generate_timetable_internal(engine=engine, college_id=college_id,
+                                                                   force=True, time_limit=5)
+            assert result["success"]
+
+        # Only the newest runs are kept
+        runs = SolverRun.query.order_by(SolverRun.id).all()
+        assert [r.engine for r in runs] == ["two_phase", "interval"]
+        run = runs[-1]
+        assert result["stats"]["solver_run_id"] == run.id
+        assert run.feasible and run.variables > 0 and run.constraints > 0
+        assert run.time_limit == 5 and not run.hit_time_limit
+
+        telemetry = run.telemetry
+        assert telemetry["model"]["constraints"]["hours"] > 0
+        # The interval engine solves times, then rooms: both solves are counted
+        assert telemetry["search"]["solves"] == 2 == len(telemetry["presolve"])
+        assert telemetry["timings"]["total"] >= telemetry["timings"]["solve"]
+        if telemetry["peak_memory_mb"] is not None:
+            assert telemetry["peak_memory_mb"] > 0
+
+        summary, = scaling_summary()
+        assert summary["college_id"] == college_id and summary["runs"] == 2
+        assert summary["max_variables"] == max(r.variables for r in runs)
+        assert summary["time_limit_hits"] == 0
@@ -0,0 +1,64 @@
+"""
+Tests for batch approval of swap requests.
+Run with: python -m pytest test_swap_batch.py
+"""
+
+from datetime import datetime, timedelta
+
+from extensions import db
+
+
+def test_batch_approves_chains_and_resolves_competing_requests(app, college_id):
+    from models import SwapRequest, Timetable, User
+    from services import scheduler_service
+    from services.occupancy_index import get_occupancy_index
+    from services.swap_batch import approve_batch
+    from utils.slot_grid import SlotGrid, slot_labels
+
+    with app.app_context():
+        scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        admin = User(college_id=college_id, username="admin", password_hash="x", role="admin")
+        db.session.add(admin)
+        db.session.commit()
+
+        e1, e2, e3, e4, e5 = Timetable.query.order_by(Timetable.timetable_id).limit(5).all()
+        index = get_occupancy_index(college_id)
+        free = index.free_slots(SlotGrid().slots, section_id=e1.section_id)
+        start = datetime(2026, 1, 1)
+
+        def ask(entry, slot, minutes):
+            day, start_time = slot_labels(slot)
+            r = SwapRequest(college_id=college_id, requesting_faculty_id=entry.faculty_id,
+                            original_timetable_id=entry.timetable_id, proposed_day=day,
+                            proposed_start_time=start_time, created_at=start + timedelta(minutes=minutes))
+            db.session.add(r)
+            return r
+
+        first = ask(e1, free[0], 0)       # both want the same free slot; the older one wins
+        second = ask(e2, free[0], 1)
+        vacated = e4.slot
+        into = ask(e3, vacated, 2)        # only fits once the next request moves e4 out,
+        out = ask(e4, free[1], 3)         # so approving in order would reject it
+        same = ask(e5, e5.slot, 4)
+        db.session.commit()
+
+        preview = approve_batch(college_id, admin, dry_run=True)
+        db.session.rollback()
+        assert preview["outcomes"] == {"approved": 3, "conflict": 1, "invalid": 1}
+        assert SwapRequest.query.filter_by(status="pending").count() == 5
+
+        report = approve_batch(college_id, admin)
+        db.session.commit()
+        outcomes = {r["request_id"]: r for r in report["results"]}
+        assert [outcomes[r.id]["outcome"] for r in (first, second, into, out, same)] == \
+            ["approved", "conflict", "approved", "approved", "invalid"]
+        assert outcomes[second.id]["competing_requests"] == [first.id]
+        assert f"moved there by swap request #{first.id}" in outcomes[second.id]["message"]
+        assert second.status == "pending" and into.status == "approved"
+        assert [e1.slot, e3.slot, e4.slot] == [free[0], vacated, free[1]]
+        assert e3.is_swapped and e3.swapped_by_id == admin.id
+
+        # Still one class per section slot
+        index = get_occupancy_index(college_id)
+        slots = [placement[3] for placement in index.entries.values()]
+        assert len(slots) == len(set(slots)) == 9
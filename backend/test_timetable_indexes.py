@@ -0,0 +1,78 @@
+"""
+Query-plan checks for the composite timetable indexes.
+Run with: python -m pytest test_timetable_indexes.py
+"""
+
+import re
+import inspect
+from datetime import datetime
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from extensions import db
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tenant_filter():
+    from utils.query_filter import init_query_filter
+    init_query_filter(db)
+
+
+def _timetable_plans(call):
+    """Run call() and return the query plan of every timetable SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "FROM timetable" in statement:
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    connection = db.session.connection()
+    return [" | ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {s}", p))
+            for s, p in statements]
+
+
+def test_timetable_lookups_use_composite_indexes(app, college_id):
+    from models import Course, Resource, Section, User
+    from services import scheduler_service
+    from services.google_calendar_service import _get_timetable_entries_for_user
+    from routes.timetable_routes import student_timetable, teacher_timetable
+    from routes.resource_routes import has_conflict
+    from utils.chatbot_utils import get_free_rooms_chatbot
+
+    with app.test_request_context():
+        scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        course = Course.query.filter_by(college_id=college_id).first()
+        section = Section.query.filter_by(college_id=college_id).first()
+        teacher = User(college_id=college_id, username="f0", password_hash="x", role="teacher",
+                       full_name=course.faculty.faculty_name, dept_id=course.dept_id)
+        student = User(college_id=college_id, username="s0", password_hash="x", role="student",
+                       section_id=section.id)
+        resource = Resource(college_id=college_id, name="Hall", resource_type="room", classroom_id=1)
+        db.session.add_all([teacher, student, resource])
+        db.session.commit()
+
+        g.college_id = college_id
+        # column each lookup must seek on -> the calls that look it up
+        lookups = {
+            "faculty_id": [lambda: inspect.unwrap(teacher_timetable)(teacher)],
+            "section_id": [lambda: inspect.unwrap(student_timetable)(student),
+                           lambda: _get_timetable_entries_for_user(student)],
+            "room_id": [lambda: has_conflict(resource.id, datetime(2026, 1, 5, 9), datetime(2026, 1, 5, 11))],
+            "slot": [lambda: get_free_rooms_chatbot(student)],
+        }
+        for column, calls in lookups.items():
+            for call in calls:
+                plans = _timetable_plans(call)
+                assert plans, column
+                for plan in plans:
+                    assert re.search(rf"SEARCH timetable USING (COVERING )?INDEX ix_timetable_college_\w+ "
+                                     rf"\(college_id=\? AND [^)]*\b{column}=\?", plan), plan
+        db.session.rollback()
@@ -0,0 +1,140 @@
+"""
+Tests for versioned timetables and atomic activation.
+Run with: python -m pytest test_timetable_versions.py
+"""
+
+import pytest
+
+from extensions import db
+
+
+@pytest.fixture(scope="module", autouse=True)
+def active_version_filter():
+    from utils.query_filter import init_query_filter
+    init_query_filter(db)
+
+
+def test_generation_activates_new_version_and_keeps_old(app, college_id, monkeypatch):
+    from models import College, Timetable, TimetableVersion, FacultyUnavailability
+    from services import scheduler_service, timetable_versions
+
+    with app.app_context():
+        first = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        v1 = first["stats"]["version_id"]
+        assert db.session.get(College, college_id).active_timetable_version_id == v1
+        assert Timetable.query.count() == 9
+
+        # Block every slot the first timetable used for one faculty member
+        moved = Timetable.query.first()
+        for t in Timetable.query.filter_by(faculty_id=moved.faculty_id):
+            db.session.add(FacultyUnavailability(college_id=college_id, faculty_id=t.faculty_id,
+                                                 day=t.day[:3], start_time=t.start_time[:2]))
+        db.session.commit()
+
+        second = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id)
+        v2 = second["stats"]["version_id"]
+        assert v2 != v1
+        assert Timetable.query.count() == 9
+        assert {t.version_id for t in Timetable.query} == {v2}
+        assert timetable_versions.all_versions_query().count() == 18
+        assert db.session.get(TimetableVersion, v1).status == "archived"
+
+        diff = timetable_versions.diff_versions(v1, v2)
+        assert len(diff["added"]) == len(diff["removed"]) >= 3
+        assert diff["unchanged"] + len(diff["added"]) == 9
+
+        # A failing write leaves the live version untouched
+        def broken(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(scheduler_service, "create_version", broken)
+        db.session.query(FacultyUnavailability).delete()
+        db.session.commit()
+        failed = scheduler_service.generate_timetable_internal(engine="two_phase", college_id=college_id,
+                                                               force=True)
+        assert failed["success"] is False
+        assert db.session.get(College, college_id).active_timetable_version_id == v2
+        assert Timetable.query.count() == 9
+
+        # Rollback to the first version
+        timetable_versions.activate_version(db.session.get(TimetableVersion, v1))
+        db.session.commit()
+        assert {t.version_id for t in Timetable.query} == {v1}
+
+
+def test_bulk_writer_sets_college_and_defaults(app, college_id):
+    from models import Timetable
+    from services.bulk_writer import write_timetable_rows, _copy_value
+
+    with app.app_context():
+        rows = [{"course_id": 1, "section_id": 1, "faculty_id": 1, "room_id": 1,
+                 "day": "Monday", "start_time": f"{9 + n:02d}:00"} for n in range(3)]
+
+        assert write_timetable_rows(rows, college_id) == 3
+        db.session.commit()
+        written = Timetable.query.execution_options(all_timetable_versions=True).all()
+        assert {(t.college_id, t.is_swapped, t.version_id) for t in written} == {(college_id, False, None)}
+
+        with pytest.raises(ValueError):
+            write_timetable_rows(rows, college_id, method="values")
+
+    assert [_copy_value(v) for v in (None, True, "Monday", 3)] == [r"\N", "t", "Monday", 3]
+
+
+def test_improve_replaces_active_version_only_when_better(app, college_id):
+    from models import College
+    from services import scheduler_service
+
+    with app.app_context():
+        first = scheduler_service.generate_timetable_internal(engine="monolithic", college_id=college_id)
+        v1 = first["stats"]["version_id"]
+        assert first["stats"]["objective"] is not None
+
+        again = scheduler_service.generate_timetable_internal(engine="monolithic", college_id=college_id,
+                                                              improve=True, time_limit=5)
+        assert again["success"] and again["stats"]["improved"] is False
+        assert db.session.get(College, college_id).active_timetable_version_id == v1
+
+        # Scores under other weights are not comparable: the new weights' best is taken
+        college = db.session.get(College, college_id)
+        college.objective_weights = {"preferred_hours": [16]}
+        db.session.commit()
+        better = scheduler_service.generate_timetable_internal(engine="monolithic", college_id=college_id,
+                                                               improve=True, time_limit=5)
+        assert better["stats"]["improved"] is True
+        assert db.session.get(College, college_id).active_timetable_version_id == better["stats"]["version_id"]
+
+
+def test_repair_moves_only_disrupted_entries_and_applies_as_version(app, college_id):
+    from models import College, FacultyUnavailability, Timetable
+    from services import scheduler_service
+    from services.scheduler_model import load_scheduler_input
+    from services.timetable_repair import parse_disruption, repair_timetable, apply_repair
+    from services.timetable_versions import active_timetable_query
+
+    with app.app_context():
+        v1 = scheduler_service.generate_timetable_internal(engine="monolithic", college_id=college_id)["stats"]["version_id"]
+        before = active_timetable_query(college_id).all()
+        hit = before[0]
+
+        disruption = parse_disruption({"type": "faculty_unavailable", "faculty_id": hit.faculty_id,
+                                       "slots": [{"day": hit.day, "start_time": hit.start_time}]})
+        result = repair_timetable(load_scheduler_input(college_id, include_timetable=True), disruption)
+        assert result["feasible"] and result["stats"]["affected_entries"] == 1
+        # Plenty of free slots: only the disrupted class moves
+        assert [c["timetable_id"] for c in result["changes"]] == [hit.timetable_id]
+        assert result["unchanged"] == len(before) - 1
+
+        version = apply_repair(college_id, disruption, result)
+        db.session.commit()
+        assert version.parent_version_id == v1
+        assert db.session.get(College, college_id).active_timetable_version_id == version.id
+
+        after = active_timetable_query(college_id).all()
+        assert len(after) == len(before)
+        assert not any(t.faculty_id == hit.faculty_id and t.slot == hit.slot for t in after)
+        assert len({(t.slot, t.room_id) for t in after}) == len(after)
+        assert len({(t.slot, t.section_id) for t in after}) == len(after)
+        assert FacultyUnavailability.query.filter_by(faculty_id=hit.faculty_id, slot=hit.slot).count() == 1
+        assert Timetable.query.execution_options(all_timetable_versions=True) \
+            .filter(Timetable.version_id == v1).count() == len(before)
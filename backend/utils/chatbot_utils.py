@@ -10,6 +10,7 @@ from models import (
     Timetable, Faculty, Classroom, LeaveRequest,
     SystemAnnouncement, SwapRequest, ChatbotConversation
 )
+from utils.slot_grid import make_slot, slot_hour, slot_labels, slot_name, SLOTS_PER_DAY, WEEK_DAYS
 
 # Enhanced Intent Recognition for SIH
 INTENTS = {
@@ -170,8 +171,7 @@ def get_next_class_chatbot(current_user):
     """Enhanced next class finder"""
     try:
         now = datetime.now()
-        current_day = now.strftime("%a")
-        current_hour = now.hour
+        current_slot = make_slot(now.weekday(), now.hour)
         
         if current_user.role == "student":
             entries = Timetable.query.filter_by(section_id=current_user.section_id).all()
@@ -204,48 +204,29 @@ def get_next_class_chatbot(current_user):
                 "timestamp": datetime.utcnow().isoformat()
             })
 
-        # Find next class
-        days_order = ["Mon", "Tue", "Wed", "Thu", "Fri"]
-        current_day_idx = days_order.index(current_day) if current_day in days_order else 0
-        
-        # Look for classes today after current time
-        today_classes = [e for e in entries if e.day == current_day and int(e.start_time) > current_hour]
-        if today_classes:
-            next_class = min(today_classes, key=lambda x: int(x.start_time))
-            time_diff = int(next_class.start_time) - current_hour
+        # Find next class: the first slot after now, wrapping around the week
+        week = len(WEEK_DAYS) * SLOTS_PER_DAY
+        upcoming = [e for e in entries if e.slot is not None]
+        if upcoming:
+            next_class = min(upcoming, key=lambda e: (e.slot - current_slot - 1) % week)
+            hours_until = (next_class.slot - current_slot) % week
+            day, start_time = slot_labels(next_class.slot)
             response = f"⏰ **Your Next Class:**\n\n"
             response += f"📚 **{next_class.course.name}**\n"
-            response += f"🕐 **{next_class.start_time}:00** (in {time_diff} hour(s))\n"
+            if 0 < hours_until < SLOTS_PER_DAY - slot_hour(current_slot):
+                response += f"🕐 **{start_time}** (in {hours_until} hour(s))\n"
+            else:
+                response += f"📅 **{day} at {start_time}**\n"
             response += f"📍 **{next_class.room.name}**\n"
             response += f"👨‍🏫 **{next_class.faculty.faculty_name}**"
-            
+
             return jsonify({
                 "success": True,
                 "response": response,
                 "type": "next_class",
                 "timestamp": datetime.utcnow().isoformat()
             })
-        
-        # Look for classes in upcoming days
-        for i in range(1, 6):
-            day_idx = (current_day_idx + i) % 5
-            day = days_order[day_idx]
-            day_classes = [e for e in entries if e.day == day]
-            if day_classes:
-                next_class = min(day_classes, key=lambda x: int(x.start_time))
-                response = f"⏰ **Your Next Class:**\n\n"
-                response += f"📚 **{next_class.course.name}**\n"
-                response += f"📅 **{day} at {next_class.start_time}:00**\n"
-                response += f"📍 **{next_class.room.name}**\n"
-                response += f"👨‍🏫 **{next_class.faculty.faculty_name}**"
-                
-                return jsonify({
-                    "success": True,
-                    "response": response,
-                    "type": "next_class",
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-        
+
         return jsonify({
             "success": True,
             "response": "📅 No upcoming classes found this week.",
@@ -266,30 +247,19 @@ def get_free_rooms_chatbot(current_user):
     """Enhanced free rooms checker"""
     try:
         now = datetime.now()
-        current_day = now.strftime("%a")
-        current_hour = now.hour
-        
-        # Find current slot
-        time_slots = ["09", "11", "01", "03"]
-        current_slot = None
-        for slot in time_slots:
-            slot_hour = int(slot) if int(slot) > 8 else int(slot) + 12
-            if current_hour >= slot_hour and current_hour < slot_hour + 1:
-                current_slot = slot
-                break
-        
-        if not current_slot:
+        current_slot = make_slot(now.weekday(), now.hour)
+
+        # Find occupied rooms
+        occupied_rooms = db.session.query(Timetable.room_id)\
+            .filter(Timetable.slot == current_slot)\
+            .distinct().all()
+        if not occupied_rooms:
             return jsonify({
                 "success": True,
                 "response": "ℹ️ No classes are currently running.",
                 "type": "info",
                 "timestamp": datetime.utcnow().isoformat()
             })
-        
-        # Find occupied rooms
-        occupied_rooms = db.session.query(Timetable.room_id)\
-            .filter_by(day=current_day, start_time=current_slot)\
-            .distinct().all()
         occupied_room_ids = [room[0] for room in occupied_rooms]
         
         # Find free rooms
@@ -304,7 +274,7 @@ def get_free_rooms_chatbot(current_user):
                 "timestamp": datetime.utcnow().isoformat()
             })
         
-        response = f"🏫 **Free Rooms Right Now** ({current_day} {current_slot}:00)\n\n"
+        response = f"🏫 **Free Rooms Right Now** ({slot_name(current_slot)})\n\n"
         for room in free_rooms:
             response += f"📍 **{room.name}**\n"
             response += f"   👥 Capacity: {room.capacity}\n"
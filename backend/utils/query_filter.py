@@ -1,8 +1,21 @@
-from sqlalchemy import event
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select, or_, and_
+from sqlalchemy.orm import Session, with_loader_criteria
 from flask import g
 import traceback
 
+
+def active_timetable_criterion(cls):
+    """Timetable rows of their college's active version (unversioned rows while none is active)."""
+    from models import College
+    # Uncorrelated subqueries over the plain table: a subquery that refers
+    # back to Timetable gets the criterion applied to itself again
+    colleges = College.__table__
+    active = select(colleges.c.active_timetable_version_id).where(
+        colleges.c.active_timetable_version_id.isnot(None))
+    unversioned = select(colleges.c.id).where(colleges.c.active_timetable_version_id.is_(None))
+    return or_(cls.version_id.in_(active), and_(cls.version_id.is_(None), cls.college_id.in_(unversioned)))
+
+
 def init_query_filter(db):
     """Initialize automatic tenant filtering"""
     
@@ -57,6 +70,21 @@ def init_query_filter(db):
             
         # print(f"🛡️  [ISOLATION] Finalized isolation for {college_id}")
 
+    @event.listens_for(Session, "do_orm_execute")
+    def only_active_timetable_version(orm_execute_state):
+        """Readers see the active timetable version; pass all_timetable_versions=True to see every version"""
+        if not orm_execute_state.is_select:
+            return
+        if orm_execute_state.execution_options.get("all_timetable_versions"):
+            return
+
+        from models import Timetable
+        # A prebuilt expression rather than a lambda: lambda criteria are
+        # traced by SQLAlchemy, which cannot follow the subqueries
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(Timetable, active_timetable_criterion(Timetable))
+        )
+
     @event.listens_for(Session, "before_flush")
     def automatic_college_id_injection(session, flush_context, instances):
         """Automatically set college_id on all new objects before they hit the DB"""
@@ -0,0 +1,132 @@
+"""
+Integer slot grid shared by the scheduler, the models and the routes.
+
+A slot id encodes a weekly (day, hour) cell as day_index * SLOTS_PER_DAY + hour,
+with day_index 0 = Monday: Mon 09:00 is 9, Tue 09:00 is 33. Ids do not
+depend on any college's grid, so ids stored on Timetable,
+FacultyUnavailability and SwapRequest stay valid when a college changes its
+days or periods. A SlotGrid is the subset of ids a college schedules on.
+
+Slot ids are compared, indexed and hashed as plain ints; (day, start_time)
+labels such as ("Monday", "09:00") are produced only where rows are shown
+or received (API payloads, CSV, e-mails, messages).
+"""
+
+WEEK_DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DAY_NAMES = {
+    "Mon": "Monday", "Tue": "Tuesday", "Wed": "Wednesday", "Thu": "Thursday",
+    "Fri": "Friday", "Sat": "Saturday", "Sun": "Sunday"
+}
+SLOTS_PER_DAY = 24
+
+DEFAULT_DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+DEFAULT_HOURS = [9, 10, 11, 12, 13, 14, 15, 16, 17]
+
+
+def parse_day(day):
+    """Day index for 'Mon', 'monday', 'Monday ' or an index; None if unknown."""
+    if day is None:
+        return None
+    if isinstance(day, int):
+        return day if 0 <= day < len(WEEK_DAYS) else None
+    abbrev = str(day).strip()[:3].title()
+    return WEEK_DAYS.index(abbrev) if abbrev in WEEK_DAYS else None
+
+
+def parse_hour(start_time):
+    """Hour of '09:00', '9', '09' or 9; None if not a clock hour. Minutes are ignored."""
+    if start_time is None:
+        return None
+    if isinstance(start_time, int):
+        hour = start_time
+    else:
+        text = str(start_time).strip().split(":")[0]
+        if not text.isdigit():
+            return None
+        hour = int(text)
+    return hour if 0 <= hour < SLOTS_PER_DAY else None
+
+
+def make_slot(day_index, hour):
+    return day_index * SLOTS_PER_DAY + hour
+
+
+def slot_from_labels(day, start_time):
+    """('Monday', '09:00') -> 9. None if either label does not parse."""
+    day_index, hour = parse_day(day), parse_hour(start_time)
+    if day_index is None or hour is None:
+        return None
+    return make_slot(day_index, hour)
+
+
+def slot_day(slot):
+    """Day index of a slot id."""
+    return slot // SLOTS_PER_DAY
+
+
+def slot_hour(slot):
+    return slot % SLOTS_PER_DAY
+
+
+def slot_labels(slot):
+    """Slot id -> the (day, start_time) labels stored and shown: 9 -> ('Monday', '09:00')."""
+    return DAY_NAMES[WEEK_DAYS[slot_day(slot)]], f"{slot_hour(slot):02d}:00"
+
+
+def slot_name(slot):
+    """Short label for messages and logs: 9 -> 'Mon 09:00'."""
+    return f"{WEEK_DAYS[slot_day(slot)]} {slot_hour(slot):02d}:00"
+
+
+def sync_slot(target, day_attr="day", time_attr="start_time", slot_attr="slot"):
+    """
+    Keep a row's integer slot and its labels in step before it is written.
+    Labels win when present (most writers still send day/start_time);
+    rows given only a slot get their labels filled in.
+    """
+    day, start_time = getattr(target, day_attr), getattr(target, time_attr)
+    if day and start_time:
+        setattr(target, slot_attr, slot_from_labels(day, start_time))
+    elif getattr(target, slot_attr) is not None:
+        day, start_time = slot_labels(getattr(target, slot_attr))
+        setattr(target, day_attr, day)
+        setattr(target, time_attr, start_time)
+
+
+class SlotGrid:
+    """
+    The days x periods a college schedules on. slots lists the slot ids in
+    day-major order.
+    """
+
+    def __init__(self, days=None, hours=None):
+        days = days or DEFAULT_DAYS
+        hours = hours or DEFAULT_HOURS
+        day_indexes = [parse_day(d) for d in days]
+        hour_values = [parse_hour(h) for h in hours]
+        if None in day_indexes:
+            raise ValueError(f"Unknown day in slot grid: {days}")
+        if None in hour_values:
+            raise ValueError(f"Hours in a slot grid must be whole hours 0-23: {hours}")
+        self.days = sorted(set(day_indexes))
+        self.hours = sorted(set(hour_values))
+        self.slots = [make_slot(d, h) for d in self.days for h in self.hours]
+        self._slot_set = set(self.slots)
+
+    @classmethod
+    def from_config(cls, config):
+        """Grid from a College.slot_grid value ({"days": [...], "hours": [...]}); None gives the default."""
+        config = config or {}
+        return cls(config.get("days"), config.get("hours"))
+
+    def to_config(self):
+        return {"days": [WEEK_DAYS[d] for d in self.days], "hours": list(self.hours)}
+
+    def __contains__(self, slot):
+        return slot in self._slot_set
+
+    def __len__(self):
+        return len(self.slots)
+
+
+DEFAULT_GRID = SlotGrid()
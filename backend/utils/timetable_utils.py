@@ -2,7 +2,15 @@
 Utility functions for timetable operations
 """
 
+from flask import jsonify
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from extensions import db
 from models import Timetable
+from models.timetable import BOOKING_CONSTRAINTS
+from services.occupancy_index import get_occupancy_index
+from utils.slot_grid import slot_from_labels
 
 
 def check_for_conflict(timetable_entry_to_move, new_day, new_start_time, exclude_ids=None):
@@ -12,40 +20,69 @@ def check_for_conflict(timetable_entry_to_move, new_day, new_start_time, exclude
     
     exclude_ids: an optional list of timetable_ids to additionally exclude from conflict checks.
                  Used during true swaps where both entries are moving simultaneously.
+
+    Checked against the active timetable's occupancy index (services/occupancy_index.py);
+    only a conflicting entry is loaded from the database.
     """
+    new_slot = slot_from_labels(new_day, new_start_time)
+
     # Build a set of IDs to exclude (always exclude the entry being moved)
     excluded = {timetable_entry_to_move.timetable_id}
     if exclude_ids:
         excluded.update(exclude_ids)
 
-    # 1. Check for Faculty Conflict
-    faculty_conflict = Timetable.query.filter(
-        Timetable.faculty_id == timetable_entry_to_move.faculty_id,
-        Timetable.day == new_day,
-        Timetable.start_time == new_start_time,
-        ~Timetable.timetable_id.in_(excluded)
-    ).first()
-    if faculty_conflict:
-        return f"Faculty is already assigned to '{faculty_conflict.course.name}' at that time.", faculty_conflict
-
-    # 2. Check for Section Conflict
-    section_conflict = Timetable.query.filter(
-        Timetable.section_id == timetable_entry_to_move.section_id,
-        Timetable.day == new_day,
-        Timetable.start_time == new_start_time,
-        ~Timetable.timetable_id.in_(excluded)
-    ).first()
-    if section_conflict:
-        return f"Section is already scheduled for '{section_conflict.course.name}' at that time.", section_conflict
-
-    # 3. Check for Room Conflict
-    room_conflict = Timetable.query.filter(
-        Timetable.room_id == timetable_entry_to_move.room_id,
-        Timetable.day == new_day,
-        Timetable.start_time == new_start_time,
-        ~Timetable.timetable_id.in_(excluded)
-    ).first()
-    if room_conflict:
-        return f"Room '{timetable_entry_to_move.room.name}' is already booked at that time.", room_conflict
-
-    return None, None
+    if new_slot is None:
+        return None, None
+    index = get_occupancy_index(timetable_entry_to_move.college_id)
+    conflict = index.conflict(timetable_entry_to_move.faculty_id, timetable_entry_to_move.section_id,
+                              timetable_entry_to_move.room_id, new_slot, excluded)
+    if conflict is None:
+        return None, None
+    kind, conflicting_id = conflict
+    conflicting_entry = db.session.get(Timetable, conflicting_id)
+
+    # 1. Faculty Conflict
+    if kind == "faculty":
+        return f"Faculty is already assigned to '{conflicting_entry.course.name}' at that time.", conflicting_entry
+
+    # 2. Section Conflict
+    if kind == "section":
+        return f"Section is already scheduled for '{conflicting_entry.course.name}' at that time.", conflicting_entry
+
+    # 3. Room Conflict
+    return f"Room '{timetable_entry_to_move.room.name}' is already booked at that time.", conflicting_entry
+
+
+def is_write_conflict(error):
+    """
+    Whether a failed flush or commit lost a race with another writer: a row
+    changed since it was read (row_version), or a faculty member, section
+    or room would be booked twice in a slot (the unique constraints).
+    """
+    if isinstance(error, StaleDataError):
+        return True
+    if isinstance(error, IntegrityError):
+        message = str(error.orig)
+        # PostgreSQL names the constraint; SQLite lists the table's columns
+        return any(name in message for name in BOOKING_CONSTRAINTS) \
+            or "UNIQUE constraint failed: timetable." in message
+    return False
+
+
+def write_conflict_response(error):
+    """The 409 for a write that lost a race; reloading and retrying is safe."""
+    if isinstance(error, StaleDataError):
+        message = "This was changed by someone else in the meantime. Reload and try again."
+    else:
+        message = "That time was just booked by another change. Reload and try again."
+    return jsonify({"error": message, "retryable": True}), 409
+
+
+def stale_version_response(expected, current):
+    """The 409 for a request made against an older row_version than the stored one."""
+    return jsonify({
+        "error": "This was changed by someone else since you loaded it. Reload and try again.",
+        "retryable": True,
+        "row_version": current,
+        "expected_row_version": expected
+    }), 409